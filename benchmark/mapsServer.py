@@ -0,0 +1,343 @@
+"""
+Servidor HTTP local que imita o Google Maps para o benchmark offline.
+
+Serve os instantâneos de benchmark/fixtures: a lista de resultados com rolagem infinita
+(/maps/search/...) e a página de detalhes de cada lugar (/maps/place/...), alternando entre
+as variantes completa, com campos ausentes e com layout alternativo. Como no Maps, a primeira
+página de resultados vem embutida no HTML (APP_INITIALIZATION_STATE) e as seguintes chegam
+pela resposta interna /search?tbm=map, no mesmo formato lido pelo backend 'xhr' do scraper.
+
+Também pode ser executado sozinho para inspecionar as fixtures no navegador:
+    python benchmark/mapsServer.py --port 8765
+"""
+import argparse
+import html
+import json
+import os
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import quote, unquote, urlsplit, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Variantes da página de detalhes, usadas em sequência conforme o índice do lugar
+DETAIL_VARIANTS = ['detail_full.html', 'detail_missing.html', 'detail_alternate.html']
+
+# Identificador do lugar no link (!19s<Place ID>), de onde sai o índice do lugar
+PLACE_PATH_PATTERN = re.compile(r'!19sChIJbench(\d+)')
+
+CATEGORIES = ['Autoescola', 'Restaurante', 'Clínica médica', 'Padaria', 'Academia']
+STREETS = ['Rua Augusta', 'Avenida Paulista', 'Rua da Consolação', 'Avenida Brigadeiro Faria Lima',
+           'Rua Oscar Freire']
+
+
+def make_place(index):
+    """
+    Gera os dados fictícios (e determinísticos) de um lugar
+
+    Args:
+        index (int): Posição do lugar na lista de resultados (a partir de 0)
+
+    Returns:
+        dict: Dados do lugar, incluindo o caminho da página de detalhes
+    """
+    number = index + 1
+    category = CATEGORIES[index % len(CATEGORIES)]
+    digits = f"11{30000000 + index * 37:08d}"
+    lat = -23.55 + (index % 10) * 0.004
+    lng = -46.63 + (index // 10) * 0.004
+    name = f"{category} Fixture {number}"
+    place_id = f"ChIJbench{number:05d}"
+    feature_id = f"0x94ce59c8da0aa315:0x{number:x}"
+    return {
+        'index': index,
+        'name': name,
+        'category': category,
+        'address': f"{STREETS[index % len(STREETS)]}, {100 + index} - São Paulo, SP",
+        'phone': f"(11) {digits[2:6]}-{digits[6:]}",
+        'phone_digits': f"+55{digits}",
+        'website': f"https://fixture-{number}.example.com.br/",
+        'website_host': f"fixture-{number}.example.com.br",
+        'email': f"contato@fixture-{number}.example.com.br",
+        'rating': f"{3.5 + (index % 15) / 10:.1f}".replace('.', ','),
+        'reviews': 10 + index * 7,
+        'place_id': place_id,
+        'feature_id': feature_id,
+        'latitude': round(lat, 6),
+        'longitude': round(lng, 6),
+        'path': (f"/maps/place/{quote(name.replace(' ', '+'), safe='+')}/data=!4m7!3m6"
+                 f"!1s{feature_id}!8m2!3d{lat:.6f}!4d{lng:.6f}!19s{place_id}")
+    }
+
+
+def expected_fields(place):
+    """
+    Campos que o scraper deve extrair da página de detalhes do lugar, conforme a variante servida
+
+    Args:
+        place (dict): Lugar gerado por make_place
+
+    Returns:
+        dict: Campo -> valor esperado
+    """
+    variant = DETAIL_VARIANTS[place['index'] % len(DETAIL_VARIANTS)]
+    if variant == 'detail_full.html':
+        return {'address': place['address'], 'phone': place['phone'],
+                'website': place['website'], 'category': place['category']}
+    if variant == 'detail_missing.html':
+        return {'address': place['address'], 'category': place['category']}
+    # No layout alternativo o telefone só aparece no link tel:
+    return {'address': place['address'], 'phone': place['phone_digits'], 'website': place['website'],
+            'category': place['category'], 'email': place['email']}
+
+
+def payload_fields(place):
+    """
+    Campos que o parser das respostas internas (scraperMaps.parse_maps_payload) deve encontrar para o lugar
+
+    Args:
+        place (dict): Lugar gerado por make_place
+
+    Returns:
+        dict: Campo -> valor esperado
+    """
+    fields = {'name': place['name'], 'address': place['address'], 'category': place['category'],
+              'latitude': place['latitude'], 'longitude': place['longitude'],
+              'place_id': place['place_id'], 'feature_id': place['feature_id']}
+    # Os lugares da variante com campos ausentes também não têm telefone nem site nas respostas
+    if DETAIL_VARIANTS[place['index'] % len(DETAIL_VARIANTS)] != 'detail_missing.html':
+        fields.update(phone=place['phone'], website=place['website'])
+    return fields
+
+
+def place_array(place):
+    """
+    Vetor do lugar no formato das respostas internas do Maps (ver scraperMaps.PAYLOAD_FIELD_PATHS)
+    """
+    fields = payload_fields(place)
+    array = [None] * 179
+    array[4] = [None] * 7 + [float(place['rating'].replace(',', '.')), place['reviews']]
+    array[9] = [None, None, place['latitude'], place['longitude']]
+    array[10] = place['feature_id']
+    array[11] = place['name']
+    array[13] = [place['category']]
+    array[18] = f"{place['name']}, {place['address']}"
+    array[39] = place['address']
+    array[78] = place['place_id']
+    if 'website' in fields:
+        # O Maps entrega o site como redirecionamento do Google
+        array[7] = [f"/url?q={quote(place['website'], safe='')}&opi=79508299", place['website_host']]
+    if 'phone' in fields:
+        array[178] = [[place['phone'], [[place['phone']], [place['phone_digits']]]]]
+    return array
+
+
+def search_payload(query, places):
+    """
+    Dados de uma página de resultados no formato da resposta /search?tbm=map (depois do prefixo )]}')
+    """
+    payload = [None] * 65
+    payload[0] = [query, None, [None, None, -46.63, -23.55]]
+    payload[64] = [[None, place_array(place)] for place in places]
+    return payload
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    server_version = 'FixtureMaps/1.0'
+
+    def do_GET(self):
+        fixture = self.server.fixture
+        path = urlsplit(self.path).path
+
+        body = None
+        content_type = 'text/html; charset=utf-8'
+        if path == '/search':
+            params = parse_qs(urlsplit(self.path).query)
+            start = int(params.get('start', ['0'])[0])
+            body = fixture.render_search_payload(params.get('q', [''])[0], start)
+            content_type = 'application/json; charset=UTF-8'
+        elif path.startswith('/maps/search/'):
+            query = unquote(path[len('/maps/search/'):].split('/@')[0]).replace('+', ' ')
+            body = fixture.render_feed(query)
+        elif path.startswith('/maps/place/'):
+            match = PLACE_PATH_PATTERN.search(path)
+            if match and 0 < int(match.group(1)) <= len(fixture.places):
+                body = fixture.render_detail(fixture.places[int(match.group(1)) - 1])
+        elif path.rstrip('/') == '/maps':
+            body = fixture.templates['home.html']
+
+        if body is None:
+            self.send_error(404)
+            return
+
+        # Latência simulada do servidor
+        if fixture.latency:
+            time.sleep(fixture.latency)
+
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureMapsServer:
+    """
+    Servidor local com as fixtures do Maps, executado em uma thread
+
+    O endereço usa um subdomínio de localhost com "google" no nome (o Chrome resolve *.localhost
+    para 127.0.0.1), para que os links internos sejam tratados como links do Google pelo scraper.
+    """
+
+    def __init__(self, places=60, latency_ms=0, scroll_delay_ms=150, page_size=20,
+                 host='127.0.0.1', port=0, hostname='www.google.localhost'):
+        """
+        Args:
+            places (int): Quantidade de lugares na lista de resultados
+            latency_ms (int): Atraso de cada resposta do servidor, em milissegundos
+            scroll_delay_ms (int): Atraso para a próxima página da lista aparecer após a rolagem
+            page_size (int): Cartões carregados a cada rolagem
+            host (str): Interface onde o servidor escuta
+            port (int): Porta (0 = escolhida pelo sistema)
+            hostname (str): Nome usado nos links entregues ao navegador
+        """
+        self.places = [make_place(index) for index in range(places)]
+        self.latency = latency_ms / 1000
+        self.scroll_delay_ms = scroll_delay_ms
+        self.page_size = page_size
+        self.host = host
+        self.port = port
+        self.hostname = hostname
+        self.templates = {}
+        for name in DETAIL_VARIANTS + ['feed.html', 'home.html']:
+            with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+                self.templates[name] = f.read()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def maps_url(self):
+        """Endereço a ser usado como maps_url do scraper"""
+        return f"http://{self.hostname}:{self.port}/maps"
+
+    def start(self):
+        """
+        Inicia o servidor em segundo plano
+
+        Returns:
+            str: O endereço do Maps local (ver maps_url)
+        """
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _FixtureHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fixture = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.maps_url
+
+    def stop(self):
+        """Encerra o servidor"""
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def place_url(self, place):
+        return f"http://{self.hostname}:{self.port}{place['path']}"
+
+    def place_links(self, count=0):
+        """
+        Links das páginas de detalhes, no formato entregue por _collect_place_links
+
+        Args:
+            count (int): Quantidade de links (0 = todos)
+
+        Returns:
+            list: Dicionários com 'name', 'url' e 'place_id'
+        """
+        places = self.places[:count] if count > 0 else self.places
+        return [{'name': place['name'], 'url': self.place_url(place), 'place_id': place['place_id']}
+                for place in places]
+
+    def expected(self, place_id):
+        """
+        Campos esperados para o lugar (ver expected_fields), ou None se o lugar não existir
+        """
+        for place in self.places:
+            if place['place_id'] == place_id:
+                return expected_fields(place)
+        return None
+
+    def render_feed(self, query):
+        # A lista não leva e-mails nem sites: o scraper procura e-mails no HTML da página
+        cards = [{'name': place['name'], 'url': self.place_url(place), 'category': place['category'],
+                  'address': place['address'], 'phone': place['phone'], 'rating': place['rating'],
+                  'reviews': place['reviews']} for place in self.places]
+        values = {
+            'QUERY': html.escape(query),
+            'QUERY_JSON': self._script_json(query),
+            'INITIAL_STATE': self._script_json(self.initial_state(query)),
+            'PLACES_JSON': self._script_json(cards),
+            'PAGE_SIZE': str(self.page_size),
+            'SCROLL_DELAY_MS': str(self.scroll_delay_ms)
+        }
+        return self._fill(self.templates['feed.html'], values)
+
+    def initial_state(self, query):
+        """
+        APP_INITIALIZATION_STATE da página de busca, com a primeira página de resultados
+        """
+        payload = json.dumps(search_payload(query, self.places[:self.page_size]), ensure_ascii=False)
+        return [None, None, None, [None, None, ")]}'\n" + payload]]
+
+    def render_search_payload(self, query, start=0):
+        """
+        Resposta interna /search?tbm=map com a página de resultados que começa em `start`
+        """
+        payload = json.dumps(search_payload(query, self.places[start:start + self.page_size]), ensure_ascii=False)
+        return json.dumps({'c': 0, 'd': ")]}'\n" + payload}, ensure_ascii=False) + '/*""*/'
+
+    def render_detail(self, place):
+        variant = DETAIL_VARIANTS[place['index'] % len(DETAIL_VARIANTS)]
+        values = {key.upper(): html.escape(str(value)) for key, value in place.items()}
+        return self._fill(self.templates[variant], values)
+
+    @staticmethod
+    def _script_json(value):
+        # JSON seguro para ser embutido em um <script>
+        return json.dumps(value, ensure_ascii=False).replace('</', '<\\/')
+
+    @staticmethod
+    def _fill(template, values):
+        return re.sub(r'\{\{(\w+)\}\}', lambda match: values.get(match.group(1), ''), template)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local com as fixtures do Google Maps")
+    parser.add_argument("--port", type=int, default=8765, help="Porta do servidor (padrão: 8765)")
+    parser.add_argument("--places", type=int, default=60, help="Lugares na lista de resultados (padrão: 60)")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Atraso de cada resposta (padrão: 0)")
+    args = parser.parse_args()
+
+    server = FixtureMapsServer(places=args.places, latency_ms=args.latency_ms, port=args.port)
+    server.start()
+    print(f"Maps local em {server.maps_url}/search/autoescola (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,356 @@
+"""
+Benchmark offline do scraper.
+
+Roda os cenários contra o servidor local de fixtures (mapsServer.py) em um Chrome headless,
+sem acessar o Google Maps, e mostra lugares por minuto, percentis de latência de cada fase,
+comandos WebDriver e a fração dos campos esperados que foi extraída.
+
+Antes dos cenários, o parser das respostas internas do Maps (backend 'xhr') é conferido com
+as respostas geradas pelo servidor; --parser-only faz só essa conferência, sem abrir o Chrome.
+
+O resultado é comparado com benchmark/baseline.json: a execução falha (código de saída 1)
+se algum cenário ficar mais lento, usar mais comandos ou extrair menos campos que a referência.
+A referência depende da máquina, então gere a sua antes de comparar:
+    python benchmark/runBenchmark.py --update-baseline
+    python benchmark/runBenchmark.py
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from scraperMaps import GoogleMapsSeleniumScraper, MultiTabScraper, configure_logging, parse_maps_payload
+from mapsServer import FixtureMapsServer, payload_fields
+
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+QUERY = "Autoescola"
+REGION = "São Paulo, SP"
+
+# Métodos do scraper cronometrados a cada chamada -> nome da fase
+TIMED_PHASES = {
+    '_open_search': 'search',
+    '_scroll_results': 'scroll',
+    '_extract_place_from_url': 'place',
+    '_extract_business_details': 'detail',
+    '_go_back_to_results': 'back'
+}
+
+
+def percentile(values, fraction):
+    """
+    Percentil pelo método do posto mais próximo
+
+    Args:
+        values (list): Amostras
+        fraction (float): Percentil desejado entre 0 e 1 (ex.: 0.9)
+
+    Returns:
+        float: O valor do percentil (0 se não houver amostras)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class PhaseTimer:
+    """
+    Cronometra cada chamada dos métodos do scraper listados em TIMED_PHASES
+    """
+
+    def __init__(self, scraper):
+        self.samples = defaultdict(list)
+        for method, phase in TIMED_PHASES.items():
+            setattr(scraper, method, self._wrap(getattr(scraper, method), phase))
+
+    def _wrap(self, method, phase):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.samples[phase].append(time.perf_counter() - start)
+        return timed
+
+    def reset(self):
+        self.samples.clear()
+
+    def summary(self):
+        """
+        Returns:
+            dict: Fase -> quantidade de chamadas e percentis (p50, p90, p99, máximo) em milissegundos
+        """
+        return {
+            phase: {
+                'calls': len(samples),
+                'p50_ms': percentile(samples, 0.5) * 1000,
+                'p90_ms': percentile(samples, 0.9) * 1000,
+                'p99_ms': percentile(samples, 0.99) * 1000,
+                'max_ms': max(samples) * 1000
+            }
+            for phase, samples in self.samples.items() if samples
+        }
+
+
+def scenario_links(scraper, server, places):
+    return scraper.search_businesses(QUERY, REGION, max_results=places, mode="links")
+
+
+def scenario_click(scraper, server, places):
+    return scraper.search_businesses(QUERY, REGION, max_results=places, mode="click")
+
+
+def scenario_list(scraper, server, places):
+    return scraper.search_businesses(QUERY, REGION, max_results=places, mode="list")
+
+
+def scenario_details(scraper, server, places):
+    # Apenas a extração: abre diretamente as páginas de detalhes de todas as variantes
+    scraper.commands.reset()
+    links = server.place_links(places)
+    results = [scraper._extract_place_from_url(link, scraper._upcoming_links(links, index))
+               for index, link in enumerate(links)]
+    scraper._close_prefetched()
+    return results
+
+
+SCENARIOS = {
+    'links': scenario_links,
+    'click': scenario_click,
+    'list': scenario_list,
+    'details': scenario_details
+}
+
+
+def field_accuracy(results, server):
+    """
+    Fração dos campos esperados que foram extraídos com o valor correto
+
+    Args:
+        results (list): Negócios devolvidos pelo scraper
+        server (FixtureMapsServer): Servidor com os valores esperados
+
+    Returns:
+        float: Entre 0 e 1
+    """
+    expected_total = 0
+    correct = 0
+    for business in results:
+        expected = server.expected(business.get('place_id')) or {}
+        expected_total += len(expected)
+        correct += sum(1 for field, value in expected.items() if business.get(field) == value)
+    return correct / expected_total if expected_total else 0.0
+
+
+def check_payload_parser(server):
+    """
+    Confere o parser das respostas internas do Maps com o estado inicial e as páginas /search?tbm=map do servidor
+
+    Args:
+        server (FixtureMapsServer): Servidor com os lugares esperados
+
+    Returns:
+        list: Descrição de cada divergência encontrada (vazia se nenhuma)
+    """
+    payloads = [json.dumps(server.initial_state(QUERY))]
+    payloads += [server.render_search_payload(QUERY, start) for start in range(0, len(server.places), server.page_size)]
+    parsed = {}
+    for payload in payloads:
+        for place in parse_maps_payload(payload):
+            parsed[place.get('place_id')] = place
+
+    problems = []
+    for place in server.places:
+        found = parsed.get(place['place_id'])
+        if not found:
+            problems.append(f"{place['place_id']}: lugar não encontrado")
+            continue
+        for field, value in payload_fields(place).items():
+            if found.get(field) != value:
+                problems.append(f"{place['place_id']}: {field} = {found.get(field)!r} (esperado: {value!r})")
+    return problems
+
+
+def run_scenario(name, scraper, timer, server, places):
+    """
+    Executa um cenário uma vez e mede vazão, latências e comandos
+
+    Returns:
+        dict: Métricas do cenário
+    """
+    timer.reset()
+    start = time.perf_counter()
+    results = SCENARIOS[name](scraper, server, places)
+    elapsed = time.perf_counter() - start
+
+    per_place = scraper.commands.per_place
+    return {
+        'places': len(results),
+        'seconds': elapsed,
+        'places_per_minute': len(results) / elapsed * 60 if elapsed else 0.0,
+        'commands_total': scraper.commands.total,
+        'commands_per_place': sum(per_place) / len(per_place) if per_place else 0.0,
+        'field_accuracy': field_accuracy(results, server),
+        'phases': timer.summary()
+    }
+
+
+def print_result(name, result):
+    print(f"\n[{name}] {result['places']} lugares em {result['seconds']:.1f}s | "
+          f"{result['places_per_minute']:.1f} lugares/min | "
+          f"campos corretos: {result['field_accuracy'] * 100:.1f}%")
+    print(f"  Comandos WebDriver: {result['commands_total']} no total | "
+          f"{result['commands_per_place']:.1f} por negócio extraído")
+    for phase, stats in result['phases'].items():
+        print(f"  {phase:<7} {stats['calls']:>4} chamadas | p50 {stats['p50_ms']:7.0f} ms | "
+              f"p90 {stats['p90_ms']:7.0f} ms | p99 {stats['p99_ms']:7.0f} ms | máx {stats['max_ms']:7.0f} ms")
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Compara os cenários com a referência
+
+    Args:
+        results (dict): Cenário -> métricas da execução atual
+        baseline (dict): Cenário -> métricas de referência
+        tolerance (float): Piora relativa aceita na vazão e nos comandos (ex.: 0.2 = 20%)
+
+    Returns:
+        list: Descrição de cada regressão encontrada (vazia se nenhuma)
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            print(f"Sem referência para o cenário '{name}'.")
+            continue
+        if result['places_per_minute'] < reference['places_per_minute'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['places_per_minute']:.1f} lugares/min "
+                               f"(referência: {reference['places_per_minute']:.1f})")
+        if result['commands_per_place'] > reference['commands_per_place'] * (1 + tolerance):
+            regressions.append(f"{name}: {result['commands_per_place']:.1f} comandos por negócio "
+                               f"(referência: {reference['commands_per_place']:.1f})")
+        if result['field_accuracy'] < reference['field_accuracy'] - 1e-9:
+            regressions.append(f"{name}: {result['field_accuracy'] * 100:.1f}% dos campos corretos "
+                               f"(referência: {reference['field_accuracy'] * 100:.1f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do scraper com fixtures locais do Maps")
+    parser.add_argument("--scenarios", default="links,click,list,details",
+                        help="Cenários separados por vírgula: " + ", ".join(SCENARIOS) + " (padrão: todos)")
+    parser.add_argument("--places", type=int, default=60, help="Lugares na lista de resultados (padrão: 60)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Execuções de cada cenário; vale a de vazão mediana (padrão: 3)")
+    parser.add_argument("--latency-ms", type=int, default=50,
+                        help="Atraso de cada resposta do servidor local (padrão: 50)")
+    parser.add_argument("--scroll-delay-ms", type=int, default=150,
+                        help="Atraso para a próxima página da lista aparecer (padrão: 150)")
+    parser.add_argument("--lean", action="store_true", help="Usa o perfil lean do scraper")
+    parser.add_argument("--backend", choices=["dom", "xhr"], default="dom",
+                        help="Backend de extração do scraper (padrão: dom)")
+    parser.add_argument("--tabs", type=int, default=1,
+                        help="Abas do MultiTabScraper nos cenários links e click (padrão: 1 = scraper comum)")
+    parser.add_argument("--prefetch", type=int, default=0,
+                        help="Páginas de detalhes carregadas em abas de fundo nos cenários links e details (padrão: 0)")
+    parser.add_argument("--parser-only", action="store_true",
+                        help="Só confere o parser das respostas internas do Maps, sem abrir o Chrome")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Piora relativa aceita antes de falhar (padrão: 0.2 = 20%%)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Arquivo de referência (padrão: benchmark/baseline.json)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Grava o resultado desta execução como nova referência")
+    parser.add_argument("--output", metavar="ARQUIVO", help="Grava as métricas desta execução em JSON")
+    parser.add_argument("--verbose", action="store_true", help="Mostra as mensagens do scraper")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Cenários desconhecidos: {', '.join(unknown)}")
+
+    configure_logging('INFO' if args.verbose else 'WARNING')
+
+    config = {'places': args.places, 'latency_ms': args.latency_ms,
+              'scroll_delay_ms': args.scroll_delay_ms, 'lean': args.lean, 'backend': args.backend,
+              'tabs': args.tabs, 'prefetch': args.prefetch}
+
+    results = {}
+    server = FixtureMapsServer(places=args.places, latency_ms=args.latency_ms,
+                               scroll_delay_ms=args.scroll_delay_ms)
+
+    problems = check_payload_parser(server)
+    if problems:
+        print(f"✗ Parser das respostas do Maps: {len(problems)} divergências")
+        for problem in problems[:20]:
+            print(f"  {problem}")
+        return 1
+    print(f"✓ Parser das respostas do Maps: {len(server.places)} lugares conferidos.")
+    if args.parser_only:
+        return 0
+
+    server.start()
+    tab_options = {'tabs': args.tabs} if args.tabs > 1 else {}
+    scraper = (MultiTabScraper if args.tabs > 1 else GoogleMapsSeleniumScraper)(
+        headless=True, lean=args.lean, maps_url=server.maps_url, backend=args.backend, prefetch=args.prefetch,
+        **tab_options)
+    try:
+        # As pausas aleatórias entre negócios existem para não chamar atenção do Google;
+        # aqui elas só mascarariam a velocidade do scraper
+        scraper.waits.sleep = lambda seconds, phase='pacing': None
+        scraper.rate.reserve = lambda: 0.0
+        timer = PhaseTimer(scraper)
+
+        for name in names:
+            runs = [run_scenario(name, scraper, timer, server, args.places)
+                    for _ in range(max(1, args.repeat))]
+            median = statistics.median_low([run['places_per_minute'] for run in runs])
+            results[name] = next(run for run in runs if run['places_per_minute'] == median)
+            print_result(name, results[name])
+    finally:
+        scraper.close()
+        server.stop()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'scenarios': results}, f, ensure_ascii=False, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'scenarios': results}, f, ensure_ascii=False, indent=2)
+        print(f"\nReferência gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nSem referência em {args.baseline}; gere uma com --update-baseline.")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('config') != config:
+        print(f"\n⚠ A referência foi gravada com outra configuração ({baseline.get('config')}); "
+              "a comparação pode não ser justa.")
+
+    regressions = compare_with_baseline(results, baseline.get('scenarios', {}), args.tolerance)
+    if regressions:
+        print("\n✗ Regressões em relação à referência:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print("\n✓ Nenhuma regressão em relação à referência.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
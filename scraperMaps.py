@@ -2,645 +2,6983 @@ from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException, StaleElementReferenceException
 import time
+import logging
+import functools
 import csv
 import re
 import os
 import random
+import argparse
+import threading
+import json
+import sqlite3
+import queue
+import math
+import unicodedata
+import asyncio
+import base64
+import tempfile
+import socket
+import hmac
+import ipaddress
+import urllib.request
+import urllib.error
+from urllib.parse import quote, unquote, urljoin, urlsplit, parse_qs
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+logger = logging.getLogger("scraperMaps")
+
+# Padrões para extrair um identificador estável do lugar a partir do link (em ordem de preferência)
+PLACE_ID_PATTERNS = [
+    re.compile(r'!19s(ChIJ[^!?&/]+)'),                  # Place ID
+    re.compile(r'!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)'),  # Feature ID
+    re.compile(r'[?&]cid=(\d+)')                       # CID
+]
+
+# Script que coleta nome e link dos cartões da lista (a partir do índice arguments[2]) em uma única chamada.
+# nameIndex é a posição do seletor de nome que funcionou (-1 = nenhum). Com arguments[3], também lê
+# os dados que o cartão mostra (nota, avaliações, categoria, endereço, telefone e site) em `card`.
+COLLECT_LINKS_SCRIPT = """
+var cards = document.querySelectorAll(arguments[0]);
+var nameSelectors = arguments[1];
+var withDetails = arguments[3];
+var phonePattern = /\\(?\\d{2}\\)?\\s?9?\\d{4}[\\s-]?\\d{4}/;
+
+function cardDetails(card) {
+    var text = function (selector) {
+        var el = card.querySelector(selector);
+        return el ? (el.innerText || el.textContent || '').trim() : '';
+    };
+    var details = {rating: text('span.MW4etd'), reviews: text('span.UY7F9').replace(/\\D/g, ''),
+                   phone: text('span.UsdlK'), category: '', address: ''};
+    if (!details.rating) {
+        var stars = card.querySelector("span[role='img'][aria-label]");
+        var match = stars && stars.getAttribute('aria-label').match(/\\d+[,.]\\d/);
+        details.rating = match ? match[0] : '';
+    }
+    // Linhas de texto do cartão ("Categoria · Endereço", "Aberto · Telefone"), sem a linha da nota
+    var rows = card.querySelectorAll('div.W4Efsd');
+    for (var i = 0; i < rows.length; i++) {
+        var row = rows[i];
+        if (row.querySelector('div.W4Efsd, span[role="img"]')) continue;
+        var parts = (row.innerText || row.textContent || '').split(/[·⋅]/).map(function (part) {
+            return part.trim();
+        }).filter(function (part) { return part; });
+        if (!parts.length) continue;
+        if (!details.category) {
+            details.category = parts[0];
+            details.address = parts[1] && !phonePattern.test(parts[1]) ? parts[1] : '';
+        } else if (!details.phone) {
+            for (var j = 0; j < parts.length && !details.phone; j++) {
+                if (phonePattern.test(parts[j])) details.phone = parts[j];
+            }
+        }
+    }
+    var site = card.querySelector("a[data-value='Website'], a[data-value='Site'], a.lcr4fd");
+    details.website = site ? site.href : '';
+    return details;
+}
+
+var out = [];
+for (var i = arguments[2] || 0; i < cards.length; i++) {
+    var card = cards[i];
+    var link = card.matches("a[href*='/maps/place/']") ? card : card.querySelector("a[href*='/maps/place/']");
+    if (!link) continue;
+    var name = '';
+    var nameIndex = -1;
+    for (var j = 0; j < nameSelectors.length && !name; j++) {
+        var el = card.querySelector(nameSelectors[j]);
+        name = el ? el.innerText.trim() : '';
+        // Só um nome não vazio conta como acerto do seletor
+        if (name) nameIndex = j;
+    }
+    var entry = {name: name || link.getAttribute('aria-label') || '', url: link.href, nameIndex: nameIndex};
+    if (withDetails) entry.card = cardDetails(card);
+    out.push(entry);
+}
+return [out, cards.length];
+"""
+
+
+def extract_place_id(url):
+    """
+    Extrai um identificador estável do lugar a partir de um link do Google Maps.
+    
+    Args:
+        url (str): Link da página de detalhes (/maps/place/...)
+        
+    Returns:
+        str: Place ID, feature ID ou CID (nessa ordem); se nenhum existir, o trecho do nome no link
+    """
+    if not url:
+        return None
+    for pattern in PLACE_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    match = re.search(r'/maps/place/([^/?]+)', url)
+    return match.group(1) if match else url
+
+
+# Prefixo que o Google coloca nas respostas internas do Maps para impedir que sejam lidas como script
+XSSI_PREFIX = ")]}'"
+
+# Identificador interno do lugar (feature ID) na posição 10 do vetor de um lugar
+FEATURE_ID_PATTERN = re.compile(r'^0x[0-9a-fA-F]+:0x[0-9a-fA-F]+$')
+
+# Posição de cada campo no vetor de um lugar das respostas internas do Maps.
+# O formato não é documentado e muda sem aviso: ajuste aqui (e confira com o benchmark) quando mudar.
+PAYLOAD_FIELD_PATHS = {
+    'name': (11,),
+    'address': (39,),
+    'category': (13, 0),
+    'phone': (178, 0, 0),
+    'website': (7, 0),
+    'latitude': (9, 2),
+    'longitude': (9, 3),
+    'place_id': (78,),
+    'feature_id': (10,)
+}
+
+
+def decode_maps_payload(text):
+    """
+    Decodifica uma resposta interna do Maps (JSON precedido de )]}' e, nas buscas, embrulhado em {"d": ...})
+    
+    Args:
+        text (str): Corpo da resposta
+        
+    Returns:
+        Os dados decodificados ou None se o texto não for JSON
+    """
+    text = text.strip()
+    if text.endswith('/*""*/'):
+        text = text[:-len('/*""*/')]
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):]
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _dig(data, path):
+    """
+    Valor na posição `path` de listas aninhadas, ou None se alguma posição não existir
+    """
+    for index in path:
+        if not isinstance(data, list) or index >= len(data):
+            return None
+        data = data[index]
+    return data
+
+
+def _is_place_array(node):
+    return (len(node) > 11 and isinstance(node[10], str) and FEATURE_ID_PATTERN.match(node[10]) is not None
+            and isinstance(node[11], str))
+
+
+def parse_place_array(place):
+    """
+    Converte o vetor de um lugar das respostas internas do Maps nos campos do negócio
+    
+    Args:
+        place (list): Vetor do lugar (ver PAYLOAD_FIELD_PATHS)
+        
+    Returns:
+        dict: Os campos encontrados (os ausentes ficam de fora)
+    """
+    business = {}
+    for field, path in PAYLOAD_FIELD_PATHS.items():
+        value = _dig(place, path)
+        if field in ('latitude', 'longitude'):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                business[field] = value
+        elif isinstance(value, str) and value.strip():
+            business[field] = value.strip()
+            
+    # Endereço no formato "Nome, endereço" quando o completo não vier
+    if 'address' not in business:
+        address = _dig(place, (18,))
+        if isinstance(address, str) and address.strip():
+            prefix = business.get('name', '') + ','
+            business['address'] = address[len(prefix):].strip() if address.startswith(prefix) else address.strip()
+            
+    # Sites às vezes vêm como redirecionamento do Google (/url?q=...)
+    website = business.get('website')
+    if website and not website.startswith('http'):
+        target = parse_qs(urlsplit(website).query).get('q')
+        if target and target[0].startswith('http'):
+            business['website'] = target[0]
+        else:
+            del business['website']
+    return business
+
+
+def parse_maps_payload(payload):
+    """
+    Encontra e converte todos os lugares de uma resposta interna do Maps.
+    
+    Não depende da posição da lista de resultados na resposta: qualquer vetor com um
+    feature ID na posição 10 e o nome na 11 é tratado como um lugar, e textos com o
+    prefixo )]}' dentro da resposta (ex.: APP_INITIALIZATION_STATE) são decodificados.
+    
+    Args:
+        payload: Corpo da resposta (str) ou dados já decodificados
+        
+    Returns:
+        list: Os lugares encontrados (ver parse_place_array)
+    """
+    if isinstance(payload, str):
+        payload = decode_maps_payload(payload)
+        
+    places = []
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            if node.startswith(XSSI_PREFIX):
+                stack.append(decode_maps_payload(node))
+        elif isinstance(node, dict):
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            if _is_place_array(node):
+                places.append(parse_place_array(node))
+            else:
+                stack.extend(reversed(node))
+    return places
+
+
+# Título do painel de detalhes e endereço da página, que identifica o lugar aberto (o título se
+# repete entre as filiais de uma rede)
+DETAIL_PANEL_SCRIPT = """
+var title = document.querySelector('h1.DUwDvf') || document.querySelector("div[role='main'] h1");
+return [title ? title.innerText.trim() : '', location.href];
+"""
+
+# Sinais de bloqueio na página aberta: 'captcha' (página /sorry/, reCAPTCHA ou aviso de tráfego
+# incomum), 'consent' (aviso de consentimento do Google) ou null
+BLOCK_CHECK_SCRIPT = """
+var url = location.href;
+var text = document.body ? (document.body.innerText || '').slice(0, 5000) : '';
+if (/\\/sorry\\//.test(url) ||
+    document.querySelector("form#captcha-form, iframe[src*='recaptcha'], div.g-recaptcha") ||
+    /unusual traffic|tráfego incomum|não é um robô|not a robot/i.test(text)) {
+    return 'captcha';
+}
+if (/consent\\.google\\./.test(url) || document.querySelector("form[action*='consent.google']")) {
+    return 'consent';
+}
+return null;
+"""
+
+# Estado da lista de resultados: [quantidade de filhos, chegou ao fim da lista]
+FEED_STATE_SCRIPT = """
+var feed = arguments[0];
+var last = feed.lastElementChild;
+var ended = !!document.querySelector('span.HlvSq') ||
+            !!(last && /final da lista|end of the list/i.test(last.innerText || ''));
+return [feed.children.length, ended];
+"""
+
+# Estado inicial da página do Maps, que já traz a primeira página de resultados
+INITIAL_STATE_SCRIPT = "return JSON.stringify(window.APP_INITIALIZATION_STATE || null);"
+
+# Quantidade de recursos de rede carregados pela página até o momento
+RESOURCE_COUNT_SCRIPT = """
+if (!window.__scraperBuffer) {
+    performance.setResourceTimingBufferSize(100000);
+    window.__scraperBuffer = true;
+}
+return performance.getEntriesByType('resource').length;
+"""
+
+# Extrai todos os campos da página de detalhes em uma única chamada.
+# Recebe as cascatas de seletores ([by, seletor]) por campo e segue as mesmas regras do fallback em Python.
+# Retorna [detalhes, índice do seletor que encontrou cada campo (-1 = nenhum)].
+EXTRACT_DETAILS_SCRIPT = """
+var cascades = arguments[0];
+var hits = {};
+function text(el) {
+    return (el.innerText || el.textContent || '').trim();
+}
+// Mesmas regras de read_detail_value e valid_detail_value
+function read(field, el) {
+    var tag = el.tagName.toLowerCase();
+    if (field === 'phone') {
+        if (tag === 'a' && el.href) return el.href.indexOf('tel:') !== -1 ? el.href.split('tel:')[1] : '';
+        return text(el);
+    }
+    if (field === 'website') return el.href || '';
+    if (field === 'email') return el.href ? el.href.replace('mailto:', '') : '';
+    return text(el);
+}
+function valid(field, value) {
+    if (!value) return false;
+    if (field === 'address') return value.length >= 5 && value.length <= 200 && /[0-9,]/.test(value);
+    if (field === 'phone') {
+        var digits = value.replace(/[^0-9]/g, '').length;
+        return digits >= 8 && digits <= 15;
+    }
+    if (field === 'website') return /^https?:/.test(value) && value.indexOf('google') === -1;
+    if (field === 'category') return value.length <= 80;
+    if (field === 'email') return value.indexOf('@') > 0;
+    return true;
+}
+// Primeiro valor válido da cascata: um seletor que encontra um elemento sem valor válido não conta como acerto
+function first(field) {
+    var cascade = cascades[field];
+    hits[field] = -1;
+    for (var i = 0; i < cascade.length; i++) {
+        var el = null;
+        try {
+            if (cascade[i][0] === 'xpath') {
+                el = document.evaluate(cascade[i][1], document, null,
+                                       XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            } else {
+                el = document.querySelector(cascade[i][1]);
+            }
+        } catch (e) {
+            el = null;
+        }
+        if (el) {
+            var value = read(field, el);
+            if (valid(field, value)) {
+                hits[field] = i;
+                return value;
+            }
+        }
+    }
+    return null;
+}
+var details = {};
+['address', 'phone', 'website', 'category', 'email'].forEach(function (field) {
+    var value = first(field);
+    if (value) details[field] = value;
+});
+return [details, hits];
+"""
+
+
+def read_detail_value(field, element):
+    """
+    Valor de um campo da página de detalhes a partir do elemento encontrado pela cascata
+    
+    Args:
+        field (str): 'address', 'phone', 'website', 'category' ou 'email'
+        element: WebElement encontrado
+        
+    Returns:
+        str: O valor (vazio se o elemento não tiver o dado)
+    """
+    if field == 'phone':
+        href = element.get_attribute('href') if element.tag_name == 'a' else None
+        if href:
+            return href.split('tel:')[1] if 'tel:' in href else ''
+        return element.text.strip()
+    if field == 'website':
+        return element.get_attribute('href') or ''
+    if field == 'email':
+        return (element.get_attribute('href') or '').replace('mailto:', '')
+    return element.text.strip()
+
+
+def valid_detail_value(field, value):
+    """
+    Verifica se o valor lido parece mesmo o campo procurado. Os seletores genéricos do fim das
+    cascatas encontram algum elemento em quase toda página; só um valor válido conta como acerto.
+    
+    Args:
+        field (str): Nome do campo
+        value (str): Valor lido (ver read_detail_value)
+        
+    Returns:
+        bool: True se o valor for aceitável para o campo
+    """
+    if not value:
+        return False
+    if field == 'address':
+        return 5 <= len(value) <= 200 and bool(re.search(r'[0-9,]', value))
+    if field == 'phone':
+        return 8 <= len(re.sub(r'\D', '', value)) <= 15
+    if field == 'website':
+        return bool(re.match(r'https?:', value)) and 'google' not in value
+    if field == 'category':
+        return len(value) <= 80
+    if field == 'email':
+        return value.find('@') > 0
+    return True
+
+
+class CommandCounter:
+    """
+    Conta os comandos WebDriver (requisições HTTP ao chromedriver) enviados pelo scraper.
+    
+    Intercepta driver.execute, por onde passam todos os comandos, inclusive os feitos
+    a partir de WebElements.
+    """
+    
+    def __init__(self, driver):
+        """
+        Args:
+            driver: Instância do WebDriver a ser monitorada (None = só soma as contagens de outros, ver merge)
+        """
+        self.reset()
+        if driver is not None:
+            self.attach(driver)
+        
+    def attach(self, driver):
+        """
+        Passa a monitorar outro WebDriver (ex.: navegador reciclado), mantendo as contagens
+        """
+        self._execute = driver.execute
+        driver.execute = self._counted_execute
+        
+    def reset(self):
+        """
+        Zera as contagens
+        """
+        self.total = 0
+        self.by_command = defaultdict(int)
+        self.per_place = []
+        
+    def _counted_execute(self, driver_command, params=None):
+        self.total += 1
+        self.by_command[driver_command] += 1
+        return self._execute(driver_command, params)
+        
+    def record_place(self, total_before):
+        """
+        Registra quantos comandos a extração de um negócio custou
+        
+        Args:
+            total_before (int): Valor de `total` antes da extração
+            
+        Returns:
+            int: Comandos usados pelo negócio
+        """
+        commands = self.total - total_before
+        self.per_place.append(commands)
+        return commands
+        
+    def merge(self, other):
+        """
+        Soma a contagem de outro CommandCounter (ex.: navegadores do pool)
+        """
+        self.total += other.total
+        self.per_place.extend(other.per_place)
+        for command, count in other.by_command.items():
+            self.by_command[command] += count
+            
+    def report(self):
+        """
+        Mostra o total de comandos e a média por negócio extraído
+        
+        Returns:
+            dict: Total, média por negócio e contagem por tipo de comando
+        """
+        average = sum(self.per_place) / len(self.per_place) if self.per_place else 0.0
+        logger.info("Comandos WebDriver: %s no total | %.1f por negócio extraído", self.total, average)
+        return {'total': self.total, 'per_place': average, 'by_command': dict(self.by_command)}
+
+
+class NetworkStats:
+    """
+    Estatísticas de rede do navegador, lidas dos logs de desempenho do Chrome.
+    
+    Conta as requisições feitas, os bytes transferidos e as requisições bloqueadas
+    pelo perfil "lean", por tipo de recurso. O log só pode ser lido uma vez, então os
+    eventos também são repassados aos `listeners` (ex.: XhrCapture).
+    """
+    
+    def __init__(self, driver):
+        """
+        Args:
+            driver: Instância do WebDriver iniciada com o log 'performance' habilitado
+        """
+        self.driver = driver
+        self.listeners = []
+        self.reset()
+        
+    def reset(self):
+        """
+        Zera as estatísticas
+        """
+        self.requests = 0
+        self.bytes = 0
+        self.blocked = defaultdict(int)
+        
+    def collect(self):
+        """
+        Lê (e esvazia) o log de desempenho do navegador, acumulando as estatísticas
+        """
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            return
+            
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (ValueError, KeyError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+            
+            if method == 'Network.requestWillBeSent':
+                self.requests += 1
+            elif method == 'Network.loadingFinished':
+                self.bytes += params.get('encodedDataLength', 0)
+            elif method == 'Network.loadingFailed':
+                if params.get('blockedReason') or 'BLOCKED' in params.get('errorText', ''):
+                    self.blocked[params.get('type', 'Other')] += 1
+                    
+            for listener in self.listeners:
+                listener(method, params)
+                
+    def merge(self, other):
+        """
+        Soma as estatísticas de outro NetworkStats (ex.: navegadores do pool)
+        """
+        self.requests += other.requests
+        self.bytes += other.bytes
+        for resource_type, count in other.blocked.items():
+            self.blocked[resource_type] += count
+            
+    def report(self, places=0):
+        """
+        Mostra requisições, bytes transferidos e requisições bloqueadas
+        
+        Args:
+            places (int): Negócios extraídos no período, para a média por negócio
+            
+        Returns:
+            dict: Requisições, bytes, bloqueios por tipo e bytes por negócio
+        """
+        blocked = sum(self.blocked.values())
+        per_place = self.bytes / places if places else 0
+        logger.info("Rede: %s requisições, %.1f MB transferidos%s | %s requisições bloqueadas",
+                    self.requests, self.bytes / 1048576,
+                    f" ({per_place / 1024:.0f} KB por negócio)" if places else "", blocked)
+        if self.blocked:
+            logger.info("  bloqueadas: %s", ", ".join(f"{resource_type}: {count}" for resource_type, count
+                                                     in sorted(self.blocked.items(), key=lambda item: -item[1])))
+        return {
+            'requests': self.requests,
+            'bytes': self.bytes,
+            'bytes_per_place': per_place,
+            'blocked': dict(self.blocked)
+        }
+
+
+class XhrCapture:
+    """
+    Lê os dados dos lugares direto das respostas internas do Maps, em vez do DOM.
+    
+    As respostas da lista de resultados (search?tbm=map) e do painel do lugar
+    (maps/preview/place) trazem nome, endereço, telefone, site, categoria, coordenadas
+    e ID de todos os lugares de uma vez. O corpo de cada resposta é lido pelo DevTools
+    Protocol (Network.getResponseBody) assim que ela aparece no log de desempenho, e a
+    primeira página de resultados, que vem embutida no HTML, é lida do estado inicial.
+    """
+    # URLs das respostas internas com dados de lugares
+    URL_PATTERNS = [
+        re.compile(r'/search\?(?:[^#]*&)?tbm=map'),
+        re.compile(r'/maps/preview/place')
+    ]
+    
+    # Campos que um lugar precisa ter para dispensar a página de detalhes
+    REQUIRED_FIELDS = ('name', 'address')
+    
+    def __init__(self, driver):
+        """
+        Args:
+            driver: Instância do WebDriver iniciada com o log 'performance' habilitado
+        """
+        self.driver = driver
+        self.places = {}
+        self._pending = {}
+        self.reset()
+        
+    def reset(self):
+        """
+        Esquece os lugares capturados e zera os contadores
+        """
+        self.places.clear()
+        self._pending.clear()
+        self.responses = 0
+        self.failures = 0
+        self.parsed = 0
+        self.skipped = 0
+        
+    def on_network_event(self, method, params):
+        """
+        Recebe os eventos do log de desempenho (registrado em NetworkStats.listeners)
+        """
+        if method == 'Network.responseReceived':
+            url = params.get('response', {}).get('url', '')
+            if any(pattern.search(url) for pattern in self.URL_PATTERNS):
+                self._pending[params.get('requestId')] = url
+        elif method == 'Network.loadingFinished':
+            url = self._pending.pop(params.get('requestId'), None)
+            if url:
+                self._read_body(params['requestId'], url)
+        elif method == 'Network.loadingFailed':
+            self._pending.pop(params.get('requestId'), None)
+            
+    def _read_body(self, request_id, url):
+        try:
+            response = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except Exception as e:
+            # O corpo é descartado pelo navegador quando a página muda
+            self.failures += 1
+            logger.debug("Resposta %s indisponível: %s", url, e)
+            return
+        body = response.get('body', '')
+        if response.get('base64Encoded'):
+            body = base64.b64decode(body).decode('utf-8', 'replace')
+        self.responses += 1
+        found = self.add_payload(body)
+        logger.debug("%s lugares na resposta %s", found, url)
+        
+    def capture_initial_state(self):
+        """
+        Lê os lugares embutidos no estado inicial da página (a primeira página de resultados)
+        
+        Returns:
+            int: Quantidade de lugares encontrados
+        """
+        try:
+            state = self.driver.execute_script(INITIAL_STATE_SCRIPT)
+        except Exception as e:
+            logger.debug("Estado inicial da página indisponível: %s", e)
+            return 0
+        return self.add_payload(state) if state else 0
+        
+    def add_payload(self, payload):
+        """
+        Acrescenta os lugares de uma resposta interna do Maps
+        
+        Args:
+            payload (str): Corpo da resposta
+            
+        Returns:
+            int: Quantidade de lugares encontrados
+        """
+        places = parse_maps_payload(payload)
+        for place in places:
+            for key in (place.get('place_id'), place.get('feature_id')):
+                if key:
+                    self.places[key] = place
+        self.parsed += len(places)
+        return len(places)
+        
+    def lookup(self, link):
+        """
+        Dados capturados do lugar de um link, se forem suficientes para dispensar a página de detalhes
+        
+        Args:
+            link (dict): Dicionário com 'name', 'url' e 'place_id' (ver _collect_place_links)
+            
+        Returns:
+            dict: O negócio, ou None se o lugar não foi capturado ou faltam campos
+        """
+        place = self.places.get(link.get('place_id'))
+        if not place or not all(place.get(field) for field in self.REQUIRED_FIELDS):
+            return None
+        self.skipped += 1
+        business = {key: value for key, value in place.items() if key not in ('place_id', 'feature_id')}
+        business.update(place_id=link['place_id'], url=link.get('url'))
+        return business
+        
+    def merge(self, other):
+        """
+        Soma os contadores de outro XhrCapture (ex.: navegadores do pool)
+        """
+        self.responses += other.responses
+        self.failures += other.failures
+        self.parsed += other.parsed
+        self.skipped += other.skipped
+        
+    def report(self):
+        """
+        Mostra as respostas capturadas e as páginas de detalhes dispensadas
+        """
+        logger.info("Respostas do Maps: %s lidas (%s indisponíveis), %s lugares | %s páginas de detalhes dispensadas",
+                    self.responses, self.failures, self.parsed, self.skipped)
+        if self.responses and not self.parsed:
+            logger.warning("⚠ Nenhum lugar encontrado nas respostas do Maps; o formato pode ter mudado "
+                           "(ver PAYLOAD_FIELD_PATHS).")
+
+
+class BrowserWatchdog:
+    """
+    Decide quando reciclar o navegador em execuções longas.
+    
+    Cada página de detalhes fica no histórico da sessão e o Maps acumula estado na aba, então
+    a memória do Chrome só cresce. O navegador é reciclado (fechado e aberto de novo) após
+    `max_pages` páginas ou quando a memória residente (RSS) do chromedriver e de todos os
+    processos do Chrome passa de `max_rss_mb`, medida com o psutil a cada `check_every` páginas.
+    """
+    
+    def __init__(self, max_pages=0, max_rss_mb=0, check_every=10):
+        """
+        Args:
+            max_pages (int): Páginas abertas antes de reciclar (0 = sem limite)
+            max_rss_mb (float): Memória máxima da árvore de processos do navegador, em MB (0 = sem limite)
+            check_every (int): Páginas entre cada medição de memória
+        """
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.check_every = max(1, check_every)
+        self.pages = 0
+        self.recycles = 0
+        self.last_rss_mb = None
+        self._psutil = None
+        if max_rss_mb:
+            try:
+                import psutil
+                self._psutil = psutil
+            except ImportError:
+                logger.warning("⚠ Limite de memória do navegador ignorado: instale o psutil (pip install psutil).")
+                
+    def page_opened(self):
+        """
+        Registra uma página aberta pelo navegador
+        """
+        self.pages += 1
+        
+    def rss_mb(self, driver):
+        """
+        Memória residente do chromedriver e de todos os processos do Chrome abertos por ele
+        
+        Returns:
+            float: Memória em MB ou None se não for possível medir
+        """
+        if not self._psutil:
+            return None
+        try:
+            root = self._psutil.Process(driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+        except (AttributeError, self._psutil.Error):
+            return None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except self._psutil.Error:
+                continue
+        return total / 1048576
+        
+    def recycle_reason(self, driver):
+        """
+        Verifica os limites
+        
+        Args:
+            driver: WebDriver em uso
+            
+        Returns:
+            str: O motivo para reciclar o navegador ou None se ele pode continuar
+        """
+        if self.max_pages and self.pages >= self.max_pages:
+            return f"{self.pages} páginas abertas"
+        if self.max_rss_mb and self.pages and self.pages % self.check_every == 0:
+            rss = self.rss_mb(driver)
+            if rss is not None:
+                self.last_rss_mb = rss
+                if rss >= self.max_rss_mb:
+                    return f"{rss:.0f} MB de memória"
+        return None
+        
+    def recycled(self):
+        """
+        Registra que o navegador foi reciclado
+        """
+        self.pages = 0
+        self.recycles += 1
+
+
+class RateController:
+    """
+    Ritmo das páginas abertas no Maps: balde de fichas com a taxa ajustada por AIMD.
+    
+    A taxa (páginas por segundo, contando o tempo de extração) sobe um pouco a cada
+    `increase_every` páginas sem bloqueio e é multiplicada por `decrease` a cada bloqueio
+    (CAPTCHA, aviso de "tráfego incomum" ou painel que não carrega), seguido de uma pausa
+    que dobra a cada bloqueio seguido. A taxa do último bloqueio vira o teto da sessão,
+    que só volta a ser testado após `probe_after` páginas sem bloqueio: assim o controlador
+    aprende a maior taxa segura da sessão. Bloqueios seguidos demais pedem uma nova sessão.
+    """
+    # Bloqueios que são contados, mas não indicam excesso de velocidade
+    NON_THROTTLING = ('consent',)
+    
+    # Eventos de bloqueio guardados para o relatório e as métricas
+    MAX_EVENTS = 50
+    
+    def __init__(self, rate=0.5, min_rate=0.05, max_rate=3.0, increase=0.05, increase_every=10,
+                 decrease=0.5, cooldown=30, max_cooldown=600, rotate_after=3, probe_after=100, jitter=0.25):
+        """
+        Args:
+            rate (float): Taxa inicial, em páginas por segundo
+            min_rate (float): Menor taxa permitida
+            max_rate (float): Maior taxa permitida
+            increase (float): Aumento aditivo da taxa
+            increase_every (int): Páginas sem bloqueio entre cada aumento
+            decrease (float): Fator multiplicativo aplicado à taxa a cada bloqueio
+            cooldown (float): Pausa após um bloqueio, em segundos (dobra a cada bloqueio seguido)
+            max_cooldown (float): Maior pausa após um bloqueio
+            rotate_after (int): Bloqueios seguidos para pedir uma nova sessão do navegador
+            probe_after (int): Páginas sem bloqueio para voltar a testar taxas acima do teto
+            jitter (float): Variação aleatória da pausa, como fração do intervalo entre páginas
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.increase = increase
+        self.increase_every = max(1, increase_every)
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.rotate_after = max(1, rotate_after)
+        self.probe_after = probe_after
+        self.jitter = jitter
+        self.ceiling = max_rate
+        self.peak_rate = self.rate
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._cooldown_until = 0.0
+        self._streak = 0
+        self._since_block = 0
+        self._consecutive_blocks = 0
+        self._lock = threading.Lock()
+        self.reset()
+        
+    def reset(self):
+        """
+        Zera as contagens e os eventos (a taxa aprendida é mantida)
+        """
+        self.started = time.time()
+        self.requests = 0
+        self.successes = 0
+        self.blocks = defaultdict(int)
+        self.events = []
+        
+    def reserve(self):
+        """
+        Reserva a próxima página
+        
+        Returns:
+            float: Segundos a aguardar antes de abri-la
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(1.0, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            self.requests += 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if delay:
+                delay += random.uniform(0, self.jitter) / self.rate
+            return max(delay, self._cooldown_until - now)
+            
+    def on_success(self):
+        """
+        Registra uma página carregada normalmente
+        """
+        with self._lock:
+            self.successes += 1
+            self._consecutive_blocks = 0
+            self._since_block += 1
+            self._streak += 1
+            if self._streak >= self.increase_every:
+                self._streak = 0
+                limit = self.ceiling if self._since_block < self.probe_after else self.max_rate
+                self.rate = max(self.rate, min(limit, self.rate + self.increase))
+                self.peak_rate = max(self.peak_rate, self.rate)
+                
+    def on_block(self, kind):
+        """
+        Registra um bloqueio e desacelera
+        
+        Args:
+            kind (str): 'captcha', 'empty' (painel vazio) ou 'consent'
+            
+        Returns:
+            str: 'rotate' se a sessão do navegador deve ser trocada, senão 'backoff'
+        """
+        with self._lock:
+            self.blocks[kind] += 1
+            event = {'time': time.time(), 'kind': kind, 'rate_before': self.rate}
+            if kind in self.NON_THROTTLING:
+                event.update(rate_after=self.rate, cooldown=0.0, action='none')
+                self._add_event(event)
+                return 'backoff'
+                
+            self._streak = 0
+            self._since_block = 0
+            self._consecutive_blocks += 1
+            self.ceiling = max(self.min_rate, self.rate * 0.9)
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            cooldown = min(self.max_cooldown, self.cooldown * 2 ** (self._consecutive_blocks - 1))
+            self._cooldown_until = time.monotonic() + cooldown
+            action = 'rotate' if self._consecutive_blocks % self.rotate_after == 0 else 'backoff'
+            event.update(rate_after=self.rate, cooldown=cooldown, action=action)
+            self._add_event(event)
+        logger.warning("⚠ Bloqueio detectado (%s): taxa reduzida de %.2f para %.2f páginas/s, pausa de %.0fs%s.",
+                       kind, event['rate_before'], event['rate_after'], cooldown,
+                       ", trocando de sessão" if action == 'rotate' else "",
+                       extra={'block': kind, 'rate': event['rate_after']})
+        return action
+        
+    def _add_event(self, event):
+        self.events.append(event)
+        del self.events[:-self.MAX_EVENTS]
+        
+    def merge(self, other):
+        """
+        Soma as contagens e os eventos de outro RateController (ex.: navegadores do pool)
+        """
+        with self._lock:
+            self.requests += other.requests
+            self.successes += other.successes
+            for kind, count in other.blocks.items():
+                self.blocks[kind] += count
+            self.events = sorted(self.events + other.events, key=lambda event: event['time'])[-self.MAX_EVENTS:]
+            
+    def snapshot(self):
+        """
+        Returns:
+            dict: Taxa atual, teto aprendido, vazão e bloqueios desde o último reset
+        """
+        elapsed = max(time.time() - self.started, 1.0)
+        return {
+            'rate': self.rate,
+            'ceiling': self.ceiling,
+            'peak_rate': self.peak_rate,
+            'requests': self.requests,
+            'successes': self.successes,
+            'pages_per_minute': self.requests * 60 / elapsed,
+            'blocks': dict(self.blocks),
+            'events': list(self.events)
+        }
+        
+    def report(self):
+        """
+        Mostra a taxa aprendida, a vazão e os bloqueios
+        
+        Returns:
+            dict: O retrato do controlador (ver snapshot)
+        """
+        snapshot = self.snapshot()
+        logger.info("Ritmo: %.2f páginas/s (teto aprendido %.2f, pico %.2f) | %.1f páginas/min | %s bloqueios%s",
+                    snapshot['rate'], snapshot['ceiling'], snapshot['peak_rate'], snapshot['pages_per_minute'],
+                    sum(snapshot['blocks'].values()),
+                    " (" + ", ".join(f"{kind}: {count}" for kind, count in sorted(snapshot['blocks'].items())) + ")"
+                    if snapshot['blocks'] else "")
+        return snapshot
+
+
+class RetryQueue:
+    """
+    Fila de novas tentativas dos lugares cuja extração falhou, com a classificação das falhas.
+    
+    Cada falha é classificada (ver classify) e o lugar entra na fila com prioridade pelo tipo
+    de falha: cartões obsoletos e cliques perdidos costumam dar certo logo na próxima vez, e
+    bloqueios ficam por último, depois que a taxa já baixou. Cada nova tentativa espera
+    `backoff` segundos, o dobro a cada falha, e um lugar é tentado no máximo `max_attempts`
+    vezes. Ao final, report mostra a completude da busca e os lugares perdidos.
+    """
+    # Menor = tentado antes
+    PRIORITIES = {'stale': 0, 'click': 0, 'timeout': 1, 'partial': 1, 'error': 2, 'blocked': 3}
+    # Lugares perdidos listados no relatório
+    MAX_LISTED = 10
+    
+    def __init__(self, max_attempts=3, backoff=5.0, max_backoff=120.0):
+        """
+        Args:
+            max_attempts (int): Tentativas de cada lugar, contando a primeira
+            backoff (float): Espera, em segundos, antes da primeira nova tentativa
+            max_backoff (float): Maior espera antes de uma nova tentativa
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.reset()
+        
+    def reset(self):
+        self._pending = {}  # chave do lugar -> {'link', 'kind', 'ready', 'order'}
+        self._failed = {}  # chave do lugar -> falhas nesta busca
+        self._order = 0
+        self.failures = defaultdict(int)
+        self.succeeded = 0
+        self.recovered = 0
+        self.lost = []
+        
+    def __len__(self):
+        return len(self._pending)
+        
+    @staticmethod
+    def key(link):
+        return link.get('place_id') or link.get('url') or link.get('name')
+        
+    @staticmethod
+    def classify(error=None, business=None, blocked=None):
+        """
+        Tipo da falha de uma extração
+        
+        Args:
+            error (Exception): Erro da extração
+            business (dict): Dados obtidos
+            blocked (str): Bloqueio detectado na página (ver _check_block)
+            
+        Returns:
+            str: 'stale', 'timeout', 'click', 'blocked', 'error' ou 'partial' (só o nome);
+                 None se a extração deu certo
+        """
+        if error is None and business and set(business) - {'name', 'place_id', 'url'}:
+            return None
+        if isinstance(error, StaleElementReferenceException):
+            return 'stale'
+        if isinstance(error, TimeoutException):
+            return 'timeout'
+        if isinstance(error, ElementClickInterceptedException):
+            return 'click'
+        if blocked and blocked != 'consent':
+            return 'blocked'
+        return 'error' if error is not None else 'partial'
+        
+    def success(self, link):
+        """
+        Registra um lugar extraído; conta como recuperado se ele já tinha falhado
+        """
+        self.succeeded += 1
+        if self._failed.pop(self.key(link), 0):
+            self.recovered += 1
+            
+    def push(self, link, kind):
+        """
+        Registra uma falha e coloca o lugar na fila, se ainda houver tentativas
+        
+        Args:
+            link (dict): Dicionário com 'name', 'url' e 'place_id' (sem 'url' o lugar não pode ser reaberto)
+            kind (str): Tipo da falha (ver classify)
+            
+        Returns:
+            bool: True se o lugar será tentado de novo; False se foi dado como perdido
+        """
+        key = self.key(link)
+        self.failures[kind] += 1
+        failed = self._failed.get(key, 0) + 1
+        self._failed[key] = failed
+        if failed >= self.max_attempts or not link.get('url'):
+            del self._failed[key]
+            self.lost.append({'name': link.get('name') or '', 'url': link.get('url'),
+                              'place_id': link.get('place_id'), 'kind': kind, 'attempts': failed})
+            return False
+            
+        self._order += 1
+        self._pending[key] = {'link': link, 'kind': kind, 'order': self._order,
+                              'ready': time.time() + min(self.max_backoff, self.backoff * 2 ** (failed - 1))}
+        return True
+        
+    def has_pending(self, kind):
+        """
+        Indica se há lugares na fila com este tipo de falha
+        """
+        return any(entry['kind'] == kind for entry in self._pending.values())
+        
+    def pop(self):
+        """
+        Próximo lugar a tentar: o de maior prioridade entre os que já podem ser tentados,
+        ou, se nenhum puder, o que fica pronto primeiro
+        
+        Returns:
+            tuple: (link, segundos a esperar antes de tentar), ou None se a fila estiver vazia
+        """
+        if not self._pending:
+            return None
+        now = time.time()
+        ready = [entry for entry in self._pending.values() if entry['ready'] <= now]
+        if ready:
+            entry = min(ready, key=lambda entry: (self.PRIORITIES.get(entry['kind'], 2), entry['order']))
+        else:
+            entry = min(self._pending.values(), key=lambda entry: entry['ready'])
+        del self._pending[self.key(entry['link'])]
+        return entry['link'], max(0.0, entry['ready'] - now)
+        
+    def merge(self, other):
+        """
+        Soma a contabilidade de outra fila (ex.: de um navegador do pool)
+        """
+        for kind, count in other.failures.items():
+            self.failures[kind] += count
+        self.succeeded += other.succeeded
+        self.recovered += other.recovered
+        self.lost.extend(other.lost)
+        for key, entry in other._pending.items():
+            self._order += 1
+            self._pending.setdefault(key, dict(entry, order=self._order))
+        for key, failed in other._failed.items():
+            self._failed[key] = max(self._failed.get(key, 0), failed)
+            
+    def snapshot(self):
+        """
+        Completude da busca para as métricas
+        
+        Returns:
+            dict: Lugares extraídos, recuperados e perdidos, falhas por tipo e fração completa
+        """
+        total = self.succeeded + len(self.lost)
+        return {'succeeded': self.succeeded, 'recovered': self.recovered, 'lost': len(self.lost),
+                'failures': dict(self.failures), 'completeness': self.succeeded / total if total else 1.0}
+                
+    def report(self):
+        """
+        Mostra a completude da busca, as falhas por tipo e os lugares perdidos
+        """
+        total = self.succeeded + len(self.lost)
+        if total:
+            logger.info("Completude: %s de %s lugares extraídos (%.1f%%); %s recuperados em novas tentativas, "
+                        "%s perdidos.", self.succeeded, total, self.succeeded * 100 / total, self.recovered,
+                        len(self.lost))
+        if self.failures:
+            failures = sorted(self.failures.items(), key=lambda item: -item[1])
+            logger.info("Falhas por tipo: %s", ", ".join(f"{kind}={count}" for kind, count in failures))
+        for place in self.lost[:self.MAX_LISTED]:
+            logger.warning("  ✗ %s (%s, %s tentativas)", place['name'] or place['url'] or '?', place['kind'],
+                           place['attempts'])
+        if len(self.lost) > self.MAX_LISTED:
+            logger.warning("  ... e mais %s lugares perdidos.", len(self.lost) - self.MAX_LISTED)
+        if self._pending:
+            logger.warning("%s lugares ficaram sem nova tentativa.", len(self._pending))
+
+
+class WaitEngine:
+    """
+    Esperas explícitas baseadas em condições, com orçamento de tempo por fase.
+    
+    Substitui as pausas fixas: cada espera termina assim que a condição é satisfeita
+    (ou quando o orçamento da fase se esgota) e o tempo gasto esperando fica registrado
+    por fase, separado do tempo gasto trabalhando.
+    """
+    # Orçamento padrão (em segundos) de cada fase
+    DEFAULT_BUDGETS = {
+        'search': 20,    # caixa de pesquisa
+        'results': 10,   # primeiros cartões da lista
+        'cookies': 3,    # página pronta para procurar o aviso de cookies
+        'detail': 10,    # título do painel de detalhes
+        'idle': 2,       # rede ociosa após o painel abrir
+        'scroll': 6,     # novos cartões após uma rolagem
+        'back': 5        # lista de resultados após voltar
+    }
+    
+    def __init__(self, driver, budgets=None, poll_frequency=0.2):
+        """
+        Args:
+            driver: Instância do WebDriver
+            budgets (dict): Orçamentos por fase que substituem os padrões
+            poll_frequency (float): Intervalo entre verificações das condições, em segundos
+        """
+        self.driver = driver
+        self.budgets = dict(self.DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.poll_frequency = poll_frequency
+        self.reset()
+        
+    def reset(self):
+        """
+        Zera a contabilidade de tempo
+        """
+        self.started = time.time()
+        self.waited = defaultdict(float)
+        self.timeouts = defaultdict(int)
+        
+    def until(self, condition, phase, timeout=None):
+        """
+        Aguarda até a condição retornar um valor verdadeiro
+        
+        Args:
+            condition: Função que recebe o driver (como as de expected_conditions)
+            phase (str): Fase usada para o orçamento e para a contabilidade
+            timeout (float): Tempo máximo em segundos (padrão: orçamento da fase)
+            
+        Returns:
+            O valor retornado pela condição ou None se o tempo se esgotar
+        """
+        if timeout is None:
+            timeout = self.budgets.get(phase, 10)
+            
+        start = time.time()
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=self.poll_frequency,
+                                 ignored_exceptions=(NoSuchElementException, StaleElementReferenceException)
+                                 ).until(condition)
+        except TimeoutException:
+            self.timeouts[phase] += 1
+            return None
+        finally:
+            self.waited[phase] += time.time() - start
+            
+    def sleep(self, seconds, phase='pacing'):
+        """
+        Pausa intencional (ex.: intervalo entre negócios), contabilizada como espera
+        """
+        time.sleep(seconds)
+        self.waited[phase] += seconds
+        
+    @staticmethod
+    def detail_panel_key(url):
+        """
+        Identificador do lugar aberto no painel de detalhes (ver extract_place_id), lido do
+        endereço da página; None se a página não for a de um lugar
+        """
+        return extract_place_id(url) if url and '/maps/place/' in url else None
+        
+    def detail_panel_changed(self, previous_key=None):
+        """
+        Condição: o painel de detalhes mostra um lugar diferente do anterior
+        
+        Os lugares são comparados pelo identificador no endereço da página, não pelo título:
+        filiais seguidas de uma rede têm o mesmo título. Sem lugar anterior, qualquer título basta.
+        
+        Retorna [título, identificador do lugar]
+        """
+        def condition(driver):
+            title, url = driver.execute_script(DETAIL_PANEL_SCRIPT)
+            key = self.detail_panel_key(url)
+            if not title or (key == previous_key if key else previous_key is not None):
+                return False
+            return [title, key]
+        return condition
+        
+    def feed_grows(self, feed, previous_count):
+        """
+        Condição: a lista passou a ter mais filhos do que `previous_count` ou chegou ao fim
+        
+        Retorna o estado da lista: [quantidade de filhos, chegou ao fim]
+        """
+        def condition(driver):
+            count, ended = driver.execute_script(FEED_STATE_SCRIPT, feed)
+            return [count, ended] if count > previous_count or ended else False
+        return condition
+        
+    def network_idle(self, quiet_period=0.3):
+        """
+        Condição: nenhum recurso novo foi carregado durante `quiet_period` segundos
+        """
+        state = {'count': -1, 'since': time.time()}
+        
+        def condition(driver):
+            count = driver.execute_script(RESOURCE_COUNT_SCRIPT)
+            now = time.time()
+            if count != state['count']:
+                state['count'] = count
+                state['since'] = now
+                return False
+            return now - state['since'] >= quiet_period
+        return condition
+        
+    def merge(self, other):
+        """
+        Soma a contabilidade de outro WaitEngine (ex.: navegadores do pool)
+        """
+        for phase, seconds in other.waited.items():
+            self.waited[phase] += seconds
+        for phase, count in other.timeouts.items():
+            self.timeouts[phase] += count
+            
+    def report(self):
+        """
+        Mostra quanto tempo foi gasto esperando e trabalhando desde o último reset
+        
+        Returns:
+            dict: Tempo total, de espera e de trabalho, além da espera e dos timeouts por fase
+        """
+        total = time.time() - self.started
+        waited = sum(self.waited.values())
+        working = max(0.0, total - waited)
+        
+        logger.info("Tempo total: %.1fs | esperando: %.1fs | trabalhando: %.1fs", total, waited, working)
+        for phase, seconds in sorted(self.waited.items(), key=lambda item: -item[1]):
+            timeouts = self.timeouts.get(phase, 0)
+            logger.info("  %s: %.1fs de espera%s", phase, seconds, f" ({timeouts} timeouts)" if timeouts else "")
+            
+        return {
+            'total': total,
+            'waiting': waited,
+            'working': working,
+            'phases': dict(self.waited),
+            'timeouts': dict(self.timeouts)
+        }
+
+
+class Metrics:
+    """
+    Spans de tempo por fase (busca, rolagem, clique, extração, volta) e acertos dos seletores.
+    
+    Os spans são guardados como histogramas (contagem, soma, máximo e baldes fixos), então a
+    memória não cresce com a duração da execução. Junto com CommandCounter, WaitEngine e
+    NetworkStats, gera o retrato da execução exportado em JSON ou no formato texto do Prometheus.
+    """
+    # Limites superiores (em segundos) dos baldes do histograma de cada fase
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    
+    def __init__(self):
+        self.reset()
+        
+    def reset(self):
+        """
+        Zera os spans e as contagens de seletores
+        """
+        self.span_count = defaultdict(int)
+        self.span_seconds = defaultdict(float)
+        self.span_max = defaultdict(float)
+        self.span_buckets = defaultdict(lambda: [0] * len(self.BUCKETS))
+        self.selector_hits = defaultdict(int)    # (campo, seletor) -> acertos
+        self.selector_misses = defaultdict(int)  # campo -> páginas sem nenhum seletor encontrado
+        
+    @contextmanager
+    def span(self, phase):
+        """
+        Cronometra o bloco como um span da fase
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+            
+    def observe(self, phase, seconds):
+        """
+        Registra a duração de um span da fase
+        """
+        self.span_count[phase] += 1
+        self.span_seconds[phase] += seconds
+        self.span_max[phase] = max(self.span_max[phase], seconds)
+        buckets = self.span_buckets[phase]
+        for index, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                buckets[index] += 1
+                break
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fase %s: %.0f ms", phase, seconds * 1000, extra={'span': phase, 'seconds': seconds})
+            
+    def selector(self, field, selector):
+        """
+        Registra qual seletor da cascata encontrou o campo
+        
+        Args:
+            field (str): Campo procurado (ex.: 'phone')
+            selector (str): Texto do seletor que encontrou o campo (None = nenhum encontrou)
+        """
+        if selector is None:
+            self.selector_misses[field] += 1
+        else:
+            self.selector_hits[(field, selector)] += 1
+            
+    def merge(self, other):
+        """
+        Soma os spans e seletores de outro Metrics (ex.: navegadores do pool)
+        """
+        for phase, count in other.span_count.items():
+            self.span_count[phase] += count
+            self.span_seconds[phase] += other.span_seconds[phase]
+            self.span_max[phase] = max(self.span_max[phase], other.span_max[phase])
+            buckets = self.span_buckets[phase]
+            for index, value in enumerate(other.span_buckets[phase]):
+                buckets[index] += value
+        for key, count in other.selector_hits.items():
+            self.selector_hits[key] += count
+        for field, count in other.selector_misses.items():
+            self.selector_misses[field] += count
+            
+    def report(self):
+        """
+        Mostra quantas vezes cada fase ocorreu e quanto tempo levou
+        """
+        for phase, seconds in sorted(self.span_seconds.items(), key=lambda item: -item[1]):
+            count = self.span_count[phase]
+            logger.info("  %s: %s vezes, %.1fs no total, média %.0f ms, máx. %.0f ms", phase, count, seconds,
+                        seconds * 1000 / count, self.span_max[phase] * 1000,
+                        extra={'span': phase, 'count': count, 'seconds': seconds})
+                        
+    def snapshot(self, commands=None, waits=None, network=None, rate=None, search_cache=None, retries=None):
+        """
+        Retrato da execução com os spans, os seletores e as contagens dos demais coletores
+        
+        Args:
+            commands (CommandCounter): Comandos WebDriver
+            waits (WaitEngine): Tempo de espera e de pausas por fase
+            network (NetworkStats): Requisições e bytes transferidos
+            rate (RateController): Taxa de páginas, vazão e bloqueios
+            search_cache (SearchCache): Acertos do cache de buscas e tempo economizado
+            retries (RetryQueue): Completude da busca e falhas de extração por tipo
+            
+        Returns:
+            dict: Métricas serializáveis em JSON
+        """
+        spans = {}
+        for phase, count in self.span_count.items():
+            cumulative = 0
+            buckets = {}
+            for bound, value in zip(self.BUCKETS, self.span_buckets[phase]):
+                cumulative += value
+                buckets[str(bound)] = cumulative
+            spans[phase] = {'count': count, 'seconds': self.span_seconds[phase],
+                            'max_seconds': self.span_max[phase], 'buckets': buckets}
+                            
+        selectors = defaultdict(lambda: {'hits': {}, 'misses': 0})
+        for (field, selector), count in self.selector_hits.items():
+            selectors[field]['hits'][selector] = count
+        for field, count in self.selector_misses.items():
+            selectors[field]['misses'] = count
+            
+        snapshot = {'time': time.time(), 'spans': spans, 'selectors': dict(selectors)}
+        if commands:
+            snapshot['places'] = len(commands.per_place)
+            snapshot['commands'] = {'total': commands.total, 'by_command': dict(commands.by_command)}
+        if waits:
+            snapshot['waits'] = {'seconds': dict(waits.waited), 'timeouts': dict(waits.timeouts),
+                                 'sleep_seconds': waits.waited.get('pacing', 0.0)}
+        if network:
+            snapshot['network'] = {'requests': network.requests, 'bytes': network.bytes,
+                                   'blocked': dict(network.blocked)}
+        if rate:
+            snapshot['rate'] = rate.snapshot()
+        if search_cache:
+            snapshot['search_cache'] = search_cache.stats()
+        if retries:
+            snapshot['completeness'] = retries.snapshot()
+        return snapshot
+        
+    @staticmethod
+    def to_prometheus(snapshot):
+        """
+        Converte um retrato (ver snapshot) para o formato texto do Prometheus
+        
+        Returns:
+            str: Métricas no formato de exposição do Prometheus
+        """
+        lines = [
+            "# HELP scraper_span_seconds Duração de cada fase do scraper.",
+            "# TYPE scraper_span_seconds histogram"
+        ]
+        for phase, span in sorted(snapshot['spans'].items()):
+            for bound, count in span['buckets'].items():
+                lines.append(f'scraper_span_seconds_bucket{{phase="{phase}",le="{bound}"}} {count}')
+            lines.append(f'scraper_span_seconds_bucket{{phase="{phase}",le="+Inf"}} {span["count"]}')
+            lines.append(f'scraper_span_seconds_sum{{phase="{phase}"}} {span["seconds"]:.6f}')
+            lines.append(f'scraper_span_seconds_count{{phase="{phase}"}} {span["count"]}')
+            
+        lines += ["# HELP scraper_selector_hits_total Campos encontrados por cada seletor da cascata.",
+                  "# TYPE scraper_selector_hits_total counter"]
+        for field, stats in sorted(snapshot['selectors'].items()):
+            for selector, count in sorted(stats['hits'].items()):
+                label = selector.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                lines.append(f'scraper_selector_hits_total{{field="{field}",selector="{label}"}} {count}')
+        lines += ["# HELP scraper_selector_misses_total Páginas em que nenhum seletor encontrou o campo.",
+                  "# TYPE scraper_selector_misses_total counter"]
+        for field, stats in sorted(snapshot['selectors'].items()):
+            lines.append(f'scraper_selector_misses_total{{field="{field}"}} {stats["misses"]}')
+            
+        if 'commands' in snapshot:
+            lines += ["# HELP scraper_places_total Negócios extraídos.",
+                      "# TYPE scraper_places_total counter",
+                      f"scraper_places_total {snapshot['places']}",
+                      "# HELP scraper_webdriver_commands_total Comandos WebDriver enviados.",
+                      "# TYPE scraper_webdriver_commands_total counter"]
+            for command, count in sorted(snapshot['commands']['by_command'].items()):
+                lines.append(f'scraper_webdriver_commands_total{{command="{command}"}} {count}')
+        if 'waits' in snapshot:
+            lines += ["# HELP scraper_wait_seconds_total Tempo de espera (e de pausas) por fase.",
+                      "# TYPE scraper_wait_seconds_total counter"]
+            for phase, seconds in sorted(snapshot['waits']['seconds'].items()):
+                lines.append(f'scraper_wait_seconds_total{{phase="{phase}"}} {seconds:.6f}')
+            lines += ["# HELP scraper_wait_timeouts_total Esperas que estouraram o orçamento da fase.",
+                      "# TYPE scraper_wait_timeouts_total counter"]
+            for phase, count in sorted(snapshot['waits']['timeouts'].items()):
+                lines.append(f'scraper_wait_timeouts_total{{phase="{phase}"}} {count}')
+        if 'network' in snapshot:
+            lines += ["# TYPE scraper_network_requests_total counter",
+                      f"scraper_network_requests_total {snapshot['network']['requests']}",
+                      "# TYPE scraper_network_bytes_total counter",
+                      f"scraper_network_bytes_total {snapshot['network']['bytes']}",
+                      "# TYPE scraper_network_blocked_total counter"]
+            for resource_type, count in sorted(snapshot['network']['blocked'].items()):
+                lines.append(f'scraper_network_blocked_total{{type="{resource_type}"}} {count}')
+        if 'rate' in snapshot:
+            lines += ["# HELP scraper_rate_pages_per_second Taxa atual de páginas permitida pelo controlador.",
+                      "# TYPE scraper_rate_pages_per_second gauge",
+                      f"scraper_rate_pages_per_second {snapshot['rate']['rate']:.6f}",
+                      "# HELP scraper_rate_ceiling_pages_per_second Maior taxa segura aprendida na sessão.",
+                      "# TYPE scraper_rate_ceiling_pages_per_second gauge",
+                      f"scraper_rate_ceiling_pages_per_second {snapshot['rate']['ceiling']:.6f}",
+                      "# HELP scraper_pages_per_minute Páginas abertas por minuto.",
+                      "# TYPE scraper_pages_per_minute gauge",
+                      f"scraper_pages_per_minute {snapshot['rate']['pages_per_minute']:.6f}",
+                      "# HELP scraper_blocks_total Bloqueios detectados (CAPTCHA, painel vazio, consentimento).",
+                      "# TYPE scraper_blocks_total counter"]
+            for kind, count in sorted(snapshot['rate']['blocks'].items()):
+                lines.append(f'scraper_blocks_total{{kind="{kind}"}} {count}')
+        if 'search_cache' in snapshot:
+            cache = snapshot['search_cache']
+            lines += ["# HELP scraper_search_cache_hits_total Buscas atendidas pelo cache, sem rolar a lista.",
+                      "# TYPE scraper_search_cache_hits_total counter",
+                      f"scraper_search_cache_hits_total {cache['hits']}",
+                      "# HELP scraper_search_cache_misses_total Buscas que não estavam no cache.",
+                      "# TYPE scraper_search_cache_misses_total counter",
+                      f"scraper_search_cache_misses_total {cache['misses']}",
+                      "# HELP scraper_search_cache_saved_seconds_total Tempo de busca e rolagem poupado pelo cache.",
+                      "# TYPE scraper_search_cache_saved_seconds_total counter",
+                      f"scraper_search_cache_saved_seconds_total {cache['seconds_saved']:.6f}"]
+        if 'completeness' in snapshot:
+            completeness = snapshot['completeness']
+            lines += ["# HELP scraper_places_extracted_total Lugares extraídos com dados além do nome.",
+                      "# TYPE scraper_places_extracted_total counter",
+                      f"scraper_places_extracted_total {completeness['succeeded']}",
+                      "# HELP scraper_places_recovered_total Lugares extraídos em uma nova tentativa.",
+                      "# TYPE scraper_places_recovered_total counter",
+                      f"scraper_places_recovered_total {completeness['recovered']}",
+                      "# HELP scraper_places_lost_total Lugares perdidos após todas as tentativas.",
+                      "# TYPE scraper_places_lost_total counter",
+                      f"scraper_places_lost_total {completeness['lost']}",
+                      "# HELP scraper_extraction_failures_total Falhas de extração por tipo.",
+                      "# TYPE scraper_extraction_failures_total counter"]
+            for kind, count in sorted(completeness['failures'].items()):
+                lines.append(f'scraper_extraction_failures_total{{kind="{kind}"}} {count}')
+        return "\n".join(lines) + "\n"
+        
+    def export(self, path, commands=None, waits=None, network=None, rate=None, search_cache=None, retries=None):
+        """
+        Grava o retrato da execução: formato Prometheus se o arquivo terminar em .prom, senão JSON
+        
+        A gravação é atômica, então um coletor (ex.: textfile do node_exporter) nunca lê um arquivo pela metade.
+        """
+        snapshot = self.snapshot(commands, waits, network, rate, search_cache, retries)
+        if path.endswith('.prom'):
+            content = self.to_prometheus(snapshot)
+        else:
+            content = json.dumps(snapshot, ensure_ascii=False, indent=2)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+
+def timed_phase(phase):
+    """
+    Decorador que registra cada chamada do método como um span da fase em self.metrics
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.span(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class JsonLogFormatter(logging.Formatter):
+    """
+    Formata cada registro como uma linha JSON, incluindo os campos passados em `extra`
+    """
+    STANDARD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+    
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in self.STANDARD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level='INFO', log_format='text'):
+    """
+    Configura o log do scraper (por padrão, sem configuração, só avisos e erros aparecem)
+    
+    Args:
+        level (str): Nível mínimo ('DEBUG', 'INFO', 'WARNING' ou 'ERROR')
+        log_format (str): 'text' para leitura humana ou 'json' para logs estruturados (uma linha JSON por registro)
+    """
+    handler = logging.StreamHandler()
+    if log_format == 'json':
+        handler.setFormatter(JsonLogFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-7s %(message)s', '%H:%M:%S'))
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def bounds_around(lat, lng, radius_km):
+    """
+    Calcula a área retangular (sul, oeste, norte, leste) que cobre um raio em torno de um ponto
+    
+    Args:
+        lat (float): Latitude do centro
+        lng (float): Longitude do centro
+        radius_km (float): Raio em quilômetros
+        
+    Returns:
+        tuple: (sul, oeste, norte, leste) em graus
+    """
+    lat_delta = radius_km / 111.32
+    lng_delta = radius_km / (111.32 * max(0.01, math.cos(math.radians(lat))))
+    return (lat - lat_delta, lng - lng_delta, lat + lat_delta, lng + lng_delta)
+
+
+def parse_bounds(bbox=None, center=None, radius_km=5):
+    """
+    Lê a área da busca por ladrilhos a partir de --bbox ou de --center e --radius-km
+    
+    Args:
+        bbox (str): "sul,oeste,norte,leste" em graus
+        center (str): "lat,lng" em graus
+        radius_km (float): Raio em torno de `center`, em quilômetros
+        
+    Returns:
+        tuple: (sul, oeste, norte, leste), ou None sem bbox nem center
+        
+    Raises:
+        ValueError: Se a área for inválida (formato, fora do globo ou vazia)
+    """
+    if not bbox and not center:
+        return None
+    text, size = (bbox, 4) if bbox else (center, 2)
+    try:
+        values = tuple(float(value) for value in text.split(","))
+    except ValueError:
+        values = ()
+    if len(values) != size or not all(math.isfinite(value) for value in values):
+        raise ValueError(f"--bbox deve ter a forma SUL,OESTE,NORTE,LESTE: '{bbox}'" if bbox
+                         else f"--center deve ter a forma LAT,LNG: '{center}'")
+    latitudes, longitudes = values[0::2], values[1::2]
+    if not all(-90 <= lat <= 90 for lat in latitudes) or not all(-180 <= lng <= 180 for lng in longitudes):
+        raise ValueError("Latitudes devem estar entre -90 e 90 e longitudes entre -180 e 180")
+    if center:
+        if not radius_km > 0:
+            raise ValueError("--radius-km deve ser maior que zero")
+        return bounds_around(values[0], values[1], radius_km)
+    south, west, north, east = values
+    if south >= north or west >= east:
+        raise ValueError("--bbox precisa de sul < norte e oeste < leste")
+    return values
+
+
+def plan_tiles(bounds, grid=3):
+    """
+    Divide uma área em uma grade de ladrilhos (tiles) de busca independentes
+    
+    Args:
+        bounds (tuple): (sul, oeste, norte, leste) em graus
+        grid (int): Quantidade de linhas e de colunas da grade
+        
+    Returns:
+        list: Ladrilhos como dicionários com 'south', 'west', 'north', 'east' e 'depth'
+    """
+    south, west, north, east = bounds
+    lat_step = (north - south) / grid
+    lng_step = (east - west) / grid
+    return [
+        {
+            'south': south + row * lat_step,
+            'west': west + col * lng_step,
+            'north': south + (row + 1) * lat_step,
+            'east': west + (col + 1) * lng_step,
+            'depth': 0
+        }
+        for row in range(grid) for col in range(grid)
+    ]
+
+
+def split_tile(tile):
+    """
+    Divide um ladrilho em quatro, um nível mais profundo
+    """
+    children = plan_tiles((tile['south'], tile['west'], tile['north'], tile['east']), grid=2)
+    for child in children:
+        child['depth'] = tile['depth'] + 1
+    return children
+
+
+def tile_search_url(query, tile, viewport_width=1920, viewport_height=1080, maps_url="https://www.google.com/maps"):
+    """
+    Monta a URL de busca do Google Maps centralizada no ladrilho (formato @lat,lng,zoomz)
+    
+    O zoom é o maior que ainda mostra o ladrilho inteiro na janela do navegador.
+    """
+    lat = (tile['south'] + tile['north']) / 2
+    lng = (tile['west'] + tile['east']) / 2
+    
+    # Na projeção do Maps, o mundo inteiro tem 256 * 2^zoom pixels de largura
+    lng_span = max(tile['east'] - tile['west'], 1e-6)
+    lat_span = max((tile['north'] - tile['south']) / max(0.01, math.cos(math.radians(lat))), 1e-6)
+    zoom_lng = math.log2(360 * viewport_width / 256 / lng_span)
+    zoom_lat = math.log2(360 * viewport_height / 256 / lat_span)
+    zoom = max(3, min(21, math.floor(min(zoom_lng, zoom_lat))))
+    
+    return f"{maps_url}/search/{quote(query)}/@{lat:.6f},{lng:.6f},{zoom}z"
+
+
+class ResultSink:
+    """
+    Grava cada negócio assim que é extraído, em CSV e JSONL com colunas fixas.
+    
+    Os arquivos recebem fsync a cada `fsync_every` negócios, junto com um checkpoint
+    (consulta, região e IDs dos lugares já processados) que permite retomar uma execução
+    interrompida com `resume=True`. Os IDs novos são acrescentados a um arquivo à parte
+    (.checkpoint.ids), então cada checkpoint custa o mesmo do início ao fim de uma busca
+    longa; o arquivo só é reescrito, sem repetições, quando a busca termina.
+    """
+    # Colunas fixas do CSV, na ordem em que são gravadas
+    FIELDNAMES = ['name', 'category', 'address', 'phone', 'website', 'email', 'place_id', 'url', 'rating', 'reviews']
+    
+    def __init__(self, filename, query=None, region=None, resume=False, fsync_every=10):
+        """
+        Args:
+            filename (str): Arquivo CSV de saída; o JSONL e os arquivos do checkpoint usam o mesmo nome base
+            query (str): Nicho da busca (registrado no checkpoint)
+            region (str): Região da busca (registrada no checkpoint)
+            resume (bool): Se True, continua os arquivos de uma execução anterior da mesma busca
+            fsync_every (int): Quantidade de negócios entre cada fsync/checkpoint
+        """
+        base = os.path.splitext(filename)[0]
+        self.csv_path = filename
+        self.jsonl_path = base + '.jsonl'
+        self.checkpoint_path = base + '.checkpoint.json'
+        self.ids_path = base + '.checkpoint.ids'
+        self.query = query
+        self.region = region
+        self.fsync_every = max(1, fsync_every)
+        self.processed = set()
+        self.count = 0
+        self._pending = 0
+        self._new_ids = []  # IDs ainda não acrescentados ao arquivo de IDs
+        self._lock = threading.RLock()
+        
+        if resume:
+            self._load_checkpoint()
+            
+        mode = 'a' if resume else 'w'
+        write_header = not resume or not os.path.exists(self.csv_path) or os.path.getsize(self.csv_path) == 0
+        self._csv_file = open(self.csv_path, mode, newline='', encoding='utf-8')
+        self._jsonl_file = open(self.jsonl_path, mode, encoding='utf-8')
+        self._ids_file = open(self.ids_path, mode, encoding='utf-8')
+        self._writer = csv.DictWriter(self._csv_file, fieldnames=self.FIELDNAMES, extrasaction='ignore')
+        if write_header:
+            self._writer.writeheader()
+        self.flush()
+        
+    def _load_checkpoint(self):
+        """
+        Carrega os IDs já processados do checkpoint e do JSONL de uma execução anterior
+        """
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding='utf-8') as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+            if (checkpoint.get('query'), checkpoint.get('region')) != (self.query, self.region):
+                raise ValueError(f"O checkpoint '{self.checkpoint_path}' é de outra busca: "
+                                 f"{checkpoint.get('query')} / {checkpoint.get('region')}")
+            # Checkpoints antigos guardavam os IDs no próprio JSON: passam para o arquivo de IDs
+            self._new_ids.extend(checkpoint.get('processed', []))
+            self.processed.update(self._new_ids)
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, encoding='utf-8') as ids_file:
+                self.processed.update(line.strip() for line in ids_file if line.strip())
+            
+        # O JSONL pode ter negócios gravados depois do último checkpoint
+        if os.path.exists(self.jsonl_path):
+            with open(self.jsonl_path, encoding='utf-8') as jsonl_file:
+                for line in jsonl_file:
+                    try:
+                        place_id = json.loads(line).get('place_id')
+                    except ValueError:
+                        continue  # Linha incompleta de uma execução interrompida
+                    if place_id:
+                        self.processed.add(place_id)
+                        
+        self.count = len(self.processed)
+        logger.info("Retomando execução anterior: %s negócios já processados.", self.count)
+        
+    def is_processed(self, place_id):
+        """
+        Indica se o lugar já foi gravado (nesta execução ou em uma anterior)
+        """
+        return place_id is not None and place_id in self.processed
+        
+    def write(self, business):
+        """
+        Grava um negócio nos arquivos de saída
+        
+        Args:
+            business (dict): Dados do negócio
+        """
+        with self._lock:
+            self._writer.writerow(business)
+            self._jsonl_file.write(json.dumps(business, ensure_ascii=False) + '\n')
+        
+            if business.get('place_id') and business['place_id'] not in self.processed:
+                self.processed.add(business['place_id'])
+                self._new_ids.append(business['place_id'])
+            self.count += 1
+            self._pending += 1
+        
+            if self._pending >= self.fsync_every:
+                self.flush()
+            
+    def flush(self):
+        """
+        Força a gravação em disco dos arquivos e atualiza o checkpoint
+        """
+        with self._lock:
+            if self._new_ids:
+                self._ids_file.write(''.join(place_id + '\n' for place_id in self._new_ids))
+                self._new_ids = []
+            for output in (self._csv_file, self._jsonl_file, self._ids_file):
+                output.flush()
+                os.fsync(output.fileno())
+            self._pending = 0
+            self._write_checkpoint()
+        
+    def _compact_ids(self):
+        """
+        Reescreve o arquivo de IDs sem repetições (ao final da busca)
+        """
+        self._ids_file.close()
+        temp_path = self.ids_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as ids_file:
+            ids_file.write(''.join(place_id + '\n' for place_id in sorted(self.processed)))
+            ids_file.flush()
+            os.fsync(ids_file.fileno())
+        os.replace(temp_path, self.ids_path)
+        
+    def _write_checkpoint(self, completed=False):
+        # Gravar em um arquivo temporário e substituir, para nunca deixar um checkpoint pela metade.
+        # Os IDs ficam no arquivo de IDs: o checkpoint tem tamanho fixo
+        checkpoint = {
+            'query': self.query,
+            'region': self.region,
+            'ids_file': os.path.basename(self.ids_path),
+            'count': self.count,
+            'completed': completed,
+            'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file, ensure_ascii=False)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+        
+    def close(self, completed=True):
+        """
+        Grava o que estiver pendente e fecha os arquivos
+        
+        Args:
+            completed (bool): Marca no checkpoint que a busca terminou
+        """
+        self.flush()
+        self._compact_ids()
+        self._write_checkpoint(completed=completed)
+        self._csv_file.close()
+        self._jsonl_file.close()
+        logger.info("%s negócios gravados em '%s' e '%s'.", self.count, self.csv_path, self.jsonl_path)
+
+
+class PlaceStore:
+    """
+    Banco SQLite local com os lugares já extraídos, indexado pelo ID do lugar.
+    
+    Guarda os campos extraídos e o horário da última extração. Lugares extraídos há
+    menos de `ttl_days` dias são reaproveitados sem abrir a página de detalhes, e o
+    mesmo lugar encontrado por buscas diferentes é extraído uma única vez.
+    """
+    
+    def __init__(self, path='lugares.db', ttl_days=7):
+        """
+        Args:
+            path (str): Arquivo do banco SQLite
+            ttl_days (float): Validade, em dias, de uma extração
+        """
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS places (
+                place_id TEXT PRIMARY KEY,
+                name TEXT,
+                url TEXT,
+                data TEXT NOT NULL,
+                last_scraped REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS place_searches (
+                place_id TEXT NOT NULL,
+                search_term TEXT NOT NULL,
+                last_seen REAL NOT NULL,
+                PRIMARY KEY (place_id, search_term)
+            );
+            CREATE INDEX IF NOT EXISTS idx_places_last_scraped ON places (last_scraped);
+        """)
+        self._conn.commit()
+        
+    def get_fresh(self, place_id):
+        """
+        Retorna os dados do lugar se ele foi extraído dentro da validade
+        
+        Args:
+            place_id (str): ID do lugar
+            
+        Returns:
+            dict ou None
+        """
+        if not place_id:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM places WHERE place_id = ? AND last_scraped >= ?",
+                (place_id, time.time() - self.ttl)
+            ).fetchone()
+        if row:
+            self.hits += 1
+            return json.loads(row[0])
+        self.misses += 1
+        return None
+        
+    def save(self, business, search_term=None):
+        """
+        Grava (ou atualiza) um lugar extraído
+        
+        Args:
+            business (dict): Dados do negócio; precisa ter 'place_id'
+            search_term (str): Busca em que o lugar foi encontrado
+        """
+        place_id = business.get('place_id')
+        if not place_id:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO places (place_id, name, url, data, last_scraped) VALUES (?, ?, ?, ?, ?)",
+                (place_id, business.get('name'), business.get('url'), json.dumps(business, ensure_ascii=False), now)
+            )
+            if search_term:
+                self._record_search(place_id, search_term, now)
+            self._conn.commit()
+            
+    def record_search(self, place_id, search_term):
+        """
+        Registra que o lugar apareceu em uma busca, sem alterar os dados extraídos
+        """
+        if not place_id or not search_term:
+            return
+        with self._lock:
+            self._record_search(place_id, search_term, time.time())
+            self._conn.commit()
+            
+    def _record_search(self, place_id, search_term, now):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO place_searches (place_id, search_term, last_seen) VALUES (?, ?, ?)",
+            (place_id, search_term, now)
+        )
+        
+    def stale_places(self, limit=0):
+        """
+        Lista os lugares cuja extração já passou da validade, dos mais antigos para os mais novos
+        
+        Args:
+            limit (int): Quantidade máxima (0 = todos)
+            
+        Returns:
+            list: Dicionários com 'name', 'url' e 'place_id'
+        """
+        query = "SELECT place_id, name, url FROM places WHERE last_scraped < ? ORDER BY last_scraped"
+        params = [time.time() - self.ttl]
+        if limit > 0:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{'place_id': place_id, 'name': name or '', 'url': url} for place_id, name, url in rows if url]
+        
+    def close(self):
+        """
+        Fecha o banco e mostra quantas páginas de detalhes foram evitadas
+        """
+        total = self.hits + self.misses
+        if total:
+            logger.info("Banco de lugares: %s de %s lugares reaproveitados "
+                        "(%.0f%% das páginas de detalhes evitadas).", self.hits, total, self.hits * 100 / total)
+        self._conn.close()
+
+
+class SearchCache:
+    """
+    Cache em disco (SQLite) das listas de resultados das buscas, com validade e tamanho máximo.
+    
+    Guarda os cartões encontrados por uma busca (nome, link e ID de cada lugar), indexados
+    pelo termo normalizado e pelo domínio do Maps. Repetir a busca dentro de `ttl_hours`
+    pula a abertura da busca e a rolagem da lista; quando o cache passa de `max_mb`, as
+    buscas usadas há mais tempo são descartadas. Uma lista que não chegou ao fim (cortada
+    na quantidade pedida ou parada no meio da rolagem) fica marcada como parcial e só
+    atende pedidos de até o mesmo número de resultados.
+    """
+    
+    def __init__(self, path='buscas.db', ttl_hours=24, max_mb=50):
+        """
+        Args:
+            path (str): Arquivo do banco SQLite
+            ttl_hours (float): Validade, em horas, de uma lista de resultados
+            max_mb (float): Tamanho máximo das listas guardadas, em MB
+        """
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS searches (
+                key TEXT PRIMARY KEY,
+                links TEXT NOT NULL,
+                max_results INTEGER NOT NULL,
+                complete INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_searches_last_used ON searches (last_used);
+        """)
+        self._conn.commit()
+        
+    @staticmethod
+    def key(search_term, locale='', details=False):
+        """
+        Chave da busca: termo sem acentos, maiúsculas ou espaços repetidos, local e tipo de cartão
+        
+        Args:
+            search_term (str): Termo da busca (nicho + região, ou nicho + área do ladrilho)
+            locale (str): Domínio do Maps, que define o idioma e o país dos resultados
+            details (bool): Cartões com os dados mostrados na lista (modo 'list')
+        """
+        term = unicodedata.normalize('NFKD', search_term).encode('ascii', 'ignore').decode('ascii')
+        return '|'.join([' '.join(term.lower().split()), locale or '', 'cards' if details else 'links'])
+        
+    def get(self, search_term, locale='', max_results=0, details=False):
+        """
+        Retorna a lista de resultados guardada, se ela estiver na validade e tiver resultados suficientes
+        
+        Args:
+            search_term (str): Termo da busca
+            locale (str): Domínio do Maps
+            max_results (int): Quantidade desejada (0 = a lista inteira)
+            details (bool): Cartões com os dados mostrados na lista
+            
+        Returns:
+            list: Links dos resultados (ver _collect_place_links), ou None
+        """
+        key = self.key(search_term, locale, details)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT links, complete, seconds FROM searches WHERE key = ? AND created >= ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row:
+                self._conn.execute("UPDATE searches SET last_used = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                
+        links = json.loads(row[0]) if row else None
+        # Uma lista parcial só serve para pedir no máximo a quantidade guardada
+        if links is not None and not row[1] and not 0 < max_results <= len(links):
+            links = None
+        if links is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.seconds_saved += row[2]
+        return links[:max_results] if max_results > 0 else links
+        
+    def put(self, search_term, links, locale='', max_results=0, details=False, seconds=0.0, complete=True):
+        """
+        Guarda a lista de resultados de uma busca e descarta as mais antigas se o cache passar do tamanho
+        
+        Args:
+            search_term (str): Termo da busca
+            links (list): Links dos resultados
+            locale (str): Domínio do Maps
+            max_results (int): Quantidade pedida na busca (0 = a lista inteira)
+            details (bool): Cartões com os dados mostrados na lista
+            seconds (float): Tempo gasto para abrir a busca e rolar a lista
+            complete (bool): A rolagem chegou ao fim da lista (False = lista parcial)
+        """
+        data = json.dumps(links, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches (key, links, max_results, complete, size, seconds, created, "
+                "last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(search_term, locale, details), data, max(0, max_results), int(bool(complete)), len(data),
+                 seconds, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+            
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM searches WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM searches").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Menos usadas recentemente primeiro
+        expired = []
+        for key, size in self._conn.execute("SELECT key, size FROM searches ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            expired.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM searches WHERE key = ?", expired)
+        logger.debug("Cache de buscas: %s listas descartadas para caber em %.0f MB.", len(expired),
+                     self.max_bytes / 1048576)
+                     
+    def stats(self):
+        """
+        Acertos, falhas, taxa de acerto e tempo de rolagem economizado
+        
+        Returns:
+            dict
+        """
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0,
+                'seconds_saved': self.seconds_saved}
+                
+    def close(self):
+        """
+        Fecha o banco e mostra quantas buscas foram reaproveitadas
+        """
+        total = self.hits + self.misses
+        if total:
+            logger.info("Cache de buscas: %s de %s buscas reaproveitadas (%.0f%%), cerca de %.0fs de "
+                        "rolagem economizados.", self.hits, total, self.hits * 100 / total, self.seconds_saved)
+        self._conn.close()
+
+
+class SelectorRegistry:
+    """
+    Estatísticas de acerto das cascatas de seletores, persistidas entre execuções.
+    
+    Para cada campo (nome, endereço, telefone, lista de resultados...) registra qual seletor
+    encontrou o elemento e entrega a cascata reordenada, com os que mais acertaram
+    recentemente primeiro (a pontuação decai a cada busca do campo, então uma mudança no
+    HTML do Google é absorvida em poucas páginas). Os seletores genéricos do fim da cascata
+    encontram algum elemento em quase toda página e ficam sempre por último. Seletores que acertavam e passaram a
+    perder para outros são marcados como mortos: é o primeiro sinal de que o Google mudou a página.
+    """
+    # Fator aplicado à pontuação dos seletores de um campo a cada busca do campo
+    DECAY = 0.99
+    
+    # Buscas seguidas em que outro seletor encontrou o campo para considerar morto um que já acertou
+    DEAD_AFTER = 20
+    
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): Arquivo JSON das estatísticas (None = apenas em memória)
+        """
+        self.path = path
+        self.fields = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.fields = json.load(f).get('fields', {})
+            except (OSError, ValueError) as e:
+                logger.warning("⚠ Estatísticas de seletores ignoradas ('%s' ilegível): %s", path, e)
+                
+    @staticmethod
+    def key(selector):
+        """
+        Chave do seletor nas estatísticas: o próprio texto do seletor (sem o tipo By)
+        """
+        return selector[1] if isinstance(selector, (tuple, list)) else selector
+        
+    def _field(self, field):
+        return self.fields.setdefault(field, {'lookups': 0, 'misses': 0, 'selectors': {}})
+        
+    def ordered(self, field, selectors, fallbacks=0):
+        """
+        Cascata do campo na ordem em que deve ser tentada
+        
+        Args:
+            field (str): Nome do campo
+            selectors (list): Cascata padrão (a ordem original desempata)
+            fallbacks (int): Quantos seletores do fim da cascata são genéricos; eles não
+                             são reordenados e continuam por último
+            
+        Returns:
+            list: Os mesmos seletores, com os específicos de maior pontuação primeiro
+        """
+        stats = self.fields.get(field)
+        if not stats:
+            return list(selectors)
+        scores = stats['selectors']
+        specific = len(selectors) - fallbacks if 0 < fallbacks < len(selectors) else len(selectors)
+        return [selector for _, selector in sorted(
+            enumerate(selectors[:specific]),
+            key=lambda item: (-scores.get(self.key(item[1]), {}).get('score', 0.0), item[0])
+        )] + list(selectors[specific:])
+        
+    def record(self, field, tried, index):
+        """
+        Registra o resultado de uma busca do campo
+        
+        Args:
+            field (str): Nome do campo
+            tried (list): Cascata na ordem em que foi tentada (ver ordered)
+            index (int): Posição do seletor que encontrou o campo (None ou negativo = nenhum)
+        """
+        hit = index is not None and index >= 0
+        with self._lock:
+            stats = self._field(field)
+            stats['lookups'] += 1
+            if not hit:
+                stats['misses'] += 1
+            for position, selector in enumerate(tried):
+                entry = stats['selectors'].setdefault(self.key(selector), {'hits': 0, 'score': 0.0, 'lost': 0})
+                entry['score'] *= self.DECAY
+                if hit and position == index:
+                    entry['hits'] += 1
+                    entry['score'] += 1
+                    entry['lost'] = 0
+                    entry['last_hit'] = time.time()
+                elif hit:
+                    # Outro seletor encontrou o campo: conta mesmo que este nem tenha sido tentado,
+                    # pois um seletor morto vai para o fim da cascata e deixa de ser testado
+                    entry['lost'] += 1
+                    
+    def dead_selectors(self):
+        """
+        Seletores que já acertaram, mas há DEAD_AFTER buscas seguidas outro seletor encontra o campo no lugar deles
+        
+        Returns:
+            list: Tuplas (campo, seletor, estatísticas)
+        """
+        with self._lock:
+            return [(field, selector, dict(entry))
+                    for field, stats in self.fields.items()
+                    for selector, entry in stats['selectors'].items()
+                    if entry['hits'] and entry['lost'] >= self.DEAD_AFTER]
+                    
+    def report(self):
+        """
+        Avisa sobre seletores mortos
+        
+        Returns:
+            list: Os seletores mortos (ver dead_selectors)
+        """
+        dead = self.dead_selectors()
+        for field, selector, entry in dead:
+            last_hit = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.get('last_hit', 0)))
+            logger.warning("⚠ Seletor morto para '%s': %s (%s acertos, o último em %s); o Google pode ter "
+                           "mudado a página.", field, selector, entry['hits'], last_hit,
+                           extra={'field': field, 'selector': selector})
+        return dead
+        
+    def save(self):
+        """
+        Grava as estatísticas (de forma atômica), se houver arquivo
+        """
+        if not self.path:
+            return
+        with self._lock:
+            content = json.dumps({'version': 1, 'fields': self.fields}, ensure_ascii=False, indent=2)
+        temp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_path, self.path)
+
+
+# Padrões usados no HTML dos sites dos negócios (compilados uma única vez)
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+MAILTO_PATTERN = re.compile(r'mailto:([^"\'?<>\s]+)', re.IGNORECASE)
+TEL_PATTERN = re.compile(r'tel:([+\d][\d\s().%-]{6,})["\']', re.IGNORECASE)
+PHONE_TEXT_PATTERN = re.compile(r'\(\d{2}\)\s?9?\d{4}[\s-]?\d{4}\b')
+LINK_PATTERN = re.compile(r'<a\s[^>]*href=["\']([^"\'#]+)["\'][^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+CONTACT_LINK_PATTERN = re.compile(r'contat|contact|fale|atendimento', re.IGNORECASE)
+# E-mails que aparecem em sites mas não são do negócio (imagens @2x, exemplos, serviços de terceiros)
+IGNORED_EMAIL_PATTERN = re.compile(
+    r'\.(png|jpe?g|gif|svg|webp)$|@(example|exemplo|email|domain|dominio|sentry|wixpress|.*\.sentry)\.',
+    re.IGNORECASE
+)
+
+
+class WebsiteEnricher:
+    """
+    Completa e-mail e telefone dos negócios visitando o site informado no Maps.
+    
+    Roda depois da extração, fora do navegador: as páginas inicial e de contato de cada site
+    são baixadas com um cliente HTTP assíncrono (aiohttp) que reaproveita conexões, com limite
+    de requisições simultâneas no total e por domínio. O resultado de cada domínio fica em
+    cache, então negócios (ou buscas do mesmo lote) com o mesmo site o visitam uma única vez.
+    """
+    # Páginas de contato tentadas quando a página inicial não tem link para uma
+    CONTACT_PATHS = ('/contato', '/contact')
+    
+    USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+                  
+    def __init__(self, concurrency=20, per_domain=2, timeout=15, max_pages=3, max_bytes=2000000):
+        """
+        Args:
+            concurrency (int): Requisições simultâneas no total
+            per_domain (int): Requisições simultâneas para um mesmo domínio
+            timeout (float): Tempo máximo de cada requisição, em segundos
+            max_pages (int): Páginas visitadas por site (a inicial e as de contato)
+            max_bytes (int): Bytes lidos de cada página
+        """
+        self.concurrency = concurrency
+        self.per_domain = per_domain
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.cache = {}  # domínio -> {'emails': [...], 'phones': [...]}
+        self.fetched = 0
+        self.cache_hits = 0
+        
+    @staticmethod
+    def domain_of(url):
+        """
+        Domínio do site, sem "www." (chave do cache e do limite por domínio)
+        """
+        host = urlsplit(url).hostname or ''
+        return host[4:] if host.startswith('www.') else host
+        
+    @staticmethod
+    def extract_contacts(html, domain=''):
+        """
+        Encontra e-mails e telefones no HTML de uma página
+        
+        Args:
+            html (str): Conteúdo da página
+            domain (str): Domínio do site; e-mails desse domínio vêm primeiro
+            
+        Returns:
+            tuple: (lista de e-mails, lista de telefones), sem duplicatas e na ordem encontrada
+        """
+        emails = []
+        for email in MAILTO_PATTERN.findall(html) + EMAIL_PATTERN.findall(html):
+            email = unquote(email).strip().lower()
+            if email not in emails and EMAIL_PATTERN.fullmatch(email) and not IGNORED_EMAIL_PATTERN.search(email):
+                emails.append(email)
+        if domain:
+            emails.sort(key=lambda email: not email.endswith('@' + domain) and not email.endswith('.' + domain))
+            
+        phones = []
+        for phone in TEL_PATTERN.findall(html) + PHONE_TEXT_PATTERN.findall(html):
+            phone = unquote(phone).strip()
+            if phone not in phones:
+                phones.append(phone)
+        return emails, phones
+        
+    def _contact_links(self, html, base_url):
+        """
+        Links da mesma página para páginas de contato (pelo endereço ou pelo texto do link)
+        """
+        domain = self.domain_of(base_url)
+        links = []
+        for href, text in LINK_PATTERN.findall(html):
+            if not (CONTACT_LINK_PATTERN.search(href) or CONTACT_LINK_PATTERN.search(text)):
+                continue
+            url = urljoin(base_url, href)
+            if url.startswith('http') and self.domain_of(url) == domain and url not in links:
+                links.append(url)
+        return links
+        
+    async def _fetch(self, session, url, semaphore):
+        """
+        Baixa uma página HTML respeitando o limite do domínio
+        
+        Returns:
+            str: O HTML (até max_bytes) ou None se a página não puder ser lida
+        """
+        async with semaphore:
+            try:
+                async with session.get(url, allow_redirects=True) as response:
+                    if response.status >= 400 or 'html' not in response.headers.get('Content-Type', 'text/html'):
+                        return None
+                    body = await response.content.read(self.max_bytes)
+                    self.fetched += 1
+                    return body.decode(response.charset or 'utf-8', errors='replace')
+            except Exception as e:
+                logger.debug("Erro ao baixar %s: %s", url, e)
+                return None
+                
+    async def _crawl(self, session, website, semaphore):
+        """
+        Visita a página inicial e as de contato de um site até achar um e-mail
+        
+        Returns:
+            dict: {'emails': [...], 'phones': [...]}
+        """
+        domain = self.domain_of(website)
+        emails, phones = [], []
+        home = await self._fetch(session, website, semaphore)
+        if home is None:
+            return {'emails': emails, 'phones': phones}
+        emails, phones = self.extract_contacts(home, domain)
+        
+        if not emails:
+            pages = self._contact_links(home, website) or [urljoin(website, path) for path in self.CONTACT_PATHS]
+            for url in pages[:self.max_pages - 1]:
+                html = await self._fetch(session, url, semaphore)
+                if html is None:
+                    continue
+                page_emails, page_phones = self.extract_contacts(html, domain)
+                emails += [email for email in page_emails if email not in emails]
+                phones += [phone for phone in page_phones if phone not in phones]
+                if emails:
+                    break
+        return {'emails': emails, 'phones': phones}
+        
+    async def _enrich_all(self, businesses):
+        try:
+            import aiohttp
+        except ImportError:
+            raise RuntimeError("Para visitar os sites dos negócios instale o aiohttp: pip install aiohttp")
+            
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_domain, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        semaphores = defaultdict(lambda: asyncio.Semaphore(self.per_domain))
+        crawls = {}  # domínio -> tarefa em andamento nesta execução
+        
+        async def enrich_one(session, business):
+            domain = self.domain_of(business['website'])
+            if domain in self.cache:
+                self.cache_hits += 1
+            else:
+                if domain not in crawls:
+                    crawls[domain] = asyncio.ensure_future(
+                        self._crawl(session, business['website'], semaphores[domain]))
+                else:
+                    self.cache_hits += 1
+                self.cache[domain] = await crawls[domain]
+            contacts = self.cache[domain]
+            if not business.get('email') and contacts['emails']:
+                business['email'] = contacts['emails'][0]
+            if not business.get('phone') and contacts['phones']:
+                business['phone'] = contacts['phones'][0]
+                
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={'User-Agent': self.USER_AGENT}) as session:
+            await asyncio.gather(*(enrich_one(session, business) for business in businesses))
+            
+    def enrich(self, businesses):
+        """
+        Completa e-mail e telefone (sem substituir os do Maps) dos negócios que têm site
+        
+        Args:
+            businesses (list): Dicionários dos negócios (alterados no lugar)
+            
+        Returns:
+            int: Quantidade de negócios que ganharam e-mail ou telefone
+        """
+        pending = [business for business in businesses
+                   if business.get('website', '').startswith('http')
+                   and not (business.get('email') and business.get('phone'))]
+        if not pending:
+            return 0
+            
+        before = [(business.get('email'), business.get('phone')) for business in pending]
+        fetched, cache_hits = self.fetched, self.cache_hits
+        started = time.time()
+        asyncio.run(self._enrich_all(pending))
+        emails = sum(1 for business, (email, _) in zip(pending, before) if business.get('email') != email)
+        updated = sum(1 for business, contacts in zip(pending, before)
+                      if (business.get('email'), business.get('phone')) != contacts)
+        logger.info("Sites visitados: %s negócios, %s páginas baixadas, %s domínios reaproveitados do cache, "
+                    "%s e-mails encontrados (%.1fs).", len(pending), self.fetched - fetched,
+                    self.cache_hits - cache_hits, emails, time.time() - started)
+        return updated
+        
+    def enrich_file(self, csv_path):
+        """
+        Completa um arquivo de resultados gravado por ResultSink (o CSV e o JSONL correspondente)
+        
+        Args:
+            csv_path (str): Arquivo CSV de saída da busca
+            
+        Returns:
+            int: Quantidade de negócios que ganharam e-mail ou telefone
+        """
+        jsonl_path = os.path.splitext(csv_path)[0] + '.jsonl'
+        if os.path.exists(jsonl_path):
+            with open(jsonl_path, encoding='utf-8') as f:
+                businesses = [json.loads(line) for line in f if line.strip()]
+        else:
+            with open(csv_path, newline='', encoding='utf-8') as f:
+                businesses = list(csv.DictReader(f))
+                
+        updated = self.enrich(businesses)
+        if not updated:
+            return 0
+            
+        # Regravar os dois arquivos de forma atômica
+        temp_path = csv_path + '.tmp'
+        with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=ResultSink.FIELDNAMES, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(businesses)
+        os.replace(temp_path, csv_path)
+        if os.path.exists(jsonl_path):
+            temp_path = jsonl_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for business in businesses:
+                    f.write(json.dumps(business, ensure_ascii=False) + '\n')
+            os.replace(temp_path, jsonl_path)
+        logger.info("%s negócios completados com os dados dos sites em '%s'.", updated, csv_path)
+        return updated
+
+
+# Código do país assumido nos telefones sem código internacional
+DEFAULT_COUNTRY_CODE = '55'
+
+# Parâmetros de URL que só identificam a origem da visita (removidos na forma canônica)
+TRACKING_PARAM_PATTERN = re.compile(r'^(utm_\w+|gclid|fbclid|gbraid|wbraid|msclkid|mc_\w+|srsltid)$', re.IGNORECASE)
+
+# Domínios compartilhados por muitos negócios (redes sociais, construtores de sites): nestes,
+# o domínio sozinho não identifica o negócio e a chave de bloco usa a URL inteira
+SHARED_DOMAINS = ('facebook.com', 'instagram.com', 'wa.me', 'whatsapp.com', 'linktr.ee', 'google.com',
+                  'business.site', 'negocio.site', 'linkedin.com', 'twitter.com', 'x.com', 'tiktok.com',
+                  'youtube.com', 'wixsite.com', 'ifood.com.br', 'booking.com', 'tripadvisor.com.br')
+
+# Abreviações usadas na chave de comparação dos endereços (palavras sem acento)
+ADDRESS_ABBREVIATIONS = {'avenida': 'av', 'rua': 'r', 'rodovia': 'rod', 'estrada': 'estr', 'alameda': 'al',
+                         'travessa': 'tv', 'praca': 'pca', 'largo': 'lgo', 'numero': '', 'n': '', 'no': '', 'o': ''}
+
+# Palavras ignoradas na comparação dos nomes
+NAME_STOPWORDS = {'de', 'da', 'do', 'das', 'dos', 'e', 'a', 'o', 'the', 'and', 'ltda', 'me', 'eireli', 'sa'}
+
+# Coordenadas do marcador do lugar no link da página de detalhes (!3d<lat>!4d<lng>)
+PLACE_COORDINATES_PATTERN = re.compile(r'!3d(-?\d+(?:\.\d+)?)!4d(-?\d+(?:\.\d+)?)')
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def normalize_phone(phone, country_code=DEFAULT_COUNTRY_CODE):
+    """
+    Converte um telefone (texto do botão ou link tel:) para o formato E.164
+    
+    Args:
+        phone (str): Telefone em qualquer formato (ex.: '(11) 3456-7890', 'tel:+55 11 3456-7890')
+        country_code (str): Código do país dos números sem código internacional
+        
+    Returns:
+        str: O telefone em E.164 (ex.: '+551134567890') ou None se não parecer um telefone
+    """
+    if not phone:
+        return None
+    text = unquote(str(phone)).strip()
+    if text.lower().startswith('tel:'):
+        text = text[4:].strip()
+    digits = re.sub(r'\D', '', text)
+    
+    if text.startswith('+'):
+        pass
+    elif text.startswith('00'):
+        digits = digits[2:]
+    else:
+        # Sem o prefixo de discagem nacional (ex.: 011 3456-7890, 0800 ...); números nacionais
+        # brasileiros têm 10 ou 11 dígitos, então algo maior que já começa com o país está completo
+        digits = digits.lstrip('0')
+        if not (len(digits) > 11 and digits.startswith(country_code)):
+            digits = country_code + digits
+            
+    if not 8 <= len(digits) <= 15:
+        return None
+    return '+' + digits
+
+
+def canonicalize_url(url):
+    """
+    Forma canônica de um site: esquema e domínio em minúsculas, sem 'www.', sem fragmento,
+    sem barra final e sem parâmetros de rastreamento
+    
+    Returns:
+        str: A URL canônica ou None se não houver domínio
+    """
+    if not url:
+        return None
+    url = str(url).strip()
+    if not re.match(r'^[a-zA-Z][a-zA-Z0-9+.-]*://', url):
+        url = 'http://' + url
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or '').lower()
+        port = parts.port
+    except ValueError:
+        return None
+    if host.startswith('www.'):
+        host = host[4:]
+    if not host:
+        return None
+        
+    scheme = parts.scheme.lower()
+    netloc = host if port is None or (scheme, port) in (('http', 80), ('https', 443)) else f"{host}:{port}"
+    query = '&'.join(param for param in parts.query.split('&')
+                     if param and not TRACKING_PARAM_PATTERN.match(param.split('=', 1)[0]))
+    path = parts.path.rstrip('/')
+    return f"{scheme}://{netloc}{path}" + (f"?{query}" if query else "")
+
+
+def website_key(url):
+    """
+    Chave de bloco do site: o domínio, ou a URL inteira nos domínios compartilhados (SHARED_DOMAINS)
+    """
+    canonical = canonicalize_url(url)
+    if not canonical:
+        return None
+    host = urlsplit(canonical).hostname
+    if any(host == domain or host.endswith('.' + domain) for domain in SHARED_DOMAINS):
+        return canonical.split('://', 1)[1].lower()
+    return host
+
+
+def canonicalize_address(address):
+    """
+    Limpa um endereço para exibição: espaços e separadores padronizados
+    
+    Returns:
+        str: O endereço limpo ou None se vazio
+    """
+    if not address:
+        return None
+    address = re.sub(r'\s+', ' ', str(address)).strip(' ,;-')
+    address = re.sub(r'\s*,\s*', ', ', address)
+    address = re.sub(r'\s+-\s+', ' - ', address)
+    return address or None
+
+
+def _ascii_words(text):
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii').lower()
+    return re.findall(r'[a-z0-9]+', text)
+
+
+def address_key(address):
+    """
+    Chave de comparação de um endereço: sem acentos, pontuação ou variações de abreviação
+    
+    Ex.: 'Av. Paulista, nº 1000' e 'Avenida Paulista 1000' têm a mesma chave.
+    """
+    if not address:
+        return None
+    words = [ADDRESS_ABBREVIATIONS.get(word, word) for word in _ascii_words(address)]
+    return ' '.join(word for word in words if word) or None
+
+
+def _geohash_cell(lat, lng, precision):
+    """
+    Índices inteiros (linha, coluna) da célula do geohash que contém as coordenadas
+    """
+    lat_bits = 5 * precision // 2
+    lng_bits = 5 * precision - lat_bits
+    lat_index = min(max(int((lat + 90.0) / 180.0 * (1 << lat_bits)), 0), (1 << lat_bits) - 1)
+    lng_index = int((lng + 180.0) / 360.0 * (1 << lng_bits)) % (1 << lng_bits)
+    return lat_index, lng_index
+
+
+def _geohash_string(lat_index, lng_index, precision):
+    # Intercala os bits (longitude primeiro) e converte para base 32
+    lat_bits = 5 * precision // 2
+    lng_bits = 5 * precision - lat_bits
+    value = 0
+    for bit in range(lng_bits - 1, -1, -1):
+        value = (value << 1) | (lng_index >> bit & 1)
+        lat_bit = bit - (lng_bits - lat_bits)
+        if lat_bit >= 0:
+            value = (value << 1) | (lat_index >> lat_bit & 1)
+    return ''.join(GEOHASH_ALPHABET[value >> shift & 31] for shift in range(5 * (precision - 1), -1, -5))
+
+
+def geohash_encode(lat, lng, precision=7):
+    """
+    Geohash das coordenadas (precisão 7 = células de cerca de 150 m)
+    """
+    return _geohash_string(*_geohash_cell(lat, lng, precision), precision)
+
+
+def geohash_neighbors(lat, lng, precision=7):
+    """
+    Geohashes da célula das coordenadas e das 8 células vizinhas
+    
+    Lugares vizinhos podem cair em células diferentes, então a busca de candidatos olha as nove.
+    """
+    lat_index, lng_index = _geohash_cell(lat, lng, precision)
+    lat_limit = (1 << (5 * precision // 2)) - 1
+    lng_count = 1 << (5 * precision - 5 * precision // 2)
+    return {_geohash_string(min(max(lat_index + dlat, 0), lat_limit), (lng_index + dlng) % lng_count, precision)
+            for dlat in (-1, 0, 1) for dlng in (-1, 0, 1)}
+
+
+class PlaceDeduplicator:
+    """
+    Pós-processamento dos resultados: normaliza telefones (E.164), sites e endereços e
+    remove os lugares repetidos entre ladrilhos, buscas e execuções.
+    
+    Os lugares são comparados apenas com os candidatos que compartilham uma chave de bloco
+    (ID do lugar, telefone, domínio do site, endereço ou, se nenhuma destas bastar, geohash da
+    célula e das vizinhas junto com o início do nome), em vez de todos contra todos. O índice de blocos e os lugares ficam em um banco SQLite
+    temporário com cache limitado a `memory_mb`, então arquivos com milhões de linhas são
+    processados em streaming com memória fixa.
+    
+    Dois lugares são o mesmo quando têm o mesmo ID, ou quando ao menos um deles não tem ID e
+    eles têm nomes parecidos, não estão a mais de `max_distance_m` um do outro e compartilham
+    telefone, site, endereço ou estão a menos de `near_m` (dois IDs diferentes são sempre
+    lugares diferentes, como as filiais de uma rede). Os campos vazios do primeiro são
+    completados com os do repetido.
+    """
+    # Candidatos lidos por chave de bloco aproximada: chaves muito comuns (ex.: 0800 de uma rede,
+    # endereço de um shopping) não degradam a busca; a chave do ID é sempre lida inteira
+    MAX_CANDIDATES = 50
+    
+    # Lugares gravados entre cada commit do banco temporário
+    COMMIT_EVERY = 1000
+    
+    def __init__(self, memory_mb=64, country_code=DEFAULT_COUNTRY_CODE, precision=7, name_threshold=0.5,
+                 max_distance_m=500, near_m=50, db_path=None):
+        """
+        Args:
+            memory_mb (int): Cache máximo do banco temporário, em MB
+            country_code (str): Código do país dos telefones sem código internacional
+            precision (int): Precisão do geohash das chaves de bloco
+            name_threshold (float): Semelhança mínima entre os nomes (0 a 1)
+            max_distance_m (float): Distância acima da qual dois lugares nunca são o mesmo (ex.: filiais)
+            near_m (float): Distância abaixo da qual nomes parecidos bastam
+            db_path (str): Arquivo do banco de trabalho (padrão: arquivo temporário, apagado em close)
+        """
+        self.country_code = country_code
+        self.precision = precision
+        self.name_threshold = name_threshold
+        self.max_distance_m = max_distance_m
+        self.near_m = near_m
+        self.rows = 0
+        self.duplicates = 0
+        self.matched_by = defaultdict(int)
+        self._pending = 0
+        
+        self._temporary = db_path is None
+        if self._temporary:
+            handle, db_path = tempfile.mkstemp(prefix='dedupe-', suffix='.db')
+            os.close(handle)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.executescript(f"""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            PRAGMA temp_store = FILE;
+            PRAGMA cache_size = -{int(memory_mb * 1024)};
+            CREATE TABLE IF NOT EXISTS places (id INTEGER PRIMARY KEY, data TEXT NOT NULL, signature TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS blocks (
+                key TEXT NOT NULL,
+                place INTEGER NOT NULL,
+                PRIMARY KEY (key, place)
+            ) WITHOUT ROWID;
+        """)
+        
+    def normalize(self, business):
+        """
+        Normaliza os campos de um negócio
+        
+        Args:
+            business (dict): Dados do negócio
+            
+        Returns:
+            dict: Cópia com o telefone em E.164, o site e o endereço canônicos e as coordenadas
+                  (lidas do link, se faltarem)
+        """
+        business = dict(business)
+        if business.get('phone'):
+            business['phone'] = normalize_phone(business['phone'], self.country_code) or business['phone']
+        if business.get('website'):
+            business['website'] = canonicalize_url(business['website']) or business['website']
+        if business.get('address'):
+            business['address'] = canonicalize_address(business['address'])
+        if business.get('latitude') in (None, '') and business.get('url'):
+            match = PLACE_COORDINATES_PATTERN.search(business['url'])
+            if match:
+                business['latitude'], business['longitude'] = float(match.group(1)), float(match.group(2))
+        return business
+        
+    def _signature(self, business):
+        """
+        Valores usados na comparação e nas chaves de bloco de um negócio normalizado
+        """
+        words = [word for word in _ascii_words(business.get('name') or '') if word not in NAME_STOPWORDS]
+        try:
+            coordinates = [float(business['latitude']), float(business['longitude'])]
+        except (KeyError, TypeError, ValueError):
+            coordinates = None
+        phone = business.get('phone')
+        return {
+            'place_id': business.get('place_id') or None,
+            'phone': phone if phone and phone.startswith('+') else None,
+            'website': website_key(business.get('website')),
+            'address': address_key(business.get('address')),
+            'words': sorted(set(words)),
+            'compact': ''.join(words),
+            'coordinates': coordinates
+        }
+        
+    def _keys(self, signature):
+        """
+        Chaves de bloco exatas de um negócio (ID, telefone, site e endereço)
+        """
+        keys = []
+        if signature['place_id']:
+            keys.append('id:' + signature['place_id'])
+        for prefix in ('phone', 'website', 'address'):
+            if signature[prefix]:
+                keys.append(f"{prefix[0]}:{signature[prefix]}")
+        return keys
+        
+    def _geo_keys(self, signature, neighbors=False):
+        """
+        Chaves de bloco por proximidade: geohash e início do nome (com `neighbors`, também as células vizinhas)
+        """
+        if not signature['coordinates'] or not signature['compact']:
+            return []
+        lat, lng = signature['coordinates']
+        cells = geohash_neighbors(lat, lng, self.precision) if neighbors else {geohash_encode(lat, lng, self.precision)}
+        return [f"g:{cell}:{signature['compact'][:4]}" for cell in cells]
+        
+    def _find_match(self, signature, keys):
+        """
+        Procura, entre os lugares com alguma das chaves de bloco, um igual ao negócio
+        
+        Returns:
+            tuple: (id do lugar, dados do lugar) ou (None, None)
+        """
+        # O ID primeiro e sem limite: um repetido exato nunca fica de fora por causa de uma chave comum
+        for exact in (True, False):
+            candidates = {}
+            for key in keys:
+                if key.startswith('id:') != exact:
+                    continue
+                query = "SELECT place FROM blocks WHERE key = ?" + ("" if exact else " LIMIT ?")
+                arguments = (key,) if exact else (key, self.MAX_CANDIDATES)
+                candidates.update(dict.fromkeys(row[0] for row in self._conn.execute(query, arguments)))
+            candidates = list(candidates)
+            for start in range(0, len(candidates), 500):
+                chunk = candidates[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT id, data, signature FROM places WHERE id IN ({','.join('?' * len(chunk))}) ORDER BY id",
+                    chunk)
+                for place_id, data, existing in rows:
+                    rule = self._match(signature, json.loads(existing))
+                    if rule:
+                        self.matched_by[rule] += 1
+                        return place_id, json.loads(data)
+        return None, None
+        
+    @staticmethod
+    def _name_similarity(a, b):
+        if a['compact'] and a['compact'] == b['compact']:
+            return 1.0
+        words_a, words_b = set(a['words']), set(b['words'])
+        if not words_a or not words_b:
+            return 0.0
+        return len(words_a & words_b) / len(words_a | words_b)
+        
+    def _match(self, a, b):
+        """
+        Indica se dois negócios são o mesmo lugar
+        
+        Returns:
+            str: A regra que identificou o repetido ('place_id', 'phone', 'website', 'address', 'geohash') ou None
+        """
+        if a['place_id'] and a['place_id'] == b['place_id']:
+            return 'place_id'
+        if a['place_id'] and b['place_id']:
+            # IDs diferentes são lugares diferentes, mesmo com telefone e nome iguais (filiais)
+            return None
+        distance = None
+        if a['coordinates'] and b['coordinates']:
+            (lat_a, lng_a), (lat_b, lng_b) = a['coordinates'], b['coordinates']
+            distance = 111320 * math.hypot(lat_a - lat_b, (lng_a - lng_b) * math.cos(math.radians(lat_a)))
+            if distance > self.max_distance_m:
+                return None
+        if self._name_similarity(a, b) < self.name_threshold:
+            return None
+        for field in ('phone', 'website', 'address'):
+            if a[field] and a[field] == b[field]:
+                return field
+        if distance is not None and distance <= self.near_m:
+            return 'geohash'
+        return None
+        
+    def add(self, business):
+        """
+        Normaliza um negócio e o registra, juntando-o ao lugar igual já registrado
+        
+        Args:
+            business (dict): Dados do negócio
+            
+        Returns:
+            bool: True se o negócio é novo, False se era repetido
+        """
+        business = self.normalize(business)
+        signature = self._signature(business)
+        self.rows += 1
+        
+        # Primeiro as chaves exatas; a proximidade só é consultada se elas não acharem o lugar
+        keys = self._keys(signature)
+        match_id, match_data = self._find_match(signature, keys)
+        if match_id is None:
+            match_id, match_data = self._find_match(signature, self._geo_keys(signature, neighbors=True))
+            
+        if match_id is None:
+            cursor = self._conn.execute("INSERT INTO places (data, signature) VALUES (?, ?)",
+                                        (json.dumps(business, ensure_ascii=False), json.dumps(signature)))
+            match_id = cursor.lastrowid
+        else:
+            self.duplicates += 1
+            changed = False
+            for field, value in business.items():
+                if value not in (None, '') and match_data.get(field) in (None, ''):
+                    match_data[field] = value
+                    changed = True
+            if changed:
+                self._conn.execute("UPDATE places SET data = ?, signature = ? WHERE id = ?",
+                                   (json.dumps(match_data, ensure_ascii=False),
+                                    json.dumps(self._signature(match_data)), match_id))
+                                    
+        # As chaves do repetido também apontam para o lugar, para achar as próximas variações
+        self._conn.executemany("INSERT OR IGNORE INTO blocks (key, place) VALUES (?, ?)",
+                               [(key, match_id) for key in keys + self._geo_keys(signature)])
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self._conn.commit()
+            self._pending = 0
+        return match_data is None
+        
+    def iter_unique(self):
+        """
+        Percorre os lugares sem repetição, na ordem em que apareceram
+        
+        Yields:
+            dict: Dados normalizados de cada lugar
+        """
+        self._conn.commit()
+        for (data,) in self._conn.execute("SELECT data FROM places ORDER BY id"):
+            yield json.loads(data)
+            
+    def dedupe(self, businesses):
+        """
+        Normaliza e remove os repetidos de uma lista de negócios (ex.: retorno de search_businesses,
+        antes de export_to_csv)
+        
+        Returns:
+            list: Os negócios sem repetição
+        """
+        for business in businesses:
+            self.add(business)
+        return list(self.iter_unique())
+        
+    def dedupe_files(self, paths, output_path):
+        """
+        Junta, normaliza e remove os repetidos de arquivos gravados por ResultSink
+        
+        Cada arquivo é lido do JSONL correspondente (que também tem as coordenadas), ou do CSV
+        se não houver JSONL. O CSV e o JSONL de saída são gravados de forma atômica, então a
+        saída pode ser um dos próprios arquivos de entrada.
+        
+        Args:
+            paths (list): Arquivos CSV de entrada
+            output_path (str): Arquivo CSV de saída (o JSONL usa o mesmo nome base)
+            
+        Returns:
+            int: Quantidade de lugares gravados
+        """
+        for path in paths:
+            jsonl_path = os.path.splitext(path)[0] + '.jsonl'
+            if os.path.exists(jsonl_path):
+                with open(jsonl_path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            business = json.loads(line)
+                        except ValueError:
+                            continue  # Linha incompleta de uma execução interrompida
+                        self.add(business)
+            else:
+                with open(path, newline='', encoding='utf-8') as f:
+                    for business in csv.DictReader(f):
+                        self.add(business)
+                        
+        jsonl_output = os.path.splitext(output_path)[0] + '.jsonl'
+        count = 0
+        with open(output_path + '.tmp', 'w', newline='', encoding='utf-8') as csv_file, \
+                open(jsonl_output + '.tmp', 'w', encoding='utf-8') as jsonl_file:
+            writer = csv.DictWriter(csv_file, fieldnames=ResultSink.FIELDNAMES, extrasaction='ignore')
+            writer.writeheader()
+            for business in self.iter_unique():
+                writer.writerow(business)
+                jsonl_file.write(json.dumps(business, ensure_ascii=False) + '\n')
+                count += 1
+        os.replace(output_path + '.tmp', output_path)
+        os.replace(jsonl_output + '.tmp', jsonl_output)
+        self.report(output_path)
+        return count
+        
+    def dedupe_file(self, csv_path):
+        """
+        Normaliza e remove os repetidos de um arquivo de resultados, regravando-o
+        
+        Returns:
+            int: Quantidade de lugares gravados
+        """
+        return self.dedupe_files([csv_path], csv_path)
+        
+    def report(self, output_path=None):
+        """
+        Mostra quantos lugares foram lidos, quantos eram repetidos e por qual regra
+        """
+        logger.info("Pós-processamento: %s linhas, %s repetidas removidas%s%s.", self.rows, self.duplicates,
+                    " (" + ", ".join(f"{rule}: {count}" for rule, count in sorted(self.matched_by.items())) + ")"
+                    if self.matched_by else "",
+                    f", {self.rows - self.duplicates} lugares em '{output_path}'" if output_path else "",
+                    extra={'rows': self.rows, 'duplicates': self.duplicates})
+                    
+    def close(self):
+        """
+        Fecha o banco de trabalho (e o apaga, se for temporário)
+        """
+        self._conn.close()
+        if self._temporary:
+            try:
+                os.remove(self.db_path)
+            except OSError:
+                pass
+
+
+def dedupe_results(paths, output_path, memory_mb=64):
+    """
+    Junta arquivos de resultados em um só, normalizado e sem lugares repetidos (ver PlaceDeduplicator)
+    
+    Args:
+        paths (list): Arquivos CSV de entrada (gravados por ResultSink)
+        output_path (str): Arquivo CSV de saída (pode ser um dos de entrada)
+        memory_mb (int): Memória máxima do índice de blocos, em MB
+        
+    Returns:
+        int: Quantidade de lugares gravados
+    """
+    deduplicator = PlaceDeduplicator(memory_mb=memory_mb)
+    try:
+        return deduplicator.dedupe_files(paths, output_path)
+    finally:
+        deduplicator.close()
+
 
 class GoogleMapsSeleniumScraper:
-    def __init__(self, headless=False):
+    # Seletores do nome do negócio dentro de cada cartão da lista de resultados
+    NAME_SELECTORS = [
+        "div.qBF1Pd",       # Seletor antigo
+        "span.fontHeadlineSmall",
+        "div.fontHeadlineSmall",
+        "span.vcAjh",
+        "h3"
+    ]
+    
+    # Seletores dos cartões de resultado (o primeiro presente identifica a lista)
+    RESULT_SELECTORS = [
+        (By.CSS_SELECTOR, "div.Nv2PK"),
+        (By.CSS_SELECTOR, "div.bfdHYd"),
+        (By.CSS_SELECTOR, "div[role='feed'] > div")
+    ]
+    
+    # Seletores do elemento rolável da lista de resultados
+    SCROLLABLE_SELECTORS = [
+        "div[role='feed']",
+        "div.m6QErb[role='region']",
+        "div.m6QErb",
+        "div.section-layout",
+        "div.section-scrollbox"
+    ]
+    
+    # Cascatas de seletores de cada campo da página de detalhes (usadas pelo script e pelo fallback)
+    DETAIL_SELECTORS = {
+        'address': [
+            # Método 1: Botão específico com atributos
+            (By.CSS_SELECTOR, "button[data-item-id^='address'], [data-tooltip='Copiar endereço']"),
+            # Método 2: Botão com texto de endereço
+            (By.XPATH, "//button[contains(@aria-label, 'ndereço')]"),
+            # Método 3: Qualquer elemento com aria-label de endereço
+            (By.CSS_SELECTOR, "[aria-label*='endereço']"),
+            # Método 4: Links com "maps" na URL que podem conter o endereço
+            (By.CSS_SELECTOR, "a[href*='maps']"),
+            # Método 5: Botão com texto que parece um endereço (rua, avenida, etc)
+            (By.XPATH, "//button[contains(text(), 'Rua') or contains(text(), 'Av') or contains(text(), 'Avenida')]")
+        ],
+        'phone': [
+            # Método 1: Botão específico
+            (By.CSS_SELECTOR, "button[data-item-id^='phone'], [data-tooltip='Copiar número de telefone']"),
+            # Método 2: Botão com label de telefone
+            (By.XPATH, "//button[contains(@aria-label, 'elefone')]"),
+            # Método 3: Qualquer elemento com texto que parece telefone
+            (By.XPATH, "//button[contains(text(), '(') and contains(text(), ')')]"),
+            # Método 4: Links com "tel:" na URL
+            (By.CSS_SELECTOR, "a[href^='tel:']")
+        ],
+        'website': [
+            # Método 1: Link específico
+            (By.CSS_SELECTOR, "a[data-item-id^='authority'], [data-tooltip='Abrir website']"),
+            # Método 2: Link com label de site
+            (By.XPATH, "//a[contains(@aria-label, 'site')]"),
+            # Método 3: Link com texto 'website' ou 'site'
+            (By.XPATH, "//a[contains(text(), 'site') or contains(text(), 'Site') or contains(text(), 'Website')]"),
+            # Método 4: Qualquer link externo (não do Google)
+            (By.CSS_SELECTOR, "a:not([href*='google'])")
+        ],
+        'category': [
+            (By.CSS_SELECTOR, "button[jsaction*='category']"),
+            (By.XPATH, "//button[contains(@jsaction, 'category')]"),
+            (By.CSS_SELECTOR, "span.DkEaL, span.mgr77e")
+        ],
+        'email': [
+            (By.CSS_SELECTOR, "a[href^='mailto:']"),
+            (By.XPATH, "//a[contains(@href, 'mailto:')]")
+        ]
+    }
+    
+    # Quantos seletores do fim de cada cascata são genéricos: encontram algum elemento em quase
+    # toda página, então ficam sempre por último (ver SelectorRegistry.ordered)
+    FALLBACK_SELECTORS = {'name': 1, 'results': 1, 'address': 2, 'phone': 2, 'website': 2}
+    
+    # Argumentos extras do Chrome definidos pelas variantes do scraper (ver MultiTabScraper)
+    EXTRA_CHROME_ARGUMENTS = []
+    
+    # Sem estes argumentos o Chrome desacelera as abas que não estão em primeiro plano
+    # (usados pelo prefetch e pelas abas do MultiTabScraper)
+    BACKGROUND_TAB_ARGUMENTS = [
+        "--disable-background-timer-throttling",
+        "--disable-backgrounding-occluded-windows",
+        "--disable-renderer-backgrounding"
+    ]
+    
+    # Endereço do Google Maps (pode ser trocado por um servidor local de testes)
+    MAPS_URL = "https://www.google.com/maps"
+    
+    # Cookies que indicam que o aviso de consentimento do Google já foi aceito
+    CONSENT_COOKIES = ('SOCS', 'CONSENT')
+    
+    # Recursos bloqueados no perfil "lean": só lemos texto da lista e do painel de detalhes,
+    # então imagens, mapas, fontes, mídia e analytics são dispensáveis. As requisições de
+    # dados do Maps (search?tbm=map, preview/place, scripts /maps/_/js) continuam liberadas.
+    LEAN_BLOCKED_URLS = [
+        # Imagens e fotos
+        "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.ico*",
+        "*googleusercontent.com/*", "*ggpht.com/*", "*streetviewpixels*",
+        # Ladrilhos do mapa, vista de satélite e 3D
+        "*/maps/vt*", "*/kh/v=*", "*/maps/rt/*", "*/maps/photometa/*",
+        # Fontes
+        "*fonts.gstatic.com/*", "*.woff*", "*.ttf*",
+        # Mídia
+        "*.mp4*", "*.webm*",
+        # Analytics e registros
+        "*google-analytics.com/*", "*googletagmanager.com/*", "*doubleclick.net/*",
+        "*/gen_204*", "*/log?*", "*/maps/preview/log204*"
+    ]
+    
+    def __init__(self, headless=False, wait_budgets=None, user_data_dir=None, lean=False, network_stats=False,
+                 maps_url=None, metrics_path=None, selectors=None, backend='dom', max_pages=0, max_rss_mb=0,
+                 start_rate=0.5, max_rate=3.0, prefetch=0, search_cache=None, max_attempts=3, launch=True):
+        """
+        Inicializa o scraper com o Selenium.
+        
+        Args:
+            headless (bool): Se True, o navegador rodará em modo "headless" (sem interface gráfica).
+            wait_budgets (dict): Tempo máximo de espera por fase (ver WaitEngine.DEFAULT_BUDGETS)
+            user_data_dir (str): Pasta de perfil persistente do Chrome; mantém o cookie de
+                                 consentimento e o cache entre execuções (início "quente")
+            lean (bool): Bloqueia imagens, mapas, fontes, mídia e analytics (ver LEAN_BLOCKED_URLS)
+            network_stats (bool): Coleta estatísticas de rede (sempre ativo no modo lean)
+            maps_url (str): Endereço do Google Maps (padrão: MAPS_URL); usado pelo benchmark offline
+            metrics_path (str): Arquivo onde as métricas de cada busca são gravadas (.prom = Prometheus, senão JSON)
+            selectors (SelectorRegistry): Estatísticas dos seletores, que definem a ordem das cascatas
+                                          (padrão: apenas em memória)
+            backend (str): 'dom' lê os dados das páginas de detalhes; 'xhr' lê os lugares das respostas
+                           internas da lista de resultados e só abre a página de detalhes dos que faltarem
+            max_pages (int): Recicla o navegador após esta quantidade de páginas (0 = nunca)
+            max_rss_mb (float): Recicla o navegador quando a memória dele passa deste valor em MB
+                                (0 = nunca; requer psutil)
+            start_rate (float): Taxa inicial de páginas por segundo; ajustada durante a execução (ver RateController)
+            max_rate (float): Maior taxa de páginas por segundo
+            prefetch (int): Páginas de detalhes seguintes carregadas em abas de fundo enquanto a
+                            atual é extraída (modo 'links', ladrilhos e atualização; 0 = desligado)
+            search_cache (SearchCache): Cache das listas de resultados; uma busca repetida dentro da
+                                        validade pula a abertura da busca e a rolagem da lista
+            max_attempts (int): Tentativas de cada lugar cuja extração falhar (ver RetryQueue)
+            launch (bool): Abre o navegador; False só guarda a configuração e os contadores, para
+                           coordenar navegadores auxiliares (ladrilhos com `workers` > 1)
+        """
+        self.headless = headless
+        self.wait_budgets = wait_budgets
+        self.user_data_dir = user_data_dir
+        self.lean = lean
+        self.backend = backend
+        self.network_stats = network_stats or lean or backend == 'xhr'
+        self.maps_url = (maps_url or self.MAPS_URL).rstrip('/')
+        self.metrics_path = metrics_path
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.watchdog = BrowserWatchdog(max_pages, max_rss_mb) if max_pages or max_rss_mb else None
+        self.start_rate = start_rate
+        self.max_rate = max_rate
+        self.rate = RateController(start_rate, max_rate=max_rate)
+        self.max_attempts = max_attempts
+        self.retries = RetryQueue(max_attempts)
+        self._blocked = None
+        self._rotate_pending = False
+        self.prefetch = max(0, prefetch)
+        self.search_cache = search_cache
+        self._list_ended = False  # A última rolagem chegou ao fim da lista (ver _iter_scroll_results)
+        self._prefetched = {}  # URL -> aba (window handle) em que a página já está carregando
+        self._known_handles = None
+        self._paid_ahead = 0  # Páginas abertas pelo prefetch cuja pausa já foi feita (ver _pace)
+        self.metrics = Metrics()
+        self.selectors = selectors or SelectorRegistry()
+        self._cookies_checked = False
+        self._last_detail_title = None
+        self._last_detail_key = None
+        self.last_error = None
+        
+        # Configurar opções do Chrome
+        chrome_options = Options()
+        if headless:
+            chrome_options.add_argument("--headless")
+        
+        chrome_options.add_argument("--window-size=1920,1080")
+        chrome_options.add_argument("--disable-notifications")
+        chrome_options.add_argument("--disable-infobars")
+        chrome_options.add_argument("--start-maximized")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--no-sandbox")
+        for argument in self.EXTRA_CHROME_ARGUMENTS:
+            chrome_options.add_argument(argument)
+        if self.prefetch:
+            # As abas de fundo do prefetch são abertas por script, sem gesto do usuário
+            for argument in self.BACKGROUND_TAB_ARGUMENTS + ["--disable-popup-blocking"]:
+                if argument not in self.EXTRA_CHROME_ARGUMENTS:
+                    chrome_options.add_argument(argument)
+        
+        # Adicionar user-agent para parecer mais humano
+        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                                    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36")
+        
+        # Desativar detecção de automação
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+        
+        if lean:
+            # Sem imagens nem no renderizador, além do bloqueio por URL feito após iniciar
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+            
+        if self.network_stats:
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+            chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+        
+        # Perfil persistente: um perfil já usado guarda o consentimento de cookies e o cache do Maps
+        self.warm_start = False
+        if user_data_dir:
+            self.warm_start = os.path.isdir(user_data_dir) and bool(os.listdir(user_data_dir))
+            os.makedirs(user_data_dir, exist_ok=True)
+            chrome_options.add_argument(f"--user-data-dir={os.path.abspath(user_data_dir)}")
+            
+        self._chrome_options = chrome_options
+        self.driver = None
+        self.startup_seconds = 0.0
+        if launch:
+            self._launch_browser()
+        self.waits = WaitEngine(self.driver, wait_budgets)
+        self.commands = CommandCounter(self.driver)
+        self.network = NetworkStats(self.driver) if self.network_stats else None
+        self.capture = None
+        if backend == 'xhr':
+            self.capture = XhrCapture(self.driver)
+            self.network.listeners.append(self.capture.on_network_event)
+            
+        if lean and self.driver:
+            self._block_resources()
+            
+    def _launch_browser(self):
+        """
+        Inicia o Chrome com as opções montadas no construtor (também usado ao reciclar o navegador)
+        """
+        logger.info("Inicializando o navegador Chrome...")
+        startup_start = time.time()
+        
+        try:
+            # Tentar encontrar o driver do Chrome (chromedriver)
+            try:
+                self.driver = webdriver.Chrome(options=self._chrome_options)
+                logger.info("Chrome inicializado com sucesso!")
+            except Exception as e:
+                logger.warning("Erro ao iniciar o Chrome: %s", e)
+                logger.info("Tentando encontrar o chromedriver no PATH...")
+                
+                # Tente especificar o caminho para o chromedriver
+                service = Service('./chromedriver')  # Ajuste o caminho conforme necessário
+                self.driver = webdriver.Chrome(service=service, options=self._chrome_options)
+                logger.info("Chrome inicializado com serviço personalizado!")
+                
+        except Exception as e:
+            logger.error("Erro ao inicializar o Chrome: %s", e)
+            logger.error("Você precisa ter o Chrome e o chromedriver instalados.")
+            logger.error("Baixe o chromedriver em: https://chromedriver.chromium.org/downloads")
+            logger.error("Certifique-se de baixar a versão compatível com seu Chrome.")
+            logger.error("Coloque o chromedriver no mesmo diretório deste script ou adicione-o ao PATH.")
+            raise e
+            
+        self.startup_seconds = time.time() - startup_start
+        logger.info("Chrome pronto em %.1fs (início %s%s).",
+                    self.startup_seconds, 'quente' if self.warm_start else 'frio',
+                    ', perfil: ' + self.user_data_dir if self.user_data_dir else '')
+        
+        # Sem espera implícita: todas as esperas são explícitas (ver WaitEngine)
+        self.driver.implicitly_wait(0)
+        
+    def _recycle_if_needed(self):
+        """
+        Recicla o navegador se o BrowserWatchdog indicar que ele passou dos limites, ou troca
+        de sessão (navegador novo e sem cookies) após bloqueios seguidos
+        
+        Returns:
+            bool: True se o navegador foi reciclado
+        """
+        if self._rotate_pending:
+            reason = "bloqueios seguidos, nova sessão"
+        elif self.watchdog:
+            reason = self.watchdog.recycle_reason(self.driver)
+        else:
+            reason = None
+        if not reason:
+            return False
+            
+        logger.info("♻ Reciclando o navegador (%s)...", reason)
+        if self.network:
+            self.network.collect()
+        if self._rotate_pending:
+            # Com perfil persistente os cookies sobreviveriam ao novo navegador
+            try:
+                self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception as e:
+                logger.warning("Erro ao apagar os cookies: %s", e)
+            self._rotate_pending = False
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning("Erro ao fechar o navegador: %s", e)
+            
+        self._launch_browser()
+        self.commands.attach(self.driver)
+        self.waits.driver = self.driver
+        if self.network:
+            self.network.driver = self.driver
+        if self.capture:
+            self.capture.driver = self.driver
+        self._cookies_checked = False
+        self._last_detail_title = None
+        self._last_detail_key = None
+        self._prefetched = {}
+        self._known_handles = None
+        self._paid_ahead = 0
+        if self.lean:
+            self._block_resources()
+        if self.watchdog:
+            self.watchdog.recycled()
+        return True
+    
+    def search_businesses(self, query, region, max_results=0, mode="click", sink=None, store=None):
+        """
+        Pesquisa empresas no Google Maps com base na consulta e região.
+        
+        Args:
+            query (str): O tipo de negócio a ser pesquisado (ex: 'autoescola')
+            region (str): A região para buscar (ex: 'São Paulo, SP')
+            max_results (int): Número máximo de resultados a coletar (0 ou negativo = sem limite)
+            mode (str): 'click' clica em cada cartão e volta para a lista;
+                        'links' coleta os links de todos os cartões uma única vez e abre cada página diretamente;
+                        'list' só lê os dados que os cartões da lista mostram, sem abrir nenhuma página de detalhes
+            sink (ResultSink): Se informado, cada negócio é gravado assim que extraído e os lugares
+                               já processados em uma execução anterior são pulados
+            store (PlaceStore): Se informado, lugares extraídos dentro da validade são reaproveitados
+                                sem abrir a página de detalhes, e os novos são gravados nele
+            
+        Returns:
+            list: Uma lista de dicionários com os dados das empresas (vazia com `sink`: os negócios
+                  ficam só nos arquivos, para a memória não crescer em execuções longas)
+        """
+        results = []
+        search_term = f"{query} {region}"
+        
+        logger.info("Buscando por: %s", search_term)
+        self.waits.reset()
+        self.commands.reset()
+        self.metrics.reset()
+        self.last_error = None
+        if self.network:
+            self.network.collect()
+            self.network.reset()
+        if self.capture:
+            self.capture.reset()
+        self.rate.reset()
+        self.retries.reset()
+        
+        try:
+            # Os modos 'links' e 'list' só precisam dos links: uma busca repetida vem do cache de buscas
+            links = self._cached_links(search_term, max_results, details=mode == "list") if mode != "click" else None
+            if links is None:
+                started = time.time()
+                result_selector = self._open_search(search_term)
+                if not result_selector:
+                    return results
+            
+                # Rolar até atingir a quantidade desejada ou o fim da lista
+                links = self._scroll_results(result_selector, max_results, details=mode == "list")
+                if mode != "click":
+                    self._cache_links(search_term, links, max_results, mode == "list", started)
+            
+            # Modo lista: os dados dos cartões já vieram com os links, na mesma chamada de cada rolagem
+            if mode == "list":
+                logger.info("Encontrados %s resultados.", len(links))
+                for link in links:
+                    if sink and sink.is_processed(link['place_id']):
+                        continue
+                    # Sem a página de detalhes faltam site e e-mail, então o banco só registra a busca
+                    self._save_business(self._card_business(link), results, sink, store, search_term,
+                                        extracted=False)
+                self._report_run()
+                return results
+            
+            # Modo por links: sem voltar para a lista nem reencontrar os cartões a cada negócio
+            if mode == "links":
+                logger.info("Encontrados %s resultados.", len(links))
+                
+                for index, link in enumerate(links):
+                    if sink and sink.is_processed(link['place_id']):
+                        continue
+                        
+                    cached = store.get_fresh(link['place_id']) if store else None
+                    if cached:
+                        logger.info("Reaproveitando dados recentes de: %s", cached.get('name') or link['name'])
+                        self._save_business(cached, results, sink, store, search_term, extracted=False)
+                        continue
+                        
+                    captured = self._captured_business(link)
+                    if captured:
+                        self._save_business(captured, results, sink, store, search_term)
+                        continue
+                        
+                    logger.info("Processando negócio %s/%s: %s", index+1, len(links), link['name'])
+                    self._extract_and_save(link, results, sink, store, search_term,
+                                           upcoming=self._upcoming_links(links, index, sink))
+                        
+                    # Pausa entre negócios para evitar detecção
+                    self._pace()
+                    
+                self._close_prefetched()
+                self._drain_retries(results, sink, store, search_term)
+                self._report_run()
+                return results
+            
+            # Coletar todos os resultados de negócios usando o seletor identificado
+            business_elements = self.driver.find_elements(By.CSS_SELECTOR, result_selector)
+            logger.info("Encontrados %s resultados.", len(business_elements))
+            
+            # Se max_results > 0, limitar o número de resultados para processamento
+            if max_results > 0:
+                business_elements = business_elements[:max_results]
+            
+            # Para cada resultado, extrair informações básicas e detalhes
+            # (pela posição: a lista é reobtida após voltar dos detalhes ou reciclar o navegador)
+            total = len(business_elements)
+            for index in range(total):
+                if index >= len(business_elements):
+                    break
+                element = business_elements[index]
+                # Criar um dicionário para armazenar informações do negócio
+                business = {}
+                try:
+                    failure = None
+                    error = None
+                    
+                    # Tentar obter o nome do negócio usando diferentes seletores
+                    name_element = self._find_element_with_multiple_selectors(element, [
+                        (By.CSS_SELECTOR, selector) for selector in self._ordered_selectors('name')
+                    ], field='name')
+                    
+                    if name_element:
+                        business['name'] = name_element.text.strip()
+                        logger.info("Processando negócio %s/%s: %s",
+                                    index+1, len(business_elements), business['name'])
+                        
+                        # Tentar obter URL para a página de detalhes (isso pode mudar no futuro)
+                        try:
+                            # Tentar encontrar o elemento clicável que vai para os detalhes
+                            clickable_element = self._find_element_with_multiple_selectors(element, [
+                                (By.CSS_SELECTOR, "a"),                # Qualquer link dentro do elemento
+                                (By.CSS_SELECTOR, "div[role='button']"),
+                                (By.CSS_SELECTOR, "div[jsaction*='placeCard']"),
+                                (By.CSS_SELECTOR, "div[jsaction*='click']")
+                            ])
+                            
+                            if clickable_element:
+                                # Pular lugares já gravados em uma execução anterior
+                                place_url = clickable_element.get_attribute('href')
+                                if place_url:
+                                    business['url'] = place_url
+                                    business['place_id'] = extract_place_id(place_url)
+                                if sink and sink.is_processed(business.get('place_id')):
+                                    logger.info("Já processado anteriormente: %s", business['name'])
+                                    continue
+                                    
+                                cached = store.get_fresh(business.get('place_id')) if store else None
+                                if cached:
+                                    logger.info("Reaproveitando dados recentes de: %s", business['name'])
+                                    self._save_business(cached, results, sink, store, search_term, extracted=False)
+                                    continue
+                                    
+                                captured = self._captured_business(business)
+                                if captured:
+                                    self._save_business(captured, results, sink, store, search_term)
+                                    continue
+                                    
+                                # Tentar clicar com diferentes abordagens
+                                clicked = self._try_click_element(clickable_element)
+                                
+                                if clicked:
+                                    if self.watchdog:
+                                        self.watchdog.page_opened()
+                                        
+                                    # Extrair detalhes da página de detalhes (aguarda o painel carregar)
+                                    self._blocked = None
+                                    business_details = self._extract_business_details()
+                                    business.update(business_details)
+                                    
+                                    # Voltar para a lista de resultados (aguarda a lista reaparecer)
+                                    back = self._go_back_to_results()
+                                    
+                                    # Reciclar o navegador se passou dos limites; depois de reciclar, ou se não deu
+                                    # para voltar, refazer a busca até a mesma posição da lista
+                                    if self._recycle_if_needed() or not back:
+                                        result_selector = self._restore_results(search_term, total) or result_selector
+                                    
+                                    # Atualizar a lista de elementos se necessário (para evitar StaleElementReferenceException)
+                                    if index < len(business_elements) - 1:
+                                        try:
+                                            # Reobter os elementos se eles estiverem obsoletos
+                                            business_elements = self.driver.find_elements(By.CSS_SELECTOR, result_selector)
+                                        except Exception as e:
+                                            logger.warning("Erro ao reatualizar lista de resultados: %s", e)
+                                else:
+                                    logger.warning("⚠ Não foi possível clicar no elemento para: %s",
+                                                   business['name'])
+                                    failure = 'click'
+                            else:
+                                logger.warning("⚠ Não foi encontrado elemento clicável para: %s", business['name'])
+                                failure = 'click'
+                                
+                        except Exception as e:
+                            logger.warning("Erro ao obter detalhes para %s: %s", business['name'], e)
+                            error = e
+                    else:
+                        logger.warning("⚠ Não foi possível obter o nome para o resultado %s", index+1)
+                        continue
+                    
+                    # Gravar o negócio, ou abri-lo de novo pelo link ao final da busca
+                    link = self._card_link(business, business_elements, index)
+                    if failure:
+                        self._retry_later(link, failure)
+                    else:
+                        self._finish_place(link, business, results, sink, store, search_term, error=error,
+                                           blocked=self._blocked)
+                    
+                except StaleElementReferenceException as e:
+                    logger.warning("Elemento ficou obsoleto, tentando recarregar os resultados...")
+                    # Recarregar os elementos
+                    business_elements = self.driver.find_elements(By.CSS_SELECTOR, result_selector)
+                    # O cartão vai para a fila de novas tentativas, para ser aberto pelo link
+                    self._retry_later(self._card_link(business, business_elements, index), 'stale', e)
+                    continue
+                except Exception as e:
+                    logger.warning("Erro ao processar resultado %s: %s", index+1, e)
+                    self._retry_later(self._card_link(business, business_elements, index), RetryQueue.classify(e), e)
+                    
+                # Pausa entre negócios para evitar detecção
+                self._pace()
+            
+        except Exception as e:
+            logger.error("Erro durante a pesquisa: %s", e)
+            self.last_error = e
+        
+        self._close_prefetched()
+        self._drain_retries(results, sink, store, search_term)
+        self._report_run()
+        return results
+        
+    def search_businesses_parallel(self, query, region, max_results=0, workers=4, sink=None, store=None):
+        """
+        Pesquisa empresas distribuindo a extração dos detalhes entre vários navegadores.
+        
+        Este navegador rola a lista de resultados; um pool de `workers` instâncias do
+        Chrome abre as páginas de detalhes diretamente pelo link e extrai os dados em paralelo.
+        A extração começa assim que os primeiros cartões aparecem, enquanto a rolagem continua.
+        
+        Args:
+            query (str): O tipo de negócio a ser pesquisado (ex: 'autoescola')
+            region (str): A região para buscar (ex: 'São Paulo, SP')
+            max_results (int): Número máximo de resultados a coletar (0 ou negativo = sem limite)
+            workers (int): Número de navegadores extraindo detalhes simultaneamente
+            sink (ResultSink): Se informado, cada negócio é gravado assim que extraído e os lugares
+                               já processados em uma execução anterior são pulados
+            store (PlaceStore): Se informado, lugares extraídos dentro da validade são reaproveitados
+                                sem abrir a página de detalhes, e os novos são gravados nele
+            
+        Returns:
+            list: Uma lista de dicionários com os dados das empresas, na ordem da lista de resultados
+                  (vazia com `sink`, como em search_businesses)
+        """
+        search_term = f"{query} {region}"
+        
+        logger.info("Buscando por: %s (modo paralelo com %s navegadores)", search_term, workers)
+        self.waits.reset()
+        self.commands.reset()
+        self.metrics.reset()
+        self.last_error = None
+        if self.network:
+            self.network.collect()
+            self.network.reset()
+        if self.capture:
+            self.capture.reset()
+        self.rate.reset()
+        self.retries.reset()
+        
+        # Uma busca repetida vem do cache de buscas, sem abrir a página nem rolar a lista
+        started = time.time()
+        cached_links = self._cached_links(search_term, max_results)
+        try:
+            result_selector = self._open_search(search_term) if cached_links is None else None
+            if cached_links is None and not result_selector:
+                return []
+        except Exception as e:
+            logger.error("Erro durante a pesquisa: %s", e)
+            self.last_error = e
+            return []
+            
+        results = {}
+        pool_scrapers = []
+        pool_lock = threading.Lock()
+        local = threading.local()
+        
+        def process(index, link):
+            # Cada thread do pool usa o seu próprio navegador
+            scraper = getattr(local, 'scraper', None)
+            if scraper is None:
+                with pool_lock:
+                    worker_index = len(pool_scrapers) + 1
+                    pool_scrapers.append(None)
+                scraper = self._spawn_worker(worker_index)
+                with pool_lock:
+                    pool_scrapers[worker_index - 1] = scraper
+                local.scraper = scraper
+                
+            logger.info("Processando negócio %s: %s", index+1, link['name'])
+            business = scraper._extract_place_from_url(link)
+            return index, business, scraper._blocked
+            
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                # Enviar os cartões ao pool à medida que a rolagem os carrega
+                futures = {}
+                position = 0
+                try:
+                    harvested = []
+                    batches = ([cached_links] if cached_links is not None
+                               else self._iter_scroll_results(result_selector, max_results))
+                    for batch in batches:
+                        harvested.extend(batch)
+                        for link in batch:
+                            if sink and sink.is_processed(link['place_id']):
+                                continue
+                                
+                            cached = store.get_fresh(link['place_id']) if store else None
+                            captured = None if cached else self._captured_business(link)
+                            if cached:
+                                if sink is None:
+                                    results[position] = cached
+                                self._save_business(cached, None, sink, store, search_term, extracted=False)
+                            elif captured:
+                                if sink is None:
+                                    results[position] = captured
+                                self._save_business(captured, None, sink, store, search_term)
+                            else:
+                                futures[executor.submit(process, position, link)] = link
+                            position += 1
+                    if cached_links is None:
+                        self._cache_links(search_term, harvested, max_results, started=started)
+                except Exception as e:
+                    logger.error("Erro durante rolagem: %s", e)
+                    
+                logger.info("Encontrados %s resultados (%s páginas de detalhes a abrir).", position, len(futures))
+                
+                for future in as_completed(futures):
+                    link = futures[future]
+                    try:
+                        index, business, blocked = future.result()
+                    except Exception as e:
+                        logger.error("Erro em um navegador do pool: %s", e)
+                        self._finish_place(link, None, None, sink, store, search_term, error=e)
+                        continue
+                    if self._finish_place(link, business, None, sink, store, search_term, blocked=blocked):
+                        if sink is None:
+                            results[index] = business
+        finally:
+            for scraper in filter(None, pool_scrapers):
+                self.waits.merge(scraper.waits)
+                self.commands.merge(scraper.commands)
+                self.metrics.merge(scraper.metrics)
+                if self.network and scraper.network:
+                    scraper.network.collect()
+                    self.network.merge(scraper.network)
+                if self.capture and scraper.capture:
+                    self.capture.merge(scraper.capture)
+                self.rate.merge(scraper.rate)
+                self.retries.merge(scraper.retries)
+                try:
+                    scraper.close()
+                except Exception:
+                    pass
+                    
+        # As novas tentativas usam este navegador, livre desde o fim da rolagem
+        recovered = []
+        self._drain_retries(recovered, sink, store, search_term)
+        self._report_run()
+        return [results[index] for index in sorted(results) if results[index]] + recovered
+        
+    def search_region_tiles(self, query, bounds, grid=3, max_depth=2, saturation=100, workers=1,
+                            sink=None, store=None):
+        """
+        Pesquisa uma área dividida em ladrilhos, contornando o limite de resultados por busca.
+        
+        Cada ladrilho é uma busca independente centralizada nele (URL @lat,lng,zoom). Um
+        ladrilho cuja lista chega a `saturation` resultados provavelmente foi cortado pelo
+        Maps e é subdividido em quatro, até `max_depth` níveis. Os lugares são deduplicados
+        pelo ID entre todos os ladrilhos.
+        
+        Args:
+            query (str): O tipo de negócio a ser pesquisado
+            bounds (tuple): Área (sul, oeste, norte, leste); ver bounds_around para centro + raio
+            grid (int): Linhas e colunas da grade inicial
+            max_depth (int): Máximo de subdivisões de um ladrilho saturado
+            saturation (int): Quantidade de resultados a partir da qual o ladrilho é subdividido
+            workers (int): Ladrilhos processados em paralelo, cada um em seu navegador
+            sink (ResultSink): Saída em streaming
+            store (PlaceStore): Banco de lugares
+            
+        Returns:
+            list: Negócios de todos os ladrilhos, sem duplicatas (vazia com `sink`, como em search_businesses)
+        """
+        tiles = plan_tiles(bounds, grid)
+        logger.info("Buscando por: %s em %s ladrilhos (até %s subdivisões)", query, len(tiles), max_depth)
+        self.waits.reset()
+        self.commands.reset()
+        self.metrics.reset()
+        self.last_error = None
+        if self.network:
+            self.network.collect()
+            self.network.reset()
+        if self.capture:
+            self.capture.reset()
+        self.rate.reset()
+        self.retries.reset()
+        
+        seen = set()
+        seen_lock = threading.Lock()
+        
+        def claim(place_id):
+            # Cada lugar é extraído por um único ladrilho
+            with seen_lock:
+                if place_id in seen:
+                    return False
+                seen.add(place_id)
+                return True
+                
+        pool_scrapers = []
+        local = threading.local()
+        
+        def run_tile(tile):
+            scraper = self
+            if workers > 1:
+                scraper = getattr(local, 'scraper', None)
+                if scraper is None:
+                    with seen_lock:
+                        worker_index = len(pool_scrapers) + 1
+                        pool_scrapers.append(None)
+                    scraper = self._spawn_worker(worker_index)
+                    with seen_lock:
+                        pool_scrapers[worker_index - 1] = scraper
+                    local.scraper = scraper
+                    
+            businesses, found = scraper.search_tile(query, tile, claim=claim, sink=sink, store=store)
+            if found >= saturation and tile['depth'] < max_depth:
+                logger.info("Ladrilho saturado (%s resultados); subdividindo...", found)
+                return businesses, split_tile(tile)
+            return businesses, []
+            
+        results = []
+        tiles_done = 0
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                pending = {executor.submit(run_tile, tile) for tile in tiles}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        tiles_done += 1
+                        try:
+                            businesses, children = future.result()
+                        except Exception as e:
+                            logger.error("Erro ao processar ladrilho: %s", e)
+                            self.last_error = e
+                            continue
+                        results.extend(businesses)
+                        pending.update(executor.submit(run_tile, child) for child in children)
+        finally:
+            for scraper in filter(None, pool_scrapers):
+                self.waits.merge(scraper.waits)
+                self.commands.merge(scraper.commands)
+                self.metrics.merge(scraper.metrics)
+                if self.network and scraper.network:
+                    scraper.network.collect()
+                    self.network.merge(scraper.network)
+                if self.capture and scraper.capture:
+                    self.capture.merge(scraper.capture)
+                self.rate.merge(scraper.rate)
+                self.retries.merge(scraper.retries)
+                try:
+                    scraper.close()
+                except Exception:
+                    pass
+                    
+        # Com `sink` os negócios não ficam em `results`; o total único é o do arquivo de saída
+        unique = sink.count if sink else len(results)
+        logger.info("%s ladrilhos processados, %s lugares únicos.", tiles_done, unique)
+        self._report_run()
+        return results
+        
+    def search_tile(self, query, tile, max_results=0, claim=None, sink=None, store=None):
+        """
+        Pesquisa dentro de um ladrilho e extrai os lugares que ainda não foram vistos.
+        
+        É a unidade de trabalho independente do modo por ladrilhos e pode ser enviada
+        a qualquer executor (um navegador por thread/processo).
+        
+        Args:
+            query (str): O tipo de negócio a ser pesquisado
+            tile (dict): Ladrilho (ver plan_tiles)
+            max_results (int): Número máximo de resultados do ladrilho (0 = sem limite)
+            claim: Função que recebe o ID do lugar e retorna False se ele já foi visto em outro ladrilho
+            sink (ResultSink): Saída em streaming
+            store (PlaceStore): Banco de lugares
+            
+        Returns:
+            tuple: (negócios extraídos (vazio com `sink`), quantidade de resultados encontrados no ladrilho)
+        """
+        url = tile_search_url(query, tile, maps_url=self.maps_url)
+        search_term = f"{query} @{tile['south']:.4f},{tile['west']:.4f},{tile['north']:.4f},{tile['east']:.4f}"
+        
+        links = self._cached_links(search_term, max_results)
+        if links is None:
+            started = time.time()
+            result_selector = self._open_search(query, url=url)
+            if not result_selector:
+                return [], 0
+            links = self._scroll_results(result_selector, max_results)
+            self._cache_links(search_term, links, max_results, started=started)
+        
+        results = []
+        for index, link in enumerate(links):
+            if claim and not claim(link['place_id']):
+                continue
+            if sink and sink.is_processed(link['place_id']):
+                continue
+                
+            cached = store.get_fresh(link['place_id']) if store else None
+            if cached:
+                self._save_business(cached, results, sink, store, search_term, extracted=False)
+                continue
+                
+            captured = self._captured_business(link)
+            if captured:
+                self._save_business(captured, results, sink, store, search_term)
+                continue
+                
+            logger.info("Processando negócio: %s", link['name'])
+            self._extract_and_save(link, results, sink, store, search_term,
+                                   upcoming=self._upcoming_links(links, index, sink))
+                
+            # Pausa entre negócios para evitar detecção
+            self._pace()
+            
+        self._close_prefetched()
+        self._drain_retries(results, sink, store, search_term)
+            
+        return results, len(links)
+        
+    def _save_business(self, business, results, sink=None, store=None, search_term=None, extracted=True):
+        """
+        Registra um negócio na lista de resultados, no arquivo de saída e no banco de lugares
+        
+        Args:
+            business (dict): Dados do negócio
+            results (list): Lista de resultados da busca (None para não acumular; com `sink`
+                            o negócio também não é acumulado, para a memória não crescer)
+            sink (ResultSink): Saída em streaming
+            store (PlaceStore): Banco de lugares
+            search_term (str): Busca em que o negócio foi encontrado
+            extracted (bool): False quando os dados vieram do banco de lugares
+        """
+        if not business:
+            return
+        if results is not None and sink is None:
+            results.append(business)
+        if sink:
+            sink.write(business)
+        if store:
+            # Lugares só com o nome (ex.: falha ao abrir os detalhes) não contam como extraídos
+            if extracted and set(business) - {'name', 'place_id', 'url'}:
+                store.save(business, search_term)
+            else:
+                store.record_search(business.get('place_id'), search_term)
+                
+    def _extract_and_save(self, link, results, sink=None, store=None, search_term=None, upcoming=None):
+        """
+        Abre a página de detalhes pelo link e grava o negócio, ou coloca o lugar na fila de novas tentativas
+        
+        Returns:
+            bool: True se o negócio foi gravado
+        """
+        try:
+            business = self._extract_place_from_url(link, upcoming)
+        except Exception as e:
+            return self._finish_place(link, None, results, sink, store, search_term, error=e)
+        return self._finish_place(link, business, results, sink, store, search_term, blocked=self._blocked)
+        
+    def _finish_place(self, link, business, results, sink=None, store=None, search_term=None, error=None,
+                      blocked=None):
+        """
+        Grava um negócio extraído ou, se a extração falhou, coloca o lugar na fila de novas tentativas
+        
+        Lugares que falham em todas as tentativas não são gravados: com `--resume`, só eles são tentados de novo.
+        
+        Args:
+            link (dict): Dicionário com 'name', 'url' e 'place_id' do resultado
+            business (dict): Dados obtidos (None se a extração gerou um erro)
+            results (list): Lista de resultados da busca (ver _save_business)
+            sink (ResultSink): Saída em streaming
+            store (PlaceStore): Banco de lugares
+            search_term (str): Busca em que o negócio foi encontrado
+            error (Exception): Erro da extração
+            blocked (str): Bloqueio detectado na página (ver _check_block)
+            
+        Returns:
+            bool: True se o negócio foi gravado
+        """
+        kind = RetryQueue.classify(error, business, blocked)
+        if kind is None:
+            self.retries.success(link)
+            self._save_business(business, results, sink, store, search_term)
+            return True
+        self._retry_later(link, kind, error)
+        return False
+        
+    def _retry_later(self, link, kind, error=None):
+        """
+        Coloca um lugar que falhou na fila de novas tentativas (ver RetryQueue)
+        """
+        reason = f"{kind}: {error}" if error else kind
+        if self.retries.push(link, kind):
+            logger.warning("⚠ Falha ao extrair %s (%s); nova tentativa ao final da busca.", link.get('name'), reason)
+        else:
+            logger.warning("✗ %s perdido (%s).", link.get('name') or link.get('url') or 'Resultado', reason)
+            
+    def _card_link(self, business, elements, index):
+        """
+        Nome e link de um cartão da lista (modo 'click'), para abri-lo depois pelo link
+        
+        Args:
+            business (dict): O que já foi lido do cartão
+            elements (list): Cartões da lista, já reobtidos
+            index (int): Posição do cartão
+            
+        Returns:
+            dict: Dicionário com 'name', 'url' e 'place_id' ('url' None se o cartão não tiver link)
+        """
+        link = {'name': business.get('name') or '', 'url': business.get('url'), 'place_id': business.get('place_id')}
+        if not link['url'] and index < len(elements):
+            try:
+                anchor = elements[index].find_element(By.CSS_SELECTOR, "a")
+                link['url'] = anchor.get_attribute('href')
+                link['name'] = link['name'] or anchor.get_attribute('aria-label') or ''
+                link['place_id'] = extract_place_id(link['url']) if link['url'] else None
+            except Exception:
+                pass
+        return link
+        
+    def _drain_retries(self, results, sink=None, store=None, search_term=None):
+        """
+        Tenta de novo, pelo link, os lugares da fila de novas tentativas até ela esvaziar
+        
+        Se houve bloqueios, as novas tentativas começam em uma sessão nova do navegador.
+        
+        Args:
+            results (list): Lista de resultados da busca (ver _save_business)
+            sink (ResultSink): Saída em streaming
+            store (PlaceStore): Banco de lugares
+            search_term (str): Busca em que os lugares foram encontrados
+        """
+        if not self.retries:
+            return
+        if self.last_error is not None:
+            # A busca falhou (ex.: o navegador caiu): os lugares ficam para quando ela for retomada
+            return
+        logger.info("Tentando de novo %s lugares que falharam...", len(self.retries))
+        if self.retries.has_pending('blocked'):
+            self._rotate_pending = True
+            
+        while True:
+            entry = self.retries.pop()
+            if entry is None:
+                break
+            link, delay = entry
+            if sink and sink.is_processed(link['place_id']):
+                continue
+            if delay:
+                self.waits.sleep(delay, 'backoff')
+            logger.info("Nova tentativa: %s", link['name'])
+            self._extract_and_save(link, results, sink, store, search_term)
+            self._pace()
+            
+    def refresh_stale_places(self, store, limit=0, sink=None):
+        """
+        Extrai novamente apenas os lugares do banco cuja extração passou da validade
+        
+        Args:
+            store (PlaceStore): Banco de lugares
+            limit (int): Quantidade máxima de lugares a atualizar (0 = todos)
+            sink (ResultSink): Se informado, os lugares atualizados também são gravados nele
+            
+        Returns:
+            list: Os negócios atualizados (vazia com `sink`)
+        """
+        stale = store.stale_places(limit)
+        logger.info("Atualizando %s lugares com dados vencidos...", len(stale))
+        
+        self.waits.reset()
+        self.commands.reset()
+        self.metrics.reset()
+        self.last_error = None
+        if self.network:
+            self.network.collect()
+            self.network.reset()
+        if self.capture:
+            self.capture.reset()
+        self.rate.reset()
+        self.retries.reset()
+        results = []
+        for index, link in enumerate(stale):
+            logger.info("Atualizando negócio %s/%s: %s", index+1, len(stale), link['name'])
+            self._extract_and_save(link, results, sink, store, upcoming=self._upcoming_links(stale, index))
+                
+            # Pausa entre negócios para evitar detecção
+            self._pace()
+            
+        self._close_prefetched()
+        self._drain_retries(results, sink, store)
+        self._report_run()
+        return results
+        
+    def _pace(self):
+        """
+        Pausa antes do próximo negócio, no ritmo definido pelo RateController
+        
+        Uma página já aberta pelo prefetch reservou a sua vez ao ser aberta (ver _prefetch)
+        e não é pausada de novo.
+        """
+        if self._paid_ahead:
+            self._paid_ahead -= 1
+            return
+        self.waits.sleep(self.rate.reserve())
+        
+    def _block_resources(self):
+        """
+        Bloqueia, via DevTools Protocol, os recursos dispensáveis do perfil "lean"
+        """
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.LEAN_BLOCKED_URLS})
+            logger.info("Perfil lean ativo: %s padrões de URL bloqueados.", len(self.LEAN_BLOCKED_URLS))
+        except Exception as e:
+            logger.warning("⚠ Não foi possível ativar o bloqueio de recursos: %s", e)
+        
+    def _spawn_worker(self, index):
+        """
+        Cria um navegador auxiliar (pool) com as mesmas configurações deste
+        
+        O Chrome não permite dois navegadores no mesmo perfil, então cada auxiliar usa
+        a sua própria pasta de perfil persistente, derivada da deste navegador.
+        
+        Args:
+            index (int): Número do auxiliar
+            
+        Returns:
+            GoogleMapsSeleniumScraper
+        """
+        user_data_dir = f"{self.user_data_dir}-{index}" if self.user_data_dir else None
+        return GoogleMapsSeleniumScraper(headless=self.headless, wait_budgets=self.wait_budgets,
+                                         user_data_dir=user_data_dir, lean=self.lean,
+                                         network_stats=self.network_stats, maps_url=self.maps_url,
+                                         selectors=self.selectors, backend=self.backend,
+                                         max_pages=self.max_pages, max_rss_mb=self.max_rss_mb,
+                                         start_rate=self.start_rate, max_rate=self.max_rate,
+                                         prefetch=self.prefetch, search_cache=self.search_cache,
+                                         max_attempts=self.max_attempts)
+                                         
+    def _report_run(self):
+        """
+        Mostra o relatório de esperas, fases e comandos WebDriver da última busca e grava as métricas
+        """
+        self.waits.report()
+        self.metrics.report()
+        self.commands.report()
+        if self.network:
+            self.network.collect()
+            self.network.report(len(self.commands.per_place))
+        if self.capture:
+            self.capture.report()
+        self.rate.report()
+        self.retries.report()
+        if self.watchdog and self.watchdog.recycles:
+            logger.info("Navegador reciclado %s vezes nesta sessão%s.", self.watchdog.recycles,
+                        f" (última medição: {self.watchdog.last_rss_mb:.0f} MB)"
+                        if self.watchdog.last_rss_mb is not None else "")
+        if self.metrics_path:
+            try:
+                self.metrics.export(self.metrics_path, self.commands, self.waits, self.network, self.rate,
+                                    self.search_cache, self.retries)
+            except OSError as e:
+                logger.error("Erro ao gravar as métricas em '%s': %s", self.metrics_path, e)
+        self.selectors.report()
+        try:
+            self.selectors.save()
+        except OSError as e:
+            logger.error("Erro ao gravar as estatísticas de seletores em '%s': %s", self.selectors.path, e)
+            
+    def _ordered_selectors(self, field):
+        """
+        Cascata de seletores do campo na ordem em que deve ser tentada (ver SelectorRegistry.ordered)
+        
+        Args:
+            field (str): 'name', 'results', 'scrollable' ou um campo de DETAIL_SELECTORS
+            
+        Returns:
+            list: Os seletores da cascata
+        """
+        cascades = {'name': self.NAME_SELECTORS, 'results': self.RESULT_SELECTORS,
+                    'scrollable': self.SCROLLABLE_SELECTORS}
+        selectors = cascades[field] if field in cascades else self.DETAIL_SELECTORS[field]
+        return self.selectors.ordered(field, selectors, self.FALLBACK_SELECTORS.get(field, 0))
+        
+    def _record_selector(self, field, tried, index):
+        """
+        Registra qual seletor da cascata encontrou o campo, no SelectorRegistry e nas métricas
+        
+        Args:
+            field (str): Nome do campo
+            tried (list): Cascata na ordem em que foi tentada
+            index (int): Posição do seletor que encontrou o campo (None ou negativo = nenhum)
+        """
+        self.selectors.record(field, tried, index)
+        hit = index is not None and index >= 0
+        self.metrics.selector(field, SelectorRegistry.key(tried[index]) if hit else None)
+        
+    def _captured_business(self, link):
+        """
+        Negócio montado a partir das respostas internas do Maps (backend 'xhr'), sem abrir a página de detalhes
+        
+        Args:
+            link (dict): Dicionário com 'name', 'url' e 'place_id'
+            
+        Returns:
+            dict: O negócio, ou None se os dados capturados não bastarem (ou o backend for 'dom')
+        """
+        if not self.capture:
+            return None
+        business = self.capture.lookup(link)
+        if business:
+            logger.info("Dados obtidos da lista de resultados: %s", business['name'])
+        return business
+        
+    def _card_business(self, link):
+        """
+        Negócio montado com os dados que o cartão da lista mostra (modo 'list')
+        
+        Com o backend 'xhr', os campos que o cartão não mostra vêm das respostas internas do Maps.
+        
+        Args:
+            link (dict): Link coletado com `details=True` (ver _collect_place_links)
+            
+        Returns:
+            dict: Um dicionário com os dados do negócio
+        """
+        business = {'name': link['name'], 'place_id': link['place_id'], 'url': link['url']}
+        business.update((field, value) for field, value in link.get('card', {}).items() if value)
+        captured = self.capture.lookup(link) if self.capture else None
+        for field, value in (captured or {}).items():
+            business.setdefault(field, value)
+        return business
+        
+    def _cached_links(self, search_term, max_results=0, details=False):
+        """
+        Lista de resultados da busca guardada no cache de buscas
+        
+        Args:
+            search_term (str): Termo da busca
+            max_results (int): Quantidade desejada (0 = a lista inteira)
+            details (bool): Cartões com os dados mostrados na lista (modo 'list')
+            
+        Returns:
+            list: Links dos resultados, ou None sem cache ou se a busca não estiver nele
+        """
+        if not self.search_cache:
+            return None
+        # O domínio do Maps define o idioma e o país dos resultados
+        links = self.search_cache.get(search_term, self.maps_url, max_results, details)
+        if links is not None:
+            logger.info("Lista de resultados reaproveitada do cache de buscas (%s lugares).", len(links))
+        return links
+        
+    def _cache_links(self, search_term, links, max_results=0, details=False, started=None):
+        """
+        Guarda no cache de buscas a lista de resultados que acabou de ser rolada
+        
+        Args:
+            search_term (str): Termo da busca
+            links (list): Links dos resultados
+            max_results (int): Quantidade pedida na busca
+            details (bool): Cartões com os dados mostrados na lista (modo 'list')
+            started (float): Início da busca (time.time()), para medir o tempo que o cache economiza
+        """
+        if self.search_cache and links:
+            # Sem o fim da lista, a lista (cortada na quantidade pedida ou parada na rolagem) é parcial
+            complete = self._list_ended
+            if not complete and not (max_results > 0 and len(links) >= max_results):
+                logger.debug("A lista parou antes do fim e da quantidade pedida; guardada como parcial.")
+            self.search_cache.put(search_term, links, self.maps_url, max_results, details,
+                                  time.time() - started if started else 0.0, complete=complete)
+        
+    @timed_phase('search')
+    def _open_search(self, search_term, url=None, retry=True):
+        """
+        Abre o Google Maps, pesquisa o termo e identifica o seletor dos cartões de resultado
+        
+        Args:
+            search_term (str): Termo completo da busca (nicho + região)
+            url (str): URL de busca pronta (ex.: ladrilho com @lat,lng,zoom)
+            retry (bool): Pesquisa de novo, uma vez, se a página estiver bloqueada
+            
+        Returns:
+            str: O seletor CSS dos resultados ou None se não houver resultados
+        """
+        # Ir direto para a URL de busca, sem carregar a página inicial nem digitar na caixa de pesquisa
+        self.driver.get(url or f"{self.maps_url}/search/{quote(search_term)}")
+        
+        # Aceitar cookies se aparecer (apenas uma vez por sessão)
+        self._ensure_cookies_accepted()
+        
+        logger.debug("Pesquisa realizada, aguardando resultados...")
+        
+        # Verificar se existem resultados
+        try:
+            # Esperar pelo contêiner de resultados (tentando vários seletores possíveis)
+            result_selector = self._wait_for_first_element_present(
+                self._ordered_selectors('results'), timeout=self.waits.budgets['results'],
+                field='results')
+            
+            if not result_selector:
+                # Sem resultados pode ser só uma busca vazia, então só CAPTCHA e consentimento contam como bloqueio
+                if self._check_block(default=None) and retry:
+                    self.waits.sleep(self.rate.reserve(), 'backoff')
+                    self._recycle_if_needed()
+                    return self._open_search(search_term, url, retry=False)
+                logger.warning("Não foi possível identificar o seletor dos resultados.")
+                return None
+                
+            self.rate.on_success()
+            logger.debug("Resultados encontrados com seletor: %s", result_selector)
+            if self.capture:
+                found = self.capture.capture_initial_state()
+                logger.debug("%s lugares no estado inicial da página.", found)
+        except TimeoutException:
+            logger.info("Não foram encontrados resultados para esta busca.")
+            return None
+            
+        return result_selector
+        
+    def _collect_place_links(self, result_selector, max_results=0, start=0, seen=None, details=False):
+        """
+        Coleta o nome e o link da página de detalhes dos resultados carregados
+        
+        Args:
+            result_selector: Seletor CSS dos cartões de resultado
+            max_results (int): Número máximo de links (0 ou negativo = sem limite)
+            start (int): Índice do primeiro cartão a coletar
+            seen (set): IDs já coletados (atualizado com os novos IDs)
+            details (bool): Também lê os dados mostrados em cada cartão, em 'card' (mesma chamada)
+            
+        Returns:
+            tuple: (lista de dicionários com 'name', 'url' e 'place_id', na ordem da lista e sem duplicatas,
+                    quantidade total de cartões na página)
+        """
+        name_selectors = self._ordered_selectors('name')
+        cards, card_total = self.driver.execute_script(COLLECT_LINKS_SCRIPT, result_selector,
+                                                       name_selectors, start, details)
+        
+        links = []
+        if seen is None:
+            seen = set()
+        for card in cards:
+            self._record_selector('name', name_selectors, card.get('nameIndex'))
+            place_id = extract_place_id(card['url'])
+            if place_id in seen:
+                continue
+            seen.add(place_id)
+            link = {'name': card['name'], 'url': card['url'], 'place_id': place_id}
+            if details:
+                link['card'] = card.get('card') or {}
+            links.append(link)
+            if max_results > 0 and len(links) >= max_results:
+                break
+                
+        return links, card_total
+        
+    def _extract_place_from_url(self, link, upcoming=None):
+        """
+        Abre diretamente a página de detalhes de um resultado e extrai seus dados
+        
+        Args:
+            link (dict): Dicionário com 'name' e 'url' do resultado
+            upcoming (list): Próximos links a extrair; com `prefetch`, começam a carregar em abas
+                             de fundo enquanto este é extraído (ver _upcoming_links)
+            
+        Returns:
+            dict: Um dicionário com os dados do negócio
+        """
+        for attempt in range(2):
+            self._recycle_if_needed()
+        
+            # A página é recarregada por completo, então qualquer título indica que ela carregou
+            self._last_detail_title = None
+            self._last_detail_key = None
+            self._blocked = None
+            if attempt or not self._switch_to_prefetched(link['url']):
+                self.driver.get(link['url'])
+            if self.watchdog:
+                self.watchdog.page_opened()
+            if upcoming:
+                self._prefetch(upcoming)
+        
+            # Aceitar cookies apenas na primeira página aberta por este navegador
+            self._ensure_cookies_accepted()
+            
+            business = {'name': link['name'], 'place_id': link['place_id'], 'url': link['url']}
+            business.update(self._extract_business_details())
+            if not self._blocked or attempt:
+                break
+                
+            # Bloqueio: aguardar a pausa do RateController (e trocar de sessão, se pedido) e tentar de novo
+            logger.info("Abrindo de novo após o bloqueio: %s", link['name'])
+            self.waits.sleep(self.rate.reserve(), 'backoff')
+        
+        if not business['name'] and self._last_detail_title:
+            business['name'] = self._last_detail_title
+                
+        return business
+        
+    def _upcoming_links(self, links, index, sink=None):
+        """
+        Próximos links depois de `index` que ainda serão abertos (no máximo `prefetch`)
+        
+        Args:
+            links (list): Links da busca, em ordem
+            index (int): Posição do link atual
+            sink (ResultSink): Lugares já gravados são pulados
+            
+        Returns:
+            list: Os links a carregar em abas de fundo (vazia sem prefetch)
+        """
+        upcoming = []
+        for position in range(index + 1, len(links)):
+            if len(upcoming) >= self.prefetch:
+                break
+            if sink and sink.is_processed(links[position]['place_id']):
+                continue
+            upcoming.append(links[position])
+        return upcoming
+        
+    def _prefetch(self, links):
+        """
+        Começa a carregar as próximas páginas de detalhes em abas de fundo
+        
+        O navegador carrega essas páginas enquanto o Python extrai a atual; ao terminar,
+        _switch_to_prefetched só troca de aba. As abas abertas por script não recebem o
+        bloqueio de URLs do perfil lean (as imagens continuam desativadas no navegador todo).
+        
+        Args:
+            links (list): Próximos links a extrair, em ordem (ver _upcoming_links)
+        """
+        wanted = [link['url'] for link in links[:self.prefetch]]
+        
+        # Abas de links que não serão mais abertos (ex.: reaproveitados do banco) são fechadas
+        for url in [url for url in self._prefetched if url not in wanted]:
+            self._close_tab(self._prefetched.pop(url))
+            self._paid_ahead = max(0, self._paid_ahead - 1)
+            
+        for url in wanted:
+            if url in self._prefetched:
+                continue
+            # Cada aba de fundo é uma navegação a mais: reserva a sua vez no RateController
+            self.waits.sleep(self.rate.reserve())
+            try:
+                if self._known_handles is None:
+                    self._known_handles = set(self.driver.window_handles)
+                self.driver.execute_script("window.open(arguments[0], '_blank')", url)
+                handles = self.driver.window_handles
+            except Exception as e:
+                logger.debug("Erro ao abrir aba de prefetch: %s", e)
+                return
+            new_handles = [handle for handle in handles if handle not in self._known_handles]
+            self._known_handles = set(handles)
+            if not new_handles:
+                logger.warning("⚠ O navegador não abriu a aba de prefetch (bloqueio de pop-ups?); prefetch desligado.")
+                self.prefetch = 0
+                return
+            self._prefetched[url] = new_handles[-1]
+            self._paid_ahead += 1
+            
+    def _switch_to_prefetched(self, url):
+        """
+        Troca para a aba em que a página já foi carregada pelo prefetch, fechando a aba atual
+        
+        Returns:
+            bool: True se a página estava pré-carregada (senão deve ser aberta com get)
+        """
+        handle = self._prefetched.pop(url, None)
+        if not handle:
+            return False
+        try:
+            self.driver.close()
+            self.driver.switch_to.window(handle)
+            return True
+        except Exception as e:
+            logger.debug("Erro ao trocar para a aba pré-carregada: %s", e)
+            # Sem aba atual nenhum comando funciona: voltar para qualquer aba aberta
+            self._known_handles = None
+            self.driver.switch_to.window(self.driver.window_handles[0])
+            return False
+            
+    def _close_tab(self, handle):
+        """
+        Fecha uma aba de fundo, voltando para a aba atual
+        """
+        current = self.driver.current_window_handle
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        except Exception as e:
+            logger.debug("Erro ao fechar aba de prefetch: %s", e)
+        finally:
+            self.driver.switch_to.window(current)
+            
+    def _close_prefetched(self):
+        """
+        Fecha as abas de prefetch que sobraram (ex.: fim da busca ou limite de resultados)
+        """
+        for handle in self._prefetched.values():
+            self._close_tab(handle)
+        self._prefetched = {}
+        self._known_handles = None
+        self._paid_ahead = 0
+        
+    def _ensure_cookies_accepted(self):
+        """
+        Aceita os cookies na primeira página da sessão, a menos que o perfil já tenha o consentimento
+        """
+        if self._cookies_checked:
+            return
+        if not any(self.driver.get_cookie(name) for name in self.CONSENT_COOKIES):
+            self._accept_cookies()
+        self._cookies_checked = True
+        
+    def _check_block(self, default='empty'):
+        """
+        Procura sinais de bloqueio na página aberta e informa o RateController
+        
+        Só é chamado quando algo já deu errado (painel ou lista que não carregou), então não
+        custa comandos WebDriver nas páginas normais. Um aviso de consentimento é aceito de
+        novo; após bloqueios seguidos, o navegador é trocado na próxima reciclagem.
+        
+        Args:
+            default (str): Tipo assumido quando não há CAPTCHA nem consentimento ('empty' =
+                           painel vazio, um bloqueio "suave"; None = a página está só vazia)
+                           
+        Returns:
+            str: 'captcha', 'consent', 'empty' ou None se não houve bloqueio
+        """
+        try:
+            kind = self.driver.execute_script(BLOCK_CHECK_SCRIPT) or default
+        except Exception as e:
+            logger.debug("Erro ao procurar sinais de bloqueio: %s", e)
+            kind = default
+        if not kind:
+            return None
+            
+        self._blocked = kind
+        action = self.rate.on_block(kind)
+        if kind == 'consent':
+            logger.warning("⚠ Aviso de consentimento no meio da execução; aceitando de novo.")
+            self._accept_cookies()
+        elif action == 'rotate':
+            self._rotate_pending = True
+        return kind
+    
+    def _accept_cookies(self):
+        """
+        Tenta aceitar cookies usando vários seletores possíveis
+        """
+        try:
+            # A página precisa terminar de carregar antes de procurarmos o aviso
+            self.waits.until(lambda driver: driver.execute_script("return document.readyState") == "complete",
+                             'cookies')
+                             
+            cookie_selectors = [
+                "//button[contains(., 'Aceitar')]",
+                "//button[contains(., 'Concordo')]",
+                "//button[contains(., 'Accept')]",
+                "//button[contains(., 'I agree')]",
+                "//button[@jsname='higCR']"
+            ]
+            
+            for selector in cookie_selectors:
+                try:
+                    cookie_button = self.driver.find_element(By.XPATH, selector)
+                    cookie_button.click()
+                    logger.info("Cookies aceitos.")
+                    self.waits.until(EC.staleness_of(cookie_button), 'cookies')
+                    return True
+                except NoSuchElementException:
+                    continue
+                    
+        except Exception as e:
+            logger.debug("Não foi necessário aceitar cookies ou ocorreu erro: %s", e)
+            
+        return False
+        
+    def _wait_for_first_element_present(self, selector_list, timeout=10, field=None):
+        """
+        Aguarda pelo primeiro seletor que encontrar um elemento presente
+        
+        Args:
+            selector_list: Lista de tuplas (BY, seletor)
+            timeout: Tempo máximo de espera em segundos
+            field (str): Campo procurado, para as estatísticas de seletores
+            
+        Returns:
+            str: O seletor CSS que funcionou ou None
+        """
+        def first_present(driver):
+            for index, (by, selector) in enumerate(selector_list):
+                try:
+                    if driver.find_elements(by, selector):
+                        return index + 1
+                except:
+                    pass
+            return False
+            
+        found = self.waits.until(first_present, 'results', timeout=timeout)
+        if field:
+            self._record_selector(field, selector_list, found - 1 if found else None)
+        return selector_list[found - 1][1] if found else None
+        
+    def _find_element_with_multiple_selectors(self, parent_element, selector_list, field=None):
+        """
+        Tenta encontrar um elemento usando múltiplos seletores
+        
+        Args:
+            parent_element: Elemento pai para buscar dentro
+            selector_list: Lista de tuplas (BY, seletor)
+            field (str): Campo procurado, para as estatísticas de seletores
+            
+        Returns:
+            WebElement ou None
         """
-        Inicializa o scraper com o Selenium.
+        for index, (by, selector) in enumerate(selector_list):
+            try:
+                element = parent_element.find_element(by, selector)
+                if field:
+                    self._record_selector(field, selector_list, index)
+                return element
+            except NoSuchElementException:
+                continue
+            except Exception:
+                continue
+        if field:
+            self._record_selector(field, selector_list, None)
+        return None
+        
+    @timed_phase('click')
+    def _try_click_element(self, element):
+        """
+        Tenta clicar em um elemento usando diferentes métodos
         
         Args:
-            headless (bool): Se True, o navegador rodará em modo "headless" (sem interface gráfica).
+            element: Elemento para clicar
+            
+        Returns:
+            bool: True se conseguiu clicar, False caso contrário
         """
-        # Configurar opções do Chrome
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
+        methods = [
+            # Método 1: Clique normal
+            lambda: element.click(),
+            # Método 2: Clique via JavaScript
+            lambda: self.driver.execute_script("arguments[0].click();", element),
+            # Método 3: Ações
+            lambda: webdriver.ActionChains(self.driver).move_to_element(element).click().perform(),
+            # Método 4: Clique com JS após scroll
+            lambda: self.driver.execute_script("arguments[0].scrollIntoView(true); arguments[0].click();", element)
+        ]
         
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-notifications")
-        chrome_options.add_argument("--disable-infobars")
-        chrome_options.add_argument("--start-maximized")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--no-sandbox")
+        for method in methods:
+            try:
+                method()
+                return True
+            except (ElementClickInterceptedException, StaleElementReferenceException):
+                # Se o elemento estiver interceptado ou obsoleto, tente o próximo método
+                continue
+            except Exception as e:
+                logger.debug("Erro ao tentar clicar: %s", e)
+                continue
+                
+        return False
+        
+    def _scroll_results(self, result_selector, max_results=0, details=False):
+        """
+        Rola a lista de resultados até atingir a quantidade desejada ou o fim da lista
+        
+        Args:
+            result_selector: Seletor CSS dos cartões de resultado
+            max_results (int): Quantidade desejada (0 ou negativo = até o fim da lista)
+            details (bool): Também lê os dados mostrados em cada cartão (ver _collect_place_links)
+            
+        Returns:
+            list: Links de todos os resultados carregados (ver _collect_place_links)
+        """
+        links = []
+        for batch in self._iter_scroll_results(result_selector, max_results, details=details):
+            links.extend(batch)
+        return links
+        
+    def _iter_scroll_results(self, result_selector, max_results=0, max_stalls=4, details=False):
+        """
+        Rola a lista de resultados entregando os cartões novos a cada rolagem.
+        
+        Para assim que a quantidade desejada é atingida ou o Google mostra o aviso de fim
+        da lista. Se uma rolagem não carrega nada, espera progressivamente mais antes de
+        tentar de novo e desiste após `max_stalls` tentativas seguidas sem novos cartões.
+        
+        Args:
+            result_selector: Seletor CSS dos cartões de resultado
+            max_results (int): Quantidade desejada (0 ou negativo = até o fim da lista)
+            max_stalls (int): Rolagens seguidas sem novos cartões antes de desistir
+            details (bool): Também lê os dados mostrados em cada cartão (ver _collect_place_links)
+            
+        Yields:
+            list: Links dos cartões que apareceram desde a entrega anterior
+        """
+        seen = set()
+        collected = 0
+        card_count = 0
+        self._list_ended = False
+        
+        def new_links():
+            nonlocal collected, card_count
+            remaining = max_results - collected if max_results > 0 else 0
+            links, card_count = self._collect_place_links(result_selector, remaining, start=card_count, seen=seen,
+                                                          details=details)
+            collected += len(links)
+            return links
+            
+        feed = self._find_scrollable_container()
+        if not feed:
+            # Sem elemento rolável: rolar a página uma vez e entregar o que estiver carregado
+            self.driver.execute_script("window.scrollBy(0, 300)")
+            self.waits.until(self.waits.network_idle(), 'scroll')
+            yield new_links()
+            return
+            
+        logger.debug("Rolando para carregar mais resultados...")
+        
+        links = new_links()
+        if links:
+            yield links
+            
+        child_count, ended = self.driver.execute_script(FEED_STATE_SCRIPT, feed)
+        stalls = 0
+        
+        while not ended and not (max_results > 0 and collected >= max_results):
+            with self.metrics.span('scroll'):
+                self.driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", feed)
+            
+                # Aguardar novos cartões, com espera maior a cada rolagem sem resultado
+                timeout = self.waits.budgets['scroll'] * (stalls + 1)
+                state = self.waits.until(self.waits.feed_grows(feed, child_count), 'scroll', timeout=timeout)
+            
+            if not state:
+                stalls += 1
+                if stalls >= max_stalls:
+                    logger.warning("⚠ A lista parou de carregar após %s resultados.", collected)
+                    break
+                # Subir um pouco antes da próxima rolagem ajuda a disparar o carregamento
+                self.driver.execute_script("arguments[0].scrollBy(0, -300)", feed)
+                continue
+                
+            stalls = 0
+            child_count, ended = state
+            if self.capture:
+                # Ler as respostas da página recém-carregada enquanto o navegador ainda as guarda
+                self.network.collect()
+            links = new_links()
+            if links:
+                logger.info("%s resultados carregados...", collected)
+                yield links
+                
+        if ended:
+            self._list_ended = True
+            logger.info("Fim da lista atingido com %s resultados.", collected)
+            
+    def _restore_results(self, search_term, count):
+        """
+        Refaz a busca e rola a lista até ela ter `count` cartões de novo (após reciclar o navegador)
+        
+        Returns:
+            str: O seletor CSS dos resultados ou None se a busca falhar
+        """
+        result_selector = self._open_search(search_term)
+        if result_selector:
+            self._scroll_results(result_selector, count)
+        return result_selector
+            
+    def _find_scrollable_container(self):
+        """
+        Encontra o elemento rolável da lista de resultados
+        
+        Returns:
+            WebElement ou None
+        """
+        # Tentar diferentes seletores para o elemento rolável
+        scrollable_selectors = self._ordered_selectors('scrollable')
+        
+        for index, selector in enumerate(scrollable_selectors):
+            elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+            if elements:
+                self._record_selector('scrollable', scrollable_selectors, index)
+                return elements[0]
+        self._record_selector('scrollable', scrollable_selectors, None)
+        return None
+                
+    @timed_phase('back')
+    def _go_back_to_results(self):
+        """
+        Volta para a lista de resultados a partir da página de detalhes
+        
+        Returns:
+            bool: True se a lista reapareceu; False se é preciso refazer a busca (ver _restore_results)
+        """
+        # Tentar diferentes métodos para voltar
+        methods = [
+            # Método 1: Botão de voltar específico
+            lambda: self.driver.find_element(By.CSS_SELECTOR, "button[jsaction='pane.topappbar.back']").click(),
+            # Método 2: Botão com ícone de voltar
+            lambda: self.driver.find_element(By.CSS_SELECTOR, "button[aria-label='Voltar']").click(),
+            # Método 3: Botão com ícone de voltar (outra variação)
+            lambda: self.driver.find_element(By.CSS_SELECTOR, "button[aria-label='Back']").click(),
+            # Método 4: Qualquer botão com ícone de seta
+            lambda: self.driver.find_element(By.CSS_SELECTOR, "button.gsqi").click(),
+            # Método 5: Voltar do navegador
+            lambda: self.driver.execute_script("window.history.go(-1)")
+        ]
+        
+        results_visible = EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']"))
+        
+        for method in methods:
+            try:
+                method()
+                # Esperar a lista de resultados reaparecer
+                self.waits.until(results_visible, 'back')
+                return True
+            except Exception:
+                continue
+                
+        # Recarregar a página só reabriria os detalhes: quem chamou refaz a busca
+        logger.warning("⚠ Não foi possível voltar para a lista de resultados. Refazendo a pesquisa...")
+        return False
+    
+    def _detail_panel_rendered(self):
+        """
+        Verifica se há um painel de detalhes com título na página (depois de um tempo esgotado)
+        """
+        try:
+            title, _ = self.driver.execute_script(DETAIL_PANEL_SCRIPT)
+        except Exception as e:
+            logger.debug("Erro ao ler o painel de detalhes: %s", e)
+            return False
+        return bool(title)
+        
+    @timed_phase('extract')
+    def _extract_business_details(self):
+        """
+        Extrai detalhes do negócio da página de detalhes aberta (sem horários/avaliações/ratings).
+        
+        Returns:
+            dict: Um dicionário com os detalhes do negócio
+        """
+        details = {}
+        
+        try:
+            # Esperar o painel mostrar o novo negócio e a rede ficar ociosa
+            panel = self.waits.until(self.waits.detail_panel_changed(self._last_detail_key), 'detail')
+            if panel:
+                self._last_detail_title, self._last_detail_key = panel
+                self.rate.on_success()
+            elif self._detail_panel_rendered():
+                # O painel carregou, mas ainda mostra o lugar anterior: o clique não abriu o novo
+                # lugar. A página está saudável, então não é bloqueio; os dados seriam do lugar errado.
+                logger.warning("⚠ O painel de detalhes continua mostrando o lugar anterior.")
+                return details
+            else:
+                logger.warning("⚠ O painel de detalhes não carregou dentro do tempo limite.")
+                self._check_block()
+            self.waits.until(self.waits.network_idle(), 'idle')
+            
+            # Extração rápida: todas as cascatas avaliadas no navegador em um único comando
+            commands_before = self.commands.total
+            extraction_start = time.time()
+            script_details = self._extract_details_with_script()
+            if self.network and len(self.commands.per_place) % 20 == 19:
+                # Esvaziar o log de desempenho periodicamente para ele não crescer indefinidamente
+                self.network.collect()
+            if script_details is not None:
+                commands = self.commands.record_place(commands_before)
+                logger.debug("Campos encontrados: %s (%.0f ms, %s comandos WebDriver)",
+                             ', '.join(script_details) or 'nenhum', (time.time() - extraction_start) * 1000,
+                             commands)
+                return script_details
+            
+            # Fallback: cascata de seletores campo a campo
+            # (o e-mail do site é buscado depois, pelo WebsiteEnricher)
+            for field in ('address', 'phone', 'website', 'category', 'email'):
+                try:
+                    value = self._find_first_valid_value(self._ordered_selectors(field), field)
+                except Exception as e:
+                    logger.warning("Erro ao extrair %s: %s", field, e)
+                    continue
+                if value:
+                    details[field] = value
+                    logger.debug("Campo '%s' encontrado: %s", field, value[:40])
+            
+            self.commands.record_place(commands_before)
+        except Exception as e:
+            logger.warning("Erro geral ao extrair detalhes: %s", e)
+        
+        return details
+        
+    def _extract_details_with_script(self):
+        """
+        Avalia as cascatas de seletores de todos os campos dentro do navegador,
+        com um único comando WebDriver
+        
+        Returns:
+            dict: Os detalhes encontrados ou None se o script falhar
+        """
+        ordered = {field: self._ordered_selectors(field) for field in self.DETAIL_SELECTORS}
+        cascades = {
+            field: [[by, selector] for by, selector in selectors]
+            for field, selectors in ordered.items()
+        }
+        try:
+            details, hits = self.driver.execute_script(EXTRACT_DETAILS_SCRIPT, cascades)
+        except Exception as e:
+            logger.warning("Extração por script falhou, usando seletores individuais: %s", e)
+            return None
+            
+        if not isinstance(details, dict):
+            return None
+        for field, index in hits.items():
+            self._record_selector(field, ordered[field], index)
+        return details
+    
+    def _find_first_valid_value(self, selector_list, field):
+        """
+        Lê o campo com o primeiro seletor da lista cujo elemento tenha um valor válido
+        
+        Args:
+            selector_list: Lista de tuplas (By, seletor)
+            field (str): Campo procurado (ver read_detail_value)
+            
+        Returns:
+            str: O valor ou None
+        """
+        for index, (by, selector) in enumerate(selector_list):
+            try:
+                elements = self.driver.find_elements(by, selector)
+                value = read_detail_value(field, elements[0]) if elements else None
+            except Exception:
+                continue
+            if valid_detail_value(field, value):
+                self._record_selector(field, selector_list, index)
+                return value
+        self._record_selector(field, selector_list, None)
+        return None
+    
+    def export_to_csv(self, businesses, filename='empresas.csv'):
+        """
+        Exporta os resultados para um arquivo CSV
+        
+        Args:
+            businesses (list): Lista de dicionários com os dados das empresas
+            filename (str): Nome do arquivo CSV a ser criado
+            
+        Returns:
+            bool: True se a exportação foi bem-sucedida, False caso contrário
+        """
+        if not businesses:
+            logger.warning("Nenhum dado para exportar.")
+            return False
+        
+        try:
+            # Colunas fixas primeiro, seguidas de eventuais colunas extras em ordem alfabética
+            extra_keys = set()
+            for biz in businesses:
+                extra_keys.update(key for key in biz.keys() if key not in ResultSink.FIELDNAMES)
+            
+            fieldnames = ResultSink.FIELDNAMES + sorted(extra_keys)
+            
+            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+                writer.writeheader()
+                
+                for biz in businesses:
+                    writer.writerow(biz)
+            
+            logger.info("Dados exportados para '%s' com sucesso!", filename)
+            return True
+        except Exception as e:
+            logger.error("Erro ao exportar para CSV: %s", e)
+            return False
+
+    def close(self):
+        """
+        Encerra o WebDriver e fecha o navegador.
+        """
+        if self.driver:
+            self.driver.quit()
+            logger.info("Navegador fechado.")
+        try:
+            self.selectors.save()
+        except OSError as e:
+            logger.error("Erro ao gravar as estatísticas de seletores em '%s': %s", self.selectors.path, e)
+
+
+class CdpConnection:
+    """
+    Conexão assíncrona com o DevTools Protocol de um Chrome já aberto.
+    
+    Um único websocket atende todas as abas: cada aba é uma sessão (sessionId) anexada
+    com Target.attachToTarget, e as respostas são entregues pelo id da mensagem.
+    """
+    
+    def __init__(self, debugger_address, timeout=30):
+        """
+        Args:
+            debugger_address (str): Endereço de depuração do Chrome ("host:porta")
+            timeout (float): Tempo máximo de resposta de cada comando, em segundos
+        """
+        self.debugger_address = debugger_address
+        self.timeout = timeout
+        self.commands = 0
+        self._next_id = 0
+        self._waiting = {}
+        self._http = None
+        self._socket = None
+        self._reader = None
+        
+    async def connect(self):
+        try:
+            import aiohttp
+        except ImportError:
+            raise RuntimeError("Para usar várias abas instale o aiohttp: pip install aiohttp")
+            
+        self._http = aiohttp.ClientSession()
+        async with self._http.get(f"http://{self.debugger_address}/json/version") as response:
+            version = await response.json(content_type=None)
+        self._socket = await self._http.ws_connect(version['webSocketDebuggerUrl'], max_msg_size=0)
+        self._reader = asyncio.ensure_future(self._read())
+        
+    async def _read(self):
+        async for message in self._socket:
+            try:
+                data = json.loads(message.data)
+            except (TypeError, ValueError):
+                continue
+            # Eventos (mensagens sem id) não são usados: as esperas consultam a página
+            future = self._waiting.pop(data.get('id'), None)
+            if future is None or future.done():
+                continue
+            if 'error' in data:
+                future.set_exception(RuntimeError(f"CDP: {data['error'].get('message', data['error'])}"))
+            else:
+                future.set_result(data.get('result', {}))
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Conexão com o navegador encerrada"))
+        self._waiting.clear()
+        
+    async def send(self, method, params=None, session_id=None):
+        """
+        Envia um comando e aguarda a resposta
+        
+        Args:
+            method (str): Comando do protocolo (ex.: 'Page.navigate')
+            params (dict): Parâmetros do comando
+            session_id (str): Sessão da aba (None = comando do navegador)
+            
+        Returns:
+            dict: O resultado do comando
+        """
+        self._next_id += 1
+        message = {'id': self._next_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = future
+        self.commands += 1
+        await self._socket.send_str(json.dumps(message))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self._waiting.pop(message['id'], None)
+            
+    async def close(self):
+        if self._socket is not None:
+            await self._socket.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+        if self._http is not None:
+            await self._http.close()
+
+
+class CdpTab:
+    """
+    Uma aba do navegador controlada pelo DevTools Protocol
+    """
+    
+    def __init__(self, connection, target_id, session_id):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+        # Comandos enviados por esta aba (a conexão soma os de todas as abas)
+        self.commands = 0
+        
+    @classmethod
+    async def open(cls, connection, blocked_urls=None):
+        """
+        Abre uma aba em segundo plano, no mesmo contexto (cookies e cache) das demais
+        
+        Args:
+            connection (CdpConnection): Conexão com o navegador
+            blocked_urls (list): Padrões de URL bloqueados na aba (perfil lean)
+            
+        Returns:
+            CdpTab
+        """
+        target = await connection.send('Target.createTarget', {'url': 'about:blank', 'background': True})
+        attached = await connection.send('Target.attachToTarget', {'targetId': target['targetId'], 'flatten': True})
+        tab = cls(connection, target['targetId'], attached['sessionId'])
+        await tab.send('Page.enable')
+        # Abas em segundo plano não devem ser tratadas como ocultas (timers e renderização mais lentos)
+        await tab.send('Emulation.setFocusEmulationEnabled', {'enabled': True})
+        if blocked_urls:
+            await tab.send('Network.enable')
+            await tab.send('Network.setBlockedURLs', {'urls': blocked_urls})
+        return tab
+        
+    async def send(self, method, params=None):
+        self.commands += 1
+        return await self.connection.send(method, params, session_id=self.session_id)
+        
+    async def navigate(self, url):
+        """
+        Abre a URL na aba (retorna quando o novo documento substitui o anterior)
+        """
+        result = await self.send('Page.navigate', {'url': url})
+        if result.get('errorText'):
+            raise RuntimeError(f"Falha ao abrir {url}: {result['errorText']}")
+            
+    async def call(self, script, *args):
+        """
+        Executa um script no formato de execute_script do Selenium (corpo de função com `arguments`)
+        
+        Returns:
+            O valor retornado pelo script, convertido de JSON
+        """
+        expression = f"(function() {{\n{script}\n}}).apply(null, {json.dumps(list(args))})"
+        response = await self.send('Runtime.evaluate', {'expression': expression, 'returnByValue': True})
+        if 'exceptionDetails' in response:
+            raise RuntimeError(f"Erro no script: {response['exceptionDetails'].get('text')}")
+        return response.get('result', {}).get('value')
+        
+    async def close(self):
+        await self.connection.send('Target.closeTarget', {'targetId': self.target_id})
+
+
+class MultiTabScraper(GoogleMapsSeleniumScraper):
+    """
+    Variante do scraper que extrai as páginas de detalhes em várias abas de um único Chrome.
+    
+    A aba do Selenium pesquisa e rola a lista de resultados como de costume; as páginas de
+    detalhes são abertas em `tabs` abas extras, controladas ao mesmo tempo por um loop asyncio
+    pelo DevTools Protocol. Cada aba custa um processo de renderização, bem menos que um
+    navegador inteiro por página paralela (ver search_businesses_parallel). Requer o aiohttp.
+    """
+    # As abas de detalhes ficam em segundo plano e não podem ser desaceleradas
+    EXTRA_CHROME_ARGUMENTS = GoogleMapsSeleniumScraper.BACKGROUND_TAB_ARGUMENTS
+    
+    def __init__(self, tabs=4, **options):
+        """
+        Args:
+            tabs (int): Abas extraindo páginas de detalhes ao mesmo tempo
+            **options: Demais argumentos de GoogleMapsSeleniumScraper
+        """
+        super().__init__(**options)
+        self.tabs = max(1, tabs)
+        self.debugger_address = self.driver.capabilities.get('goog:chromeOptions', {}).get('debuggerAddress')
         
-        # Adicionar user-agent para parecer mais humano
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                                    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36")
+    def search_businesses(self, query, region, max_results=0, mode="links", sink=None, store=None):
+        """
+        Pesquisa empresas no Google Maps e extrai as páginas de detalhes em várias abas.
         
-        # Desativar detecção de automação
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
+        Mesma interface de GoogleMapsSeleniumScraper.search_businesses; as páginas de detalhes
+        sempre são abertas pelo link, e o modo 'list' (que não abre nenhuma) usa a aba principal.
+        A extração começa assim que os primeiros cartões aparecem, enquanto a rolagem continua.
         
-        print("Inicializando o navegador Chrome...")
+        Returns:
+            list: Uma lista de dicionários com os dados das empresas, na ordem da lista de resultados
+                  (vazia com `sink`, como em search_businesses)
+        """
+        if mode == "list":
+            return super().search_businesses(query, region, max_results, mode, sink, store)
+            
+        search_term = f"{query} {region}"
         
+        logger.info("Buscando por: %s (%s abas)", search_term, self.tabs)
+        self.waits.reset()
+        self.commands.reset()
+        self.metrics.reset()
+        self.last_error = None
+        if self.network:
+            self.network.collect()
+            self.network.reset()
+        if self.capture:
+            self.capture.reset()
+        self.rate.reset()
+        self.retries.reset()
+            
+        # Uma busca repetida vem do cache de buscas, sem abrir a página nem rolar a lista
+        started = time.time()
+        cached_links = self._cached_links(search_term, max_results)
         try:
-            # Tentar encontrar o driver do Chrome (chromedriver)
+            result_selector = self._open_search(search_term) if cached_links is None else None
+            if cached_links is None and not result_selector:
+                return []
+        except Exception as e:
+            logger.error("Erro durante a pesquisa: %s", e)
+            self.last_error = e
+            return []
+            
+        # O loop asyncio roda em uma thread própria; a rolagem continua nesta thread
+        loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+        loop_thread.start()
+        tab_waits = WaitEngine(None, self.wait_budgets)
+        tab_metrics = Metrics()
+        tab_commands = []
+        connection = CdpConnection(self.debugger_address)
+        tabs = []
+        
+        results = {}
+        try:
+            tabs, free_tabs = asyncio.run_coroutine_threadsafe(self._open_tabs(connection), loop).result()
+            
+            futures = {}
+            position = 0
             try:
-                self.driver = webdriver.Chrome(options=chrome_options)
-                print("Chrome inicializado com sucesso!")
+                harvested = []
+                batches = ([cached_links] if cached_links is not None
+                           else self._iter_scroll_results(result_selector, max_results))
+                for batch in batches:
+                    harvested.extend(batch)
+                    for link in batch:
+                        if sink and sink.is_processed(link['place_id']):
+                            continue
+                            
+                        cached = store.get_fresh(link['place_id']) if store else None
+                        captured = None if cached else self._captured_business(link)
+                        if cached:
+                            if sink is None:
+                                results[position] = cached
+                            self._save_business(cached, None, sink, store, search_term, extracted=False)
+                        elif captured:
+                            if sink is None:
+                                results[position] = captured
+                            self._save_business(captured, None, sink, store, search_term)
+                        else:
+                            future = asyncio.run_coroutine_threadsafe(
+                                self._extract_in_tab(free_tabs, link, tab_waits, tab_metrics, tab_commands), loop)
+                            futures[future] = (position, link)
+                        position += 1
+                if cached_links is None:
+                    self._cache_links(search_term, harvested, max_results, started=started)
             except Exception as e:
-                print(f"Erro ao iniciar o Chrome: {str(e)}")
-                print("Tentando encontrar o chromedriver no PATH...")
-                
-                # Tente especificar o caminho para o chromedriver
-                service = Service('./chromedriver')  # Ajuste o caminho conforme necessário
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                print("Chrome inicializado com serviço personalizado!")
+                logger.error("Erro durante rolagem: %s", e)
                 
+            logger.info("Encontrados %s resultados (%s páginas de detalhes a abrir).", position, len(futures))
+            
+            for future in as_completed(futures):
+                index, link = futures[future]
+                try:
+                    business, blocked = future.result()
+                except Exception as e:
+                    logger.warning("Erro em uma aba: %s", e)
+                    self._finish_place(link, None, None, sink, store, search_term, error=e)
+                    continue
+                if (self._finish_place(link, business, None, sink, store, search_term, blocked=blocked)
+                        and sink is None):
+                    results[index] = business
         except Exception as e:
-            print(f"Erro ao inicializar o Chrome: {str(e)}")
-            print("\nVocê precisa ter o Chrome e o chromedriver instalados.")
-            print("Baixe o chromedriver em: https://chromedriver.chromium.org/downloads")
-            print("Certifique-se de baixar a versão compatível com seu Chrome.")
-            print("Coloque o chromedriver no mesmo diretório deste script ou adicione-o ao PATH.")
-            raise e
+            logger.error("Erro ao controlar as abas: %s", e)
+            self.last_error = e
+        finally:
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_tabs(connection, tabs), loop).result(timeout=30)
+            except Exception:
+                pass
+            loop.call_soon_threadsafe(loop.stop)
+            loop_thread.join()
+            loop.close()
+            
+            self.waits.merge(tab_waits)
+            self.metrics.merge(tab_metrics)
+            self.commands.per_place.extend(tab_commands)
+            logger.info("Comandos CDP das abas: %s", connection.commands)
+            
+        # As novas tentativas usam a aba controlada pelo Selenium, livre desde o fim da rolagem
+        recovered = []
+        self._drain_retries(recovered, sink, store, search_term)
+        self._report_run()
+        return [results[index] for index in sorted(results) if results[index]] + recovered
         
-        # Definir tempos de espera
-        self.driver.implicitly_wait(10)
-        self.wait = WebDriverWait(self.driver, 30)
-    
-    def search_businesses(self, query, region, max_results=0):
+    async def _open_tabs(self, connection):
         """
-        Pesquisa empresas no Google Maps com base na consulta e região.
+        Conecta ao navegador e abre as abas
         
-        Args:
-            query (str): O tipo de negócio a ser pesquisado (ex: 'autoescola')
-            region (str): A região para buscar (ex: 'São Paulo, SP')
-            max_results (int): Número máximo de resultados a coletar (0 ou negativo = sem limite)
-            
         Returns:
-            list: Uma lista de dicionários com os dados das empresas
+            tuple: (lista das abas, asyncio.Queue com as abas livres)
         """
-        results = []
-        search_term = f"{query} {region}"
+        if not self.debugger_address:
+            raise RuntimeError("O chromedriver não informou o endereço de depuração do Chrome")
+        await connection.connect()
+        blocked_urls = self.LEAN_BLOCKED_URLS if self.lean else None
+        tabs = await asyncio.gather(*(CdpTab.open(connection, blocked_urls) for _ in range(self.tabs)))
+        free_tabs = asyncio.Queue()
+        for tab in tabs:
+            free_tabs.put_nowait(tab)
+        return list(tabs), free_tabs
+        
+    async def _close_tabs(self, connection, tabs):
+        for tab in tabs:
+            try:
+                await tab.close()
+            except Exception:
+                pass
+        await connection.close()
         
-        print(f"Buscando por: {search_term}")
+    async def _extract_in_tab(self, free_tabs, link, waits, metrics, commands_per_place):
+        """
+        Abre a página de detalhes em uma aba livre e extrai os dados (versão assíncrona de _extract_place_from_url)
         
-        try:
-            # Acessar o Google Maps
-            self.driver.get("https://www.google.com/maps")
+        Args:
+            free_tabs (asyncio.Queue): Abas livres
+            link (dict): Dicionário com 'name', 'url' e 'place_id' do resultado
+            waits (WaitEngine): Contabilidade das esperas das abas
+            metrics (Metrics): Spans e seletores das abas
+            commands_per_place (list): Recebe os comandos CDP usados pelo negócio
             
-            # Aceitar cookies se aparecer (múltiplas tentativas com diferentes seletores)
-            self._accept_cookies()
+        Returns:
+            tuple: (dicionário com os dados do negócio, tipo de bloqueio detectado ou None)
+        """
+        tab = await free_tabs.get()
+        try:
+            logger.info("Processando negócio: %s", link['name'])
+            # Pausa no ritmo do RateController, compartilhado por todas as abas
+            delay = self.rate.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+                waits.waited['pacing'] += delay
+                
+            # Contagem da própria aba: a conexão é compartilhada com as outras abas em uso
+            commands_before = tab.commands
+            await tab.navigate(link['url'])
             
-            # Localizar a caixa de pesquisa e inserir o termo de busca
-            search_box = self.wait.until(EC.presence_of_element_located(
-                (By.ID, "searchboxinput")
-            ))
-            search_box.clear()
-            search_box.send_keys(search_term)
-            search_box.send_keys(Keys.ENTER)
+            business = {'name': link['name'], 'place_id': link['place_id'], 'url': link['url']}
+            with metrics.span('extract'):
+                details, title, blocked = await self._extract_business_details_async(tab, waits, metrics,
+                                                                                     link['place_id'])
+            business.update(details)
+            if not business['name'] and title:
+                business['name'] = title
+                
+            commands_per_place.append(tab.commands - commands_before)
+            return business, blocked
+        finally:
+            free_tabs.put_nowait(tab)
             
-            print("Pesquisa realizada, aguardando resultados...")
+    async def _extract_business_details_async(self, tab, waits, metrics, place_id=None):
+        """
+        Versão assíncrona de _extract_business_details: aguarda o painel e avalia todas as cascatas na aba
+        
+        O painel só vale quando o lugar no endereço da aba é `place_id` (como em
+        WaitEngine.detail_panel_changed): enquanto a navegação não termina, a aba ainda mostra
+        o lugar anterior, às vezes com o mesmo título (filiais de uma rede).
+        
+        Args:
+            tab (CdpTab): Aba com a página de detalhes aberta
+            waits (WaitEngine): Contabilidade das esperas das abas
+            metrics (Metrics): Spans e seletores das abas
+            place_id (str): Identificador do lugar aberto (ver extract_place_id)
             
-            # Aguardar o carregamento dos resultados
-            time.sleep(5)
+        Returns:
+            tuple: (detalhes encontrados, título do painel, tipo de bloqueio ou None), como o
+                   _blocked do scraper, para a fila de novas tentativas classificar a falha
+        """
+        rendered = {'title': None}
+        
+        def panel(value):
+            title, url = value
+            rendered['title'] = title
+            if not title or (place_id and WaitEngine.detail_panel_key(url) != place_id):
+                return None
+            return title
             
-            # Verificar se existem resultados
+        title = await self._wait_in_tab(tab, DETAIL_PANEL_SCRIPT, 'detail', waits, condition=panel)
+        if not title and rendered['title']:
+            # A página está saudável, mas mostra outro lugar: não é bloqueio, e os dados seriam do lugar errado
+            logger.warning("⚠ O painel de detalhes continua mostrando o lugar anterior.")
+            return {}, None, None
+        if not title:
+            logger.warning("⚠ O painel de detalhes não carregou dentro do tempo limite.")
+            # As abas dividem o navegador, então um bloqueio só desacelera (sem trocar de sessão)
             try:
-                # Esperar pelo contêiner de resultados (tentando vários seletores possíveis)
-                result_selector = self._wait_for_first_element_present([
-                    (By.CSS_SELECTOR, "div.Nv2PK"),
-                    (By.CSS_SELECTOR, "div.bfdHYd"),
-                    (By.CSS_SELECTOR, "div[role='feed'] > div")
-                ], timeout=10)
-                
-                if not result_selector:
-                    print("Não foi possível identificar o seletor dos resultados.")
-                    return results
-                
-                print(f"Resultados encontrados com seletor: {result_selector}")
-            except TimeoutException:
-                print("Não foram encontrados resultados para esta busca.")
-                return results
+                kind = await tab.call(BLOCK_CHECK_SCRIPT) or 'empty'
+            except Exception as e:
+                logger.debug("Erro ao procurar sinais de bloqueio: %s", e)
+                kind = 'empty'
+            self.rate.on_block(kind)
+            return {}, None, kind
+        self.rate.on_success()
+        await self._wait_network_idle_in_tab(tab, waits)
+        
+        ordered = {field: self._ordered_selectors(field) for field in self.DETAIL_SELECTORS}
+        cascades = {field: [[by, selector] for by, selector in selectors] for field, selectors in ordered.items()}
+        details, hits = await tab.call(EXTRACT_DETAILS_SCRIPT, cascades)
+        for field, index in hits.items():
+            self.selectors.record(field, ordered[field], index)
+            metrics.selector(field, SelectorRegistry.key(ordered[field][index]) if index >= 0 else None)
+        return details, title, None
+        
+    async def _wait_in_tab(self, tab, script, phase, waits, condition=None):
+        """
+        Equivalente assíncrono de WaitEngine.until: repete o script até ele retornar um valor verdadeiro
+        
+        Args:
+            condition: Função que recebe o valor do script e retorna o resultado da espera
+                       (falso = continua esperando); sem ela, o próprio valor
+        
+        Returns:
+            O resultado (ou o valor retornado pelo script) ou None se o orçamento da fase se esgotar
+        """
+        start = time.time()
+        deadline = start + waits.budgets.get(phase, 10)
+        try:
+            while True:
+                try:
+                    value = await tab.call(script)
+                except RuntimeError:
+                    # O documento ainda está sendo trocado
+                    value = None
+                if value and condition:
+                    value = condition(value)
+                if value:
+                    return value
+                if time.time() >= deadline:
+                    waits.timeouts[phase] += 1
+                    return None
+                await asyncio.sleep(waits.poll_frequency)
+        finally:
+            waits.waited[phase] += time.time() - start
             
-            # Definir a quantidade de rolagens
-            # Se max_results <= 0 (ou seja, sem limite), podemos rolar várias vezes por padrão (ex.: 10).
-            # Se max_results > 0, estimamos ~5 resultados por rolagem.
-            if max_results > 0:
-                scroll_count = max(1, max_results // 5)
-            else:
-                scroll_count = 10  # Rolagem fixa para tentar coletar vários resultados
+    async def _wait_network_idle_in_tab(self, tab, waits, quiet_period=0.3):
+        """
+        Equivalente assíncrono de WaitEngine.network_idle
+        """
+        state = {'count': -1, 'since': time.time()}
+        
+        async def idle():
+            count = await tab.call(RESOURCE_COUNT_SCRIPT)
+            now = time.time()
+            if count != state['count']:
+                state['count'] = count
+                state['since'] = now
+                return False
+            return now - state['since'] >= quiet_period
             
-            # Rolar para baixo para carregar mais resultados
-            self._scroll_results(scroll_count)
+        start = time.time()
+        deadline = start + waits.budgets.get('idle', 2)
+        try:
+            while not await idle():
+                if time.time() >= deadline:
+                    waits.timeouts['idle'] += 1
+                    return False
+                await asyncio.sleep(waits.poll_frequency)
+            return True
+        finally:
+            waits.waited['idle'] += time.time() - start
+
+
+def _slugify(text):
+    """
+    Converte um texto em um nome de arquivo seguro (sem acentos, espaços ou pontuação)
+    """
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-zA-Z0-9]+', '_', text).strip('_').lower() or 'busca'
+
+
+def job_output_path(job, output_dir='resultados'):
+    """
+    Arquivo de saída de uma busca em lote: o 'output' informado ou, sem ele, um CSV em
+    `output_dir` com o nome vindo do nicho e da região (ex.: resultados/padaria_sp.csv)
+    
+    Args:
+        job (dict): Busca retornada por load_jobs
+        output_dir (str): Pasta dos arquivos de saída das buscas sem 'output'
+        
+    Returns:
+        str: Caminho do arquivo de saída
+    """
+    if job['output']:
+        return job['output']
+    return os.path.join(output_dir, f"{_slugify(job['niche'])}_{_slugify(job['region'])}.csv")
+
+
+def load_jobs(path, output_dir='resultados'):
+    """
+    Lê um arquivo de buscas em lote (CSV, YAML ou JSONL)
+    
+    Cada busca precisa de 'niche' e 'region'; 'max_results' (padrão 0 = sem limite)
+    e 'output' (arquivo CSV de saída) são opcionais. Linhas inválidas e buscas que gravariam
+    no mesmo arquivo de saída de uma anterior são ignoradas com um aviso, sem interromper o lote.
+    
+    Args:
+        path (str): Caminho do arquivo de buscas
+        output_dir (str): Pasta dos arquivos de saída das buscas sem 'output' (ver job_output_path)
+        
+    Returns:
+        list: Dicionários com 'niche', 'region', 'max_results' e 'output'
+    """
+    extension = os.path.splitext(path)[1].lower()
+    
+    with open(path, encoding='utf-8') as jobs_file:
+        if extension in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("Para ler arquivos YAML instale o PyYAML: pip install pyyaml")
+            rows = yaml.safe_load(jobs_file) or []
+            if isinstance(rows, dict):
+                rows = rows.get('jobs', [])
+        elif extension in ('.jsonl', '.ndjson'):
+            rows = []
+            for line in jobs_file:
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError as e:
+                    logger.warning("⚠ Busca %s ignorada: JSON inválido (%s).", len(rows) + 1, e)
+                    rows.append(None)
+        else:
+            rows = list(csv.DictReader(jobs_file))
             
-            # Coletar todos os resultados de negócios usando o seletor identificado
-            business_elements = self.driver.find_elements(By.CSS_SELECTOR, result_selector)
-            print(f"Encontrados {len(business_elements)} resultados.")
+    jobs = []
+    outputs = {}  # arquivo de saída -> número da busca que o usa
+    for number, row in enumerate(rows, start=1):
+        if row is None:
+            continue
+        if not isinstance(row, dict) or not row.get('niche') or not row.get('region'):
+            logger.warning("⚠ Busca %s ignorada: 'niche' e 'region' são obrigatórios.", number)
+            continue
+        try:
+            max_results = int(row.get('max_results') or 0)
+        except (TypeError, ValueError):
+            logger.warning("⚠ Busca %s ignorada: max_results inválido (%r).", number, row.get('max_results'))
+            continue
+        job = {
+            'niche': str(row['niche']).strip(),
+            'region': str(row['region']).strip(),
+            'max_results': max_results,
+            'output': str(row['output']).strip() if row.get('output') else None
+        }
+        # Compara o caminho final, o mesmo do lote e do coordenador: duas buscas no mesmo arquivo
+        # se sobrescreveriam, com ou sem 'output'
+        output = os.path.normcase(os.path.normpath(job_output_path(job, output_dir)))
+        if output in outputs:
+            logger.warning("⚠ Busca %s ignorada: grava no mesmo arquivo que a busca %s (%s).", number,
+                           outputs[output], job['output'] or f"{job['niche']} / {job['region']}")
+            continue
+        outputs[output] = number
+        jobs.append(job)
+    return jobs
+
+
+class BatchRunner:
+    """
+    Executa muitas buscas (nicho, região) sem interação, reaproveitando navegadores.
+    
+    Cada uma das `concurrency` threads mantém um GoogleMapsSeleniumScraper aberto durante
+    todo o lote e processa as buscas de uma fila. Buscas que falham voltam para a fila até
+    `retries` vezes; uma nova tentativa continua o arquivo da anterior (resume). Com
+    `metrics_path` em `scraper_options`, cada busca grava as suas métricas em um arquivo próprio.
+    """
+    
+    def __init__(self, jobs, output_dir='resultados', concurrency=1, retries=2,
+                 headless=True, mode='links', workers=1, store=None, user_data_dir=None, scraper_options=None,
+                 enricher=None, tabs=1, dedupe=False):
+        """
+        Args:
+            jobs (list): Buscas retornadas por load_jobs
+            output_dir (str): Pasta dos arquivos de saída das buscas sem 'output'
+            concurrency (int): Quantidade de buscas simultâneas (um navegador por busca)
+            retries (int): Novas tentativas para cada busca que falhar
+            headless (bool): Executa os navegadores sem interface gráfica
+            mode (str): Modo de extração de search_businesses ('click' ou 'links')
+            workers (int): Se maior que 1 (e sem `tabs`), cada busca usa search_businesses_parallel
+            store (PlaceStore): Banco de lugares compartilhado entre as buscas
+            user_data_dir (str): Pasta base dos perfis persistentes do Chrome (um perfil por thread)
+            scraper_options (dict): Demais argumentos de GoogleMapsSeleniumScraper (ex.: lean)
+            enricher (WebsiteEnricher): Se informado, completa cada busca concluída com os dados dos sites
+            tabs (int): Se maior que 1, cada busca usa um MultiTabScraper com essa quantidade de abas
+            dedupe (bool): Normaliza e remove os lugares repetidos de cada busca concluída
+        """
+        self.jobs = jobs
+        self.output_dir = output_dir
+        self.concurrency = max(1, concurrency)
+        self.retries = max(0, retries)
+        self.headless = headless
+        self.mode = mode
+        self.workers = workers
+        self.store = store
+        self.user_data_dir = user_data_dir
+        self.scraper_options = scraper_options or {}
+        self.enricher = enricher
+        self.tabs = tabs
+        self.dedupe = dedupe
+        self.summary = []
+        self._lock = threading.Lock()
+        
+    def _metrics_path(self, output):
+        """
+        Arquivo de métricas da busca: o de --metrics com o nome da saída da busca (ex.:
+        metricas.prom -> metricas_resultados_padaria_sp.prom), ou None sem --metrics
+        """
+        metrics_path = self.scraper_options.get('metrics_path')
+        if not metrics_path:
+            return None
+        root, extension = os.path.splitext(metrics_path)
+        return f"{root}_{_slugify(os.path.splitext(output)[0])}{extension}"
+        
+    def run(self):
+        """
+        Executa todas as buscas e grava o resumo em '<output_dir>/resumo_lote.csv'
+        
+        Returns:
+            list: Resumo de cada busca (status, tentativas, negócios, duração e vazão)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        
+        pending = queue.Queue()
+        for number, job in enumerate(self.jobs, start=1):
+            pending.put((number, job, 1))
             
-            # Se max_results > 0, limitar o número de resultados para processamento
-            if max_results > 0:
-                business_elements = business_elements[:max_results]
+        logger.info("Executando %s buscas com %s navegador(es)...", len(self.jobs), self.concurrency)
+        started = time.time()
+        
+        threads = [threading.Thread(target=self._worker, args=(pending, index), daemon=True)
+                   for index in range(1, min(self.concurrency, len(self.jobs)) + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
             
-            # Para cada resultado, extrair informações básicas e detalhes
-            for index, element in enumerate(business_elements):
+        self.summary.sort(key=lambda item: item['job'])
+        self._write_summary(time.time() - started)
+        return self.summary
+        
+    def _worker(self, pending, index):
+        # Cada thread tem o seu perfil persistente, reaproveitado entre as buscas e entre lotes
+        user_data_dir = f"{self.user_data_dir}-{index}" if self.user_data_dir else None
+        scraper = None
+        try:
+            while True:
                 try:
-                    # Criar um dicionário para armazenar informações do negócio
-                    business = {}
-                    
-                    # Tentar obter o nome do negócio usando diferentes seletores
-                    name_element = self._find_element_with_multiple_selectors(element, [
-                        (By.CSS_SELECTOR, "div.qBF1Pd"),       # Seletor antigo
-                        (By.CSS_SELECTOR, "span.fontHeadlineSmall"),
-                        (By.CSS_SELECTOR, "div.fontHeadlineSmall"),
-                        (By.CSS_SELECTOR, "span.vcAjh"),
-                        (By.CSS_SELECTOR, "h3")
-                    ])
+                    number, job, attempt = pending.get_nowait()
+                except queue.Empty:
+                    return
                     
-                    if name_element:
-                        business['name'] = name_element.text.strip()
-                        print(f"Processando negócio {index+1}/{len(business_elements)}: {business['name']}")
-                        
-                        # Tentar obter URL para a página de detalhes (isso pode mudar no futuro)
-                        try:
-                            # Tentar encontrar o elemento clicável que vai para os detalhes
-                            clickable_element = self._find_element_with_multiple_selectors(element, [
-                                (By.CSS_SELECTOR, "a"),                # Qualquer link dentro do elemento
-                                (By.CSS_SELECTOR, "div[role='button']"),
-                                (By.CSS_SELECTOR, "div[jsaction*='placeCard']"),
-                                (By.CSS_SELECTOR, "div[jsaction*='click']")
-                            ])
-                            
-                            if clickable_element:
-                                # Tentar clicar com diferentes abordagens
-                                clicked = self._try_click_element(clickable_element)
-                                
-                                if clicked:
-                                    # Aguardar carregamento dos detalhes
-                                    time.sleep(random.uniform(3, 5))
-                                    
-                                    # Extrair detalhes da página de detalhes
-                                    business_details = self._extract_business_details()
-                                    business.update(business_details)
-                                    
-                                    # Verificar se conseguimos informações além do nome
-                                    if len(business) > 1:
-                                        print(f"✓ Detalhes obtidos para: {business['name']}")
-                                    else:
-                                        print(f"⚠ Apenas o nome foi obtido para: {business['name']}")
-                                    
-                                    # Voltar para a lista de resultados usando diferentes seletores
-                                    self._go_back_to_results()
-                                    
-                                    # Aguardar carregamento da lista novamente
-                                    time.sleep(random.uniform(2, 3))
-                                    
-                                    # Atualizar a lista de elementos se necessário (para evitar StaleElementReferenceException)
-                                    if index < len(business_elements) - 1:
-                                        try:
-                                            # Reobter os elementos se eles estiverem obsoletos
-                                            business_elements = self.driver.find_elements(By.CSS_SELECTOR, result_selector)
-                                        except Exception as e:
-                                            print(f"Erro ao reatualizar lista de resultados: {str(e)}")
-                                else:
-                                    print(f"⚠ Não foi possível clicar no elemento para: {business['name']}")
-                            else:
-                                print(f"⚠ Não foi encontrado elemento clicável para: {business['name']}")
-                                
-                        except Exception as e:
-                            print(f"Erro ao obter detalhes para {business['name']}: {str(e)}")
-                    else:
-                        print(f"⚠ Não foi possível obter o nome para o resultado {index+1}")
+                if scraper is None:
+                    try:
+                        if self.tabs > 1:
+                            scraper = MultiTabScraper(tabs=self.tabs, headless=self.headless,
+                                                      user_data_dir=user_data_dir, **self.scraper_options)
+                        else:
+                            scraper = GoogleMapsSeleniumScraper(headless=self.headless, user_data_dir=user_data_dir,
+                                                                **self.scraper_options)
+                    except Exception as e:
+                        self._finish(number, job, attempt, pending, error=e)
                         continue
-                    
-                    # Adicionar negócio à lista de resultados
-                    results.append(business)
-                    
-                except StaleElementReferenceException:
-                    print("Elemento ficou obsoleto, tentando recarregar os resultados...")
-                    # Recarregar os elementos
-                    business_elements = self.driver.find_elements(By.CSS_SELECTOR, result_selector)
-                    # Pular este elemento
-                    continue
-                except Exception as e:
-                    print(f"Erro ao processar resultado {index+1}: {str(e)}")
-                    
-                # Pausa entre negócios para evitar detecção
-                time.sleep(random.uniform(1, 2))
-            
+                        
+                error = self._run_job(scraper, number, job, attempt)
+                if error is not None:
+                    # Um navegador com problema é descartado e recriado na próxima busca
+                    try:
+                        scraper.close()
+                    except Exception:
+                        pass
+                    scraper = None
+                    self._finish(number, job, attempt, pending, error=error)
+        finally:
+            if scraper:
+                scraper.close()
+                
+    def _run_job(self, scraper, number, job, attempt):
+        """
+        Executa uma busca e registra o resultado no resumo
+        
+        Returns:
+            Exception: O erro da busca ou None se ela terminou
+        """
+        output = job_output_path(job, self.output_dir)
+        logger.info("[%s/%s] %s / %s (tentativa %s)", number, len(self.jobs), job['niche'], job['region'], attempt)
+        
+        started = time.time()
+        sink = None
+        error = None
+        # Com várias threads, um arquivo de métricas comum ficaria só com a última busca a terminar
+        scraper.metrics_path = self._metrics_path(output)
+        try:
+            sink = ResultSink(output, query=job['niche'], region=job['region'], resume=attempt > 1)
+            if self.workers > 1 and self.tabs <= 1 and self.mode != 'list':
+                scraper.search_businesses_parallel(job['niche'], job['region'], max_results=job['max_results'],
+                                                   workers=self.workers, sink=sink, store=self.store)
+            else:
+                scraper.search_businesses(job['niche'], job['region'], max_results=job['max_results'],
+                                          mode=self.mode, sink=sink, store=self.store)
+            error = scraper.last_error
         except Exception as e:
-            print(f"Erro durante a pesquisa: {str(e)}")
+            error = e
+        finally:
+            if sink:
+                sink.close(completed=error is None)
+                
+        if error is None and self.dedupe and sink.count:
+            try:
+                dedupe_results([output], output)
+            except Exception as e:
+                logger.warning("⚠ Não foi possível remover os repetidos da busca %s: %s", number, e)
+                
+        if error is None and self.enricher and sink.count:
+            try:
+                self.enricher.enrich_file(output)
+            except Exception as e:
+                logger.warning("⚠ Não foi possível completar a busca %s com os dados dos sites: %s", number, e)
+                
+        if error is None:
+            elapsed = time.time() - started
+            with self._lock:
+                self.summary.append({
+                    'job': number,
+                    'niche': job['niche'],
+                    'region': job['region'],
+                    'status': 'ok',
+                    'attempts': attempt,
+                    'businesses': sink.count,
+                    'seconds': round(elapsed, 1),
+                    'places_per_minute': round(sink.count * 60 / elapsed, 1) if elapsed else 0.0,
+                    'output': output,
+                    'error': ''
+                })
+        return error
         
-        return results
+    def _finish(self, number, job, attempt, pending, error):
+        """
+        Recoloca uma busca que falhou na fila ou a registra como falha definitiva
+        """
+        if attempt <= self.retries:
+            logger.warning("⚠ Busca %s falhou (%s); nova tentativa em seguida.", number, error)
+            pending.put((number, job, attempt + 1))
+            return
+            
+        logger.error("✗ Busca %s falhou após %s tentativas: %s", number, attempt, error)
+        with self._lock:
+            self.summary.append({
+                'job': number,
+                'niche': job['niche'],
+                'region': job['region'],
+                'status': 'falhou',
+                'attempts': attempt,
+                'businesses': 0,
+                'seconds': 0.0,
+                'places_per_minute': 0.0,
+                'output': job_output_path(job, self.output_dir),
+                'error': str(error)
+            })
+            
+    def _write_summary(self, elapsed):
+        summary_path = os.path.join(self.output_dir, 'resumo_lote.csv')
+        with open(summary_path, 'w', newline='', encoding='utf-8') as summary_file:
+            writer = csv.DictWriter(summary_file, fieldnames=['job', 'niche', 'region', 'status', 'attempts',
+                                                              'businesses', 'seconds', 'places_per_minute',
+                                                              'output', 'error'])
+            writer.writeheader()
+            writer.writerows(self.summary)
+            
+        total = sum(item['businesses'] for item in self.summary)
+        failed = sum(1 for item in self.summary if item['status'] != 'ok')
+        logger.info("Lote concluído em %.0fs: %s buscas ok, %s com falha, %s negócios (%.1f por minuto).",
+                    elapsed, len(self.summary) - failed, failed, total, total * 60 / elapsed if elapsed else 0)
+        for item in self.summary:
+            logger.info("  %4s %-7s %5s negócios %7.1f/min  %s / %s",
+                        item['job'], item['status'], item['businesses'], item['places_per_minute'], item['niche'],
+                        item['region'])
+        logger.info("Resumo gravado em '%s'.", summary_path)
+
+
+def _place_work_item(link, output):
+    """
+    Item da fila para extrair um lugar; a chave é o ID do lugar, para ele ser extraído uma única vez
+    """
+    return {'kind': 'place', 'key': f"place:{link['place_id'] or link['url']}",
+            'payload': {'name': link['name'], 'url': link['url'], 'place_id': link['place_id'], 'output': output}}
+
+
+def _tile_work_item(payload, tile):
+    """
+    Item da fila para pesquisar um ladrilho, com as mesmas opções do item que o gerou
+    """
+    bbox = f"{tile['south']:.5f},{tile['west']:.5f},{tile['north']:.5f},{tile['east']:.5f}"
+    return {'kind': 'tile', 'key': f"tile:{payload['query']}|{bbox}|{payload['output']}",
+            'payload': dict(payload, tile=tile)}
+
+
+class WorkQueue:
+    """
+    Fila de trabalho do modo distribuído, em um banco SQLite.
     
-    def _accept_cookies(self):
+    Processos da mesma máquina podem abrir o mesmo arquivo; trabalhadores de outras máquinas
+    acessam a fila pelo WorkQueueServer do coordenador (o SQLite não é confiável em disco de rede).
+    
+    Cada item é uma busca, um ladrilho ou um lugar. Um trabalhador aluga itens por
+    `lease_seconds` segundos e renova o aluguel (heartbeat) enquanto trabalha; os itens de
+    um trabalhador que parou de responder voltam para a fila quando o aluguel vence. Os itens
+    têm chave única e os resultados são indexados pelo ID do lugar, então o mesmo lugar
+    encontrado por buscas ou ladrilhos diferentes é extraído uma única vez.
+    
+    Outros brokers (Redis, SQS...) podem ser usados pelos trabalhadores implementando os
+    mesmos métodos (lease, heartbeat, complete, fail, reclaim, stats, close) e sendo
+    registrados em WORK_QUEUE_BACKENDS; o coordenador sempre usa o banco local.
+    """
+    # Lugares antes de buscas e ladrilhos: a fila não cresce sem limite e os resultados saem logo
+    PRIORITIES = {'place': 1, 'tile': 0, 'search': 0}
+    
+    def __init__(self, path='fila.db', max_attempts=3):
         """
-        Tenta aceitar cookies usando vários seletores possíveis
+        Args:
+            path (str): Arquivo do banco SQLite
+            max_attempts (int): Aluguéis de um item antes de ele ser dado como falho
         """
-        try:
-            cookie_selectors = [
-                "//button[contains(., 'Aceitar')]",
-                "//button[contains(., 'Concordo')]",
-                "//button[contains(., 'Accept')]",
-                "//button[contains(., 'I agree')]",
-                "//button[@jsname='higCR']"
-            ]
+        self.path = path
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        # Sem transações implícitas: cada operação usa BEGIN IMMEDIATE, para que dois processos
+        # nunca aluguem o mesmo item
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                owner TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_items_status ON items (status, priority, id);
+            CREATE TABLE IF NOT EXISTS results (
+                place_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                worker TEXT,
+                saved REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS targets (
+                place_id TEXT NOT NULL,
+                output TEXT NOT NULL,
+                PRIMARY KEY (place_id, output)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS workers (
+                name TEXT PRIMARY KEY,
+                last_seen REAL NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
             
-            for selector in cookie_selectors:
-                try:
-                    cookie_button = self.driver.find_element(By.XPATH, selector)
-                    cookie_button.click()
-                    print("Cookies aceitos.")
-                    time.sleep(1)
-                    return True
-                except NoSuchElementException:
-                    continue
-                    
-        except Exception as e:
-            print(f"Não foi necessário aceitar cookies ou ocorreu erro: {str(e)}")
+    def put(self, items):
+        """
+        Enfileira itens; itens cuja chave já está na fila são ignorados
+        
+        Args:
+            items (list): Dicionários com 'kind' ('search', 'tile' ou 'place'), 'key' e 'payload'
             
-        return False
+        Returns:
+            int: Quantidade de itens realmente enfileirados
+        """
+        with self._transaction() as conn:
+            return self._put(conn, items, time.time())
+            
+    def _put(self, conn, items, now):
+        added = 0
+        for item in items:
+            payload = item['payload']
+            added += conn.execute(
+                "INSERT OR IGNORE INTO items (key, kind, payload, priority, updated) VALUES (?, ?, ?, ?, ?)",
+                (item['key'], item['kind'], json.dumps(payload, ensure_ascii=False),
+                 self.PRIORITIES.get(item['kind'], 0), now)
+            ).rowcount
+            # Um lugar já enfileirado por outra busca não é extraído de novo, mas entra na saída desta também
+            if item['kind'] == 'place' and payload.get('output'):
+                conn.execute("INSERT OR IGNORE INTO targets (place_id, output) VALUES (?, ?)",
+                             (payload['place_id'] or payload['url'], payload['output']))
+        return added
+        
+    def _reclaim(self, conn, now):
+        # Aluguel vencido: o trabalhador morreu, travou ou perdeu a conexão
+        failed = conn.execute(
+            "UPDATE items SET status = 'failed', owner = NULL, error = 'aluguel vencido', updated = ? "
+            "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?", (now, now, self.max_attempts)
+        ).rowcount
+        reclaimed = conn.execute(
+            "UPDATE items SET status = 'pending', owner = NULL, updated = ? WHERE status = 'leased' AND lease_until < ?",
+            (now, now)
+        ).rowcount
+        if reclaimed or failed:
+            logger.warning("⚠ Aluguéis vencidos: %s itens voltaram para a fila, %s desistidos após %s tentativas.",
+                           reclaimed, failed, self.max_attempts)
+        return reclaimed
         
-    def _wait_for_first_element_present(self, selector_list, timeout=10):
+    def reclaim(self):
         """
-        Aguarda pelo primeiro seletor que encontrar um elemento presente
+        Devolve para a fila os itens cujo aluguel venceu
+        
+        Returns:
+            int: Quantidade de itens devolvidos
+        """
+        with self._transaction() as conn:
+            return self._reclaim(conn, time.time())
+            
+    def _touch(self, conn, worker, now, completed=0):
+        conn.execute(
+            "INSERT INTO workers (name, last_seen, completed) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET last_seen = excluded.last_seen, completed = completed + excluded.completed",
+            (worker, now, completed)
+        )
+        
+    def lease(self, worker, limit=1, lease_seconds=300):
+        """
+        Aluga os próximos itens pendentes (lugares primeiro)
         
         Args:
-            selector_list: Lista de tuplas (BY, seletor)
-            timeout: Tempo máximo de espera em segundos
+            worker (str): Nome do trabalhador
+            limit (int): Quantidade máxima de itens
+            lease_seconds (float): Duração do aluguel, renovada por heartbeat
             
         Returns:
-            str: O seletor CSS que funcionou ou None
+            list: Dicionários com 'id', 'key', 'kind', 'payload' e 'attempt'
         """
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            for by, selector in selector_list:
-                try:
-                    if self.driver.find_elements(by, selector):
-                        return selector
-                except:
-                    pass
-            time.sleep(0.5)
-        return None
+        now = time.time()
+        with self._transaction() as conn:
+            self._reclaim(conn, now)
+            rows = conn.execute(
+                "SELECT id, key, kind, payload, attempts FROM items WHERE status = 'pending' "
+                "ORDER BY priority DESC, id LIMIT ?", (max(1, limit),)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE items SET status = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1, updated = ? "
+                "WHERE id = ?", [(worker, now + lease_seconds, now, row[0]) for row in rows]
+            )
+            self._touch(conn, worker, now)
+        return [{'id': item_id, 'key': key, 'kind': kind, 'payload': json.loads(payload), 'attempt': attempts + 1}
+                for item_id, key, kind, payload, attempts in rows]
+                
+    def heartbeat(self, worker, lease_seconds=300):
+        """
+        Renova os aluguéis de um trabalhador
         
-    def _find_element_with_multiple_selectors(self, parent_element, selector_list):
+        Returns:
+            int: Quantidade de itens renovados
         """
-        Tenta encontrar um elemento usando múltiplos seletores
+        now = time.time()
+        with self._transaction() as conn:
+            extended = conn.execute(
+                "UPDATE items SET lease_until = ? WHERE status = 'leased' AND owner = ?", (now + lease_seconds, worker)
+            ).rowcount
+            self._touch(conn, worker, now)
+        return extended
+        
+    def complete(self, item_id, worker, results=(), children=()):
+        """
+        Conclui um item, gravando os negócios extraídos e enfileirando os itens gerados por ele
+        
+        Só o dono de um aluguel ainda válido pode concluir o item: um trabalhador cujo aluguel
+        venceu (e o item foi repassado ou já concluído por outro) tem o resultado descartado.
+        O resultado de um lugar que já tem resultado também é ignorado.
         
         Args:
-            parent_element: Elemento pai para buscar dentro
-            selector_list: Lista de tuplas (BY, seletor)
+            item_id (int): ID do item alugado
+            worker (str): Nome do trabalhador
+            results (list): Negócios extraídos
+            children (list): Itens novos (ex.: os lugares de uma busca, os ladrilhos de um ladrilho saturado)
             
         Returns:
-            WebElement ou None
+            int: Quantidade de negócios gravados ou None se o item não estiver alugado por `worker`
         """
-        for by, selector in selector_list:
-            try:
-                element = parent_element.find_element(by, selector)
-                return element
-            except NoSuchElementException:
-                continue
-            except Exception:
-                continue
-        return None
+        now = time.time()
+        saved = 0
+        with self._transaction() as conn:
+            row = conn.execute("SELECT payload FROM items WHERE id = ? AND status = 'leased' AND owner = ?",
+                               (item_id, worker)).fetchone()
+            if row is None:
+                return None
+            output = json.loads(row[0]).get('output')
+            conn.execute("UPDATE items SET status = 'done', owner = NULL, error = NULL, updated = ? WHERE id = ?",
+                         (now, item_id))
+            for business in results:
+                place_id = business.get('place_id') or business.get('url')
+                if not place_id:
+                    continue
+                saved += conn.execute(
+                    "INSERT OR IGNORE INTO results (place_id, data, worker, saved) VALUES (?, ?, ?, ?)",
+                    (place_id, json.dumps(business, ensure_ascii=False), worker, now)
+                ).rowcount
+                if output:
+                    conn.execute("INSERT OR IGNORE INTO targets (place_id, output) VALUES (?, ?)", (place_id, output))
+            self._put(conn, children, now)
+            self._touch(conn, worker, now, completed=1)
+        return saved
         
-    def _try_click_element(self, element):
+    def fail(self, item_id, worker, error=None):
         """
-        Tenta clicar em um elemento usando diferentes métodos
+        Devolve um item que falhou para a fila, ou o dá como falho após `max_attempts` tentativas
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, owner = NULL, "
+                "error = ?, updated = ? WHERE id = ? AND status = 'leased' AND owner = ?",
+                (self.max_attempts, str(error)[:500] if error else None, time.time(), item_id, worker)
+            )
+            
+    def stats(self, alive_seconds=300):
+        """
+        Andamento da fila
         
         Args:
-            element: Elemento para clicar
+            alive_seconds (float): Trabalhadores vistos há menos que isso contam como ativos
             
         Returns:
-            bool: True se conseguiu clicar, False caso contrário
+            dict: Itens por status ('pending', 'leased', 'done', 'failed'), 'results' e 'workers'
         """
-        methods = [
-            # Método 1: Clique normal
-            lambda: element.click(),
-            # Método 2: Clique via JavaScript
-            lambda: self.driver.execute_script("arguments[0].click();", element),
-            # Método 3: Ações
-            lambda: webdriver.ActionChains(self.driver).move_to_element(element).click().perform(),
-            # Método 4: Clique com JS após scroll
-            lambda: self.driver.execute_script("arguments[0].scrollIntoView(true); arguments[0].click();", element)
-        ]
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall())
+            results = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            workers = self._conn.execute("SELECT COUNT(*) FROM workers WHERE last_seen >= ?",
+                                         (time.time() - alive_seconds,)).fetchone()[0]
+        stats = {status: counts.get(status, 0) for status in ('pending', 'leased', 'done', 'failed')}
+        stats.update(results=results, workers=workers)
+        return stats
         
-        for method in methods:
-            try:
-                method()
-                return True
-            except (ElementClickInterceptedException, StaleElementReferenceException):
-                # Se o elemento estiver interceptado ou obsoleto, tente o próximo método
-                continue
-            except Exception as e:
-                print(f"Erro ao tentar clicar: {str(e)}")
-                continue
-                
-        return False
+    def iter_results(self):
+        """
+        Percorre os negócios extraídos, agrupados pelo arquivo de saída da busca em que apareceram
         
-    def _scroll_results(self, scroll_count):
+        Yields:
+            tuple: (arquivo de saída, negócio)
         """
-        Rola a lista de resultados para carregar mais itens
+        cursor = self._conn.execute(
+            "SELECT t.output, r.data FROM targets t JOIN results r ON r.place_id = t.place_id "
+            "ORDER BY t.output, r.saved"
+        )
+        for output, data in cursor:
+            yield output, json.loads(data)
+            
+    def close(self):
+        self._conn.close()
+
+
+class _WorkQueueHandler(BaseHTTPRequestHandler):
+    server_version = 'WorkQueue/1.0'
+    
+    def do_POST(self):
+        token = self.server.token
+        if token and not hmac.compare_digest(self.headers.get('X-Queue-Token', ''), token):
+            self.send_error(403)
+            return
+        method = urlsplit(self.path).path.strip('/')
+        if method not in WorkQueueServer.METHODS:
+            self.send_error(404)
+            return
+            
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            arguments = json.loads(self.rfile.read(length) or b'{}')
+            result = getattr(self.server.work_queue, method)(**arguments)
+        except (ValueError, TypeError, KeyError) as e:
+            self.send_error(400, str(e))
+            return
+        except sqlite3.Error as e:
+            logger.error("Erro na fila de trabalho (%s): %s", method, e)
+            self.send_error(503, str(e))
+            return
+            
+        data = json.dumps({'result': result}, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
         
+    def log_message(self, format, *args):
+        logger.debug("Fila HTTP: " + format, *args)
+
+
+def is_loopback_host(host):
+    """
+    Verifica se o endereço só é acessível desta máquina (127.0.0.1, ::1, localhost)
+    """
+    host = host.strip('[]')
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class WorkQueueServer:
+    """
+    Atende uma WorkQueue por HTTP, para trabalhadores em outras máquinas (ver HttpWorkQueue)
+    
+    Cada método da fila usado pelos trabalhadores é um POST em /<método> com os argumentos
+    em JSON (put não é exposto: só o coordenador enfileira buscas). Com `token`, as
+    requisições precisam do cabeçalho X-Queue-Token com o mesmo valor; sem ele, o servidor
+    só aceita escutar em um endereço local.
+    """
+    METHODS = ('lease', 'heartbeat', 'complete', 'fail', 'reclaim', 'stats')
+    
+    def __init__(self, work_queue, host='127.0.0.1', port=8765, token=None):
+        """
         Args:
-            scroll_count: Número de vezes para rolar
+            work_queue (WorkQueue): Fila atendida
+            host (str): Interface onde o servidor escuta (padrão: apenas esta máquina)
+            port (int): Porta (0 = escolhida pelo sistema)
+            token (str): Segredo compartilhado com os trabalhadores (obrigatório fora do endereço local)
         """
-        print(f"Rolando para carregar mais resultados ({scroll_count} rolagens)...")
+        if not token and not is_loopback_host(host):
+            raise ValueError(f"A fila só pode ser atendida em '{host}' com um token (--queue-token)")
+        self.work_queue = work_queue
+        self.host = host
+        self.port = port
+        self.token = token
+        self._httpd = None
+        self._thread = None
         
-        # Tentar diferentes seletores para o elemento rolável
-        scrollable_selectors = [
-            "div[role='feed']",
-            "div.m6QErb[role='region']",
-            "div.m6QErb",
-            "div.section-layout",
-            "div.section-scrollbox"
-        ]
+    def start(self):
+        """
+        Inicia o servidor em segundo plano
         
-        for i in range(scroll_count):
-            try:
-                # Tentar encontrar o elemento rolável
-                scrollable_div = None
-                for selector in scrollable_selectors:
-                    try:
-                        scrollable_div = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        break
-                    except NoSuchElementException:
-                        continue
-                
-                if scrollable_div:
-                    print(f"Fazendo rolagem {i+1}/{scroll_count}...")
-                    # Tentar diferentes métodos de rolagem
-                    try:
-                        # Método 1: scrollTop
-                        self.driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", scrollable_div)
-                    except:
-                        try:
-                            # Método 2: scrollBy
-                            self.driver.execute_script("arguments[0].scrollBy(0, 300)", scrollable_div)
-                        except:
-                            # Método 3: página inteira
-                            self.driver.execute_script("window.scrollBy(0, 300)")
-                else:
-                    # Se não encontrou elemento rolável, role a página
-                    self.driver.execute_script("window.scrollBy(0, 300)")
-                    
-                # Pausa para carregar novos resultados
-                time.sleep(random.uniform(2, 3))
-            except Exception as e:
-                print(f"Erro durante rolagem: {str(e)}")
-                
-    def _go_back_to_results(self):
+        Returns:
+            int: A porta em que o servidor escuta
         """
-        Volta para a lista de resultados a partir da página de detalhes
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _WorkQueueHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.work_queue = self.work_queue
+        self._httpd.token = self.token
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info("Fila de trabalho atendendo em http://%s:%s", self.host, self.port)
+        return self.port
+        
+    def stop(self):
+        """Encerra o servidor"""
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+
+class HttpWorkQueue:
+    """
+    Cliente de uma WorkQueue atendida por um WorkQueueServer, com os mesmos métodos.
+    
+    Erros de rede são repetidos algumas vezes com espera crescente (o coordenador pode estar
+    reiniciando). Repetir é seguro: um complete repetido é recusado sem efeito, e um aluguel
+    perdido volta para a fila quando vence. Os resultados ficam no banco do coordenador, que os exporta.
+    """
+    
+    def __init__(self, url, token=None, timeout=30, retries=4):
         """
-        # Tentar diferentes métodos para voltar
-        methods = [
-            # Método 1: Botão de voltar específico
-            lambda: self.driver.find_element(By.CSS_SELECTOR, "button[jsaction='pane.topappbar.back']").click(),
-            # Método 2: Botão com ícone de voltar
-            lambda: self.driver.find_element(By.CSS_SELECTOR, "button[aria-label='Voltar']").click(),
-            # Método 3: Botão com ícone de voltar (outra variação)
-            lambda: self.driver.find_element(By.CSS_SELECTOR, "button[aria-label='Back']").click(),
-            # Método 4: Qualquer botão com ícone de seta
-            lambda: self.driver.find_element(By.CSS_SELECTOR, "button.gsqi").click(),
-            # Método 5: Voltar do navegador
-            lambda: self.driver.execute_script("window.history.go(-1)")
-        ]
+        Args:
+            url (str): Endereço do WorkQueueServer (ex.: http://coordenador:8765)
+            token (str): Segredo compartilhado com o coordenador
+            timeout (float): Tempo máximo de cada requisição, em segundos
+            retries (int): Novas tentativas após um erro de rede
+        """
+        self.url = url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self.retries = max(0, retries)
         
-        for method in methods:
+    def _call(self, method, **arguments):
+        body = json.dumps(arguments, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['X-Queue-Token'] = self.token
+        for attempt in range(self.retries + 1):
+            request = urllib.request.Request(f"{self.url}/{method}", data=body, headers=headers, method='POST')
             try:
-                method()
-                # Esperar a lista de resultados reaparecer
-                time.sleep(1)
-                return True
-            except Exception:
-                continue
-                
-        print("⚠ Não foi possível voltar para a lista de resultados. Tentando nova pesquisa...")
-        # Se falhar todas as tentativas, tente recarregar a página
-        try:
-            self.driver.refresh()
-            time.sleep(3)
-        except:
-            pass
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    return json.loads(response.read().decode('utf-8'))['result']
+            except urllib.error.HTTPError as e:
+                # Token errado ou requisição inválida não melhoram com novas tentativas
+                if e.code != 503 or attempt >= self.retries:
+                    raise
+                error = e
+            except OSError as e:
+                if attempt >= self.retries:
+                    raise
+                error = e
+            delay = 2 ** attempt
+            logger.warning("⚠ Fila em %s indisponível (%s); nova tentativa em %ss.", self.url, error, delay)
+            time.sleep(delay)
             
-        return False
+    def lease(self, worker, limit=1, lease_seconds=300):
+        return self._call('lease', worker=worker, limit=limit, lease_seconds=lease_seconds)
+        
+    def heartbeat(self, worker, lease_seconds=300):
+        return self._call('heartbeat', worker=worker, lease_seconds=lease_seconds)
+        
+    def complete(self, item_id, worker, results=(), children=()):
+        return self._call('complete', item_id=item_id, worker=worker, results=list(results), children=list(children))
+        
+    def fail(self, item_id, worker, error=None):
+        return self._call('fail', item_id=item_id, worker=worker, error=str(error) if error else None)
+        
+    def reclaim(self):
+        return self._call('reclaim')
+        
+    def stats(self, alive_seconds=300):
+        return self._call('stats', alive_seconds=alive_seconds)
+        
+    def close(self):
+        pass
+
+
+# Filas de trabalho por esquema do endereço; um broker de produção é registrado aqui
+WORK_QUEUE_BACKENDS = {
+    'sqlite': lambda address, token=None, max_attempts=3: WorkQueue(
+        address.split('://', 1)[1][1:] if '://' in address else address, max_attempts=max_attempts),
+    'http': lambda address, token=None, max_attempts=3: HttpWorkQueue(address, token=token),
+    'https': lambda address, token=None, max_attempts=3: HttpWorkQueue(address, token=token),
+}
+
+
+def open_work_queue(address, token=None, max_attempts=3):
+    """
+    Abre a fila de trabalho do modo distribuído pelo endereço
     
-    def _extract_business_details(self):
+    Args:
+        address (str): Arquivo SQLite ('fila.db' ou 'sqlite:///fila.db'), endereço de um
+                       WorkQueueServer ('http://coordenador:8765') ou outro esquema registrado
+                       em WORK_QUEUE_BACKENDS
+        token (str): Segredo compartilhado com o WorkQueueServer
+        max_attempts (int): Aluguéis de um item antes de ele ser dado como falho (fila SQLite)
+        
+    Returns:
+        WorkQueue, HttpWorkQueue ou a fila do esquema registrado
+    """
+    scheme = address.split('://', 1)[0].lower() if '://' in address else 'sqlite'
+    backend = WORK_QUEUE_BACKENDS.get(scheme)
+    if backend is None:
+        raise ValueError(f"Fila de trabalho desconhecida: '{address}' "
+                         f"(esquemas aceitos: {', '.join(sorted(WORK_QUEUE_BACKENDS))})")
+    return backend(address, token=token, max_attempts=max_attempts)
+
+
+class Coordinator:
+    """
+    Coordenador do modo distribuído: transforma as buscas em itens da fila, acompanha o
+    andamento e, ao final, grava os resultados de cada busca no seu arquivo de saída.
+    
+    Uma busca por região vira um item 'search'; com `bounds`, vira um item 'tile' por ladrilho
+    da grade inicial. Os trabalhadores transformam esses itens em itens 'place' (um por lugar)
+    e os ladrilhos saturados em ladrilhos menores, então os detalhes são extraídos em paralelo
+    por todos os nós. Executar de novo com a mesma fila continua de onde parou.
+    
+    Os resultados são lidos do banco local da fila e gravados apenas nos arquivos de saída
+    das buscas carregadas; um arquivo informado por um item da fila é ignorado.
+    """
+    
+    def __init__(self, work_queue, jobs, output_dir='resultados', mode='links', bounds=None, grid=3,
+                 max_depth=2, saturation=100):
         """
-        Extrai detalhes do negócio da página de detalhes aberta (sem horários/avaliações/ratings).
+        Args:
+            work_queue (WorkQueue): Fila de trabalho local (banco SQLite); os trabalhadores de
+                                    outras máquinas a acessam pelo WorkQueueServer
+            jobs (list): Buscas retornadas por load_jobs
+            output_dir (str): Pasta dos arquivos de saída das buscas sem 'output'
+            mode (str): 'links' extrai a página de detalhes de cada lugar; 'list' só lê os cartões
+            bounds (tuple): Se informada, cada busca percorre esta área por ladrilhos (a região é ignorada)
+            grid (int): Linhas e colunas da grade inicial de ladrilhos
+            max_depth (int): Máximo de subdivisões de um ladrilho saturado
+            saturation (int): Quantidade de resultados a partir da qual o ladrilho é subdividido
+        """
+        if not isinstance(work_queue, WorkQueue):
+            raise TypeError("O coordenador precisa da fila local (WorkQueue), que guarda os resultados")
+        self.queue = work_queue
+        self.jobs = jobs
+        self.output_dir = output_dir
+        self.mode = mode
+        self.bounds = bounds
+        self.grid = grid
+        self.max_depth = max_depth
+        self.saturation = saturation
+        
+    def plan(self):
+        """
+        Enfileira as buscas (itens já enfileirados por uma execução anterior são mantidos)
         
         Returns:
-            dict: Um dicionário com os detalhes do negócio
+            int: Quantidade de itens novos
         """
-        details = {}
+        items = []
+        for job in self.jobs:
+            payload = {'query': job['niche'], 'output': job_output_path(job, self.output_dir), 'mode': self.mode}
+            if self.bounds:
+                payload.update(saturation=self.saturation, max_depth=self.max_depth)
+                items.extend(_tile_work_item(payload, tile) for tile in plan_tiles(self.bounds, self.grid))
+            else:
+                payload.update(region=job['region'], max_results=job['max_results'])
+                items.append({'kind': 'search', 'key': f"search:{job['niche']}|{job['region']}|{payload['output']}",
+                              'payload': payload})
+        added = self.queue.put(items)
+        logger.info("%s buscas enfileiradas em %s itens (%s já estavam na fila).", len(self.jobs), added,
+                    len(items) - added)
+        return added
         
-        try:
-            # Esperar pelo carregamento completo
-            time.sleep(2)
-            
-            # Coletar todos os textos dos botões e links para análise
-            all_buttons = self.driver.find_elements(By.CSS_SELECTOR, "button, a")
-            all_button_texts = {button.text.strip(): button for button in all_buttons if button.text.strip()}
-            
-            # Imprimir alguns botões encontrados para depuração
-            print(f"Botões encontrados: {min(5, len(all_button_texts))} de {len(all_button_texts)}")
-            
-            # Seletores para endereço
-            address_selectors = [
-                # Método 1: Botão específico com atributos
-                (By.CSS_SELECTOR, "button[data-item-id^='address'], [data-tooltip='Copiar endereço']"),
-                # Método 2: Botão com texto de endereço
-                (By.XPATH, "//button[contains(@aria-label, 'ndereço')]"),
-                # Método 3: Qualquer elemento com aria-label de endereço
-                (By.CSS_SELECTOR, "[aria-label*='endereço']"),
-                # Método 4: Links com \"maps\" na URL que podem conter o endereço
-                (By.CSS_SELECTOR, "a[href*='maps']"),
-                # Método 5: Botão com texto que parece um endereço (rua, avenida, etc)
-                (By.XPATH, "//button[contains(text(), 'Rua') or contains(text(), 'Av') or contains(text(), 'Avenida')]")
-            ]
-            
-            # Tentar extrair endereço
-            address_element = self._find_first_matching_element(address_selectors)
-            if address_element:
-                details['address'] = address_element.text.strip()
-                print(f"Endereço encontrado: {details['address'][:30]}...")
-            
-            # Seletores para telefone
-            phone_selectors = [
-                # Método 1: Botão específico
-                (By.CSS_SELECTOR, "button[data-item-id^='phone'], [data-tooltip='Copiar número de telefone']"),
-                # Método 2: Botão com label de telefone
-                (By.XPATH, "//button[contains(@aria-label, 'elefone')]"),
-                # Método 3: Qualquer elemento com texto que parece telefone
-                (By.XPATH, "//button[contains(text(), '(') and contains(text(), ')')]"),
-                # Método 4: Links com \"tel:\" na URL
-                (By.CSS_SELECTOR, "a[href^='tel:']")
-            ]
-            
-            # Tentar extrair telefone
-            phone_element = self._find_first_matching_element(phone_selectors)
-            if phone_element:
-                # Se for um link de telefone, extrair da URL
-                if phone_element.tag_name == 'a' and phone_element.get_attribute('href'):
-                    href = phone_element.get_attribute('href')
-                    if 'tel:' in href:
-                        details['phone'] = href.split('tel:')[1]
-                else:
-                    details['phone'] = phone_element.text.strip()
-                print(f"Telefone encontrado: {details.get('phone')}")
-            
-            # Seletores para website
-            website_selectors = [
-                # Método 1: Link específico
-                (By.CSS_SELECTOR, "a[data-item-id^='authority'], [data-tooltip='Abrir website']"),
-                # Método 2: Link com label de site
-                (By.XPATH, "//a[contains(@aria-label, 'site')]"),
-                # Método 3: Link com texto 'website' ou 'site'
-                (By.XPATH, "//a[contains(text(), 'site') or contains(text(), 'Site') or contains(text(), 'Website')]"),
-                # Método 4: Qualquer link externo (não do Google)
-                (By.CSS_SELECTOR, "a:not([href*='google'])")
-            ]
+    def wait(self, poll_seconds=15):
+        """
+        Aguarda até não haver itens pendentes nem alugados, mostrando o andamento
+        
+        Returns:
+            dict: O andamento final (ver WorkQueue.stats)
+        """
+        started = time.time()
+        initial = self.queue.stats()['results']
+        while True:
+            self.queue.reclaim()
+            stats = self.queue.stats()
+            elapsed = time.time() - started
+            logger.info("Fila: %s pendentes, %s em andamento, %s concluídos, %s com falha; %s lugares "
+                        "(%.1f por minuto), %s trabalhadores ativos.", stats['pending'], stats['leased'],
+                        stats['done'], stats['failed'], stats['results'],
+                        (stats['results'] - initial) * 60 / elapsed if elapsed else 0.0, stats['workers'])
+            if not stats['pending'] and not stats['leased']:
+                return stats
+            time.sleep(poll_seconds)
             
-            # Tentar extrair website
-            website_element = self._find_first_matching_element(website_selectors)
-            if website_element and website_element.get_attribute('href'):
-                href = website_element.get_attribute('href')
-                # Verificar se é um link externo válido
-                if ('http' in href and 'google' not in href):
-                    details['website'] = href
-                    print(f"Website encontrado: {details['website']}")
+    def export(self):
+        """
+        Grava os negócios de cada busca no seu arquivo de saída (CSV e JSONL, ver ResultSink)
+        
+        Um lugar encontrado por várias buscas, extraído uma vez só, entra na saída de cada uma.
+        
+        Returns:
+            list: Os arquivos CSV gravados
+        """
+        jobs = {job_output_path(job, self.output_dir): job for job in self.jobs}
+        sinks = {}
+        ignored = 0
+        try:
+            for output, business in self.queue.iter_results():
+                job = jobs.get(output)
+                if job is None:
+                    # Saída que não veio das buscas carregadas: nunca gravar em um caminho vindo da fila
+                    ignored += 1
+                    continue
+                sink = sinks.get(output)
+                if sink is None:
+                    if os.path.dirname(output):
+                        os.makedirs(os.path.dirname(output), exist_ok=True)
+                    sink = sinks[output] = ResultSink(output, query=job['niche'], region=job['region'],
+                                                      fsync_every=1000)
+                sink.write(business)
+        finally:
+            for sink in sinks.values():
+                sink.close()
+        if ignored:
+            logger.warning("⚠ %s resultados de saídas que não pertencem às buscas carregadas foram ignorados.",
+                           ignored)
+        return list(sinks)
+
+
+class DistributedWorker:
+    """
+    Trabalhador do modo distribuído: aluga itens da fila, executa-os e devolve os resultados.
+    
+    Cada uma das `scrapers` threads mantém um navegador aberto e aluga até `batch` itens por
+    vez; os próximos lugares do lote são carregados em abas de fundo com `prefetch`. Uma
+    thread de heartbeat renova os aluguéis deste nó a cada terço de `lease_seconds`. Vários
+    nós podem trabalhar na mesma fila, e a vazão cresce com a quantidade de navegadores.
+    """
+    
+    def __init__(self, work_queue, scraper_factory, name=None, scrapers=1, batch=5, lease_seconds=300,
+                 store=None, poll_seconds=10):
+        """
+        Args:
+            work_queue (WorkQueue): Fila de trabalho (ver open_work_queue)
+            scraper_factory: Função que recebe o número da thread e cria um GoogleMapsSeleniumScraper
+            name (str): Nome do trabalhador nos aluguéis (padrão: máquina-processo)
+            scrapers (int): Navegadores deste nó
+            batch (int): Itens alugados de cada vez por navegador
+            lease_seconds (float): Duração dos aluguéis
+            store (PlaceStore): Banco de lugares local, para reaproveitar lugares extraídos recentemente
+            poll_seconds (float): Espera quando não há itens pendentes, mas ainda há itens em andamento
+        """
+        self.queue = work_queue
+        self.scraper_factory = scraper_factory
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.scrapers = max(1, scrapers)
+        self.batch = max(1, batch)
+        self.lease_seconds = lease_seconds
+        self.store = store
+        self.poll_seconds = poll_seconds
+        self.completed = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._pool = []
+        
+    def run(self):
+        """
+        Trabalha até a fila esvaziar (nada pendente nem em andamento em nenhum nó)
+        
+        Um trabalhador iniciado antes do coordenador espera a fila ser preenchida.
+        """
+        logger.info("Trabalhador %s iniciado com %s navegador(es).", self.name, self.scrapers)
+        started = time.time()
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        threads = [threading.Thread(target=self._work, args=(index,), daemon=True)
+                   for index in range(1, self.scrapers + 1)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        finally:
+            self._stop.set()
+            self._report()
             
-            # Extrair categoria
+        elapsed = time.time() - started
+        logger.info("Trabalhador %s encerrado: %s itens concluídos, %s com falha em %.0fs.",
+                    self.name, self.completed, self.failed, elapsed)
+                    
+    def _heartbeat(self):
+        while not self._stop.wait(max(1, self.lease_seconds / 3)):
+            try:
+                self.queue.heartbeat(self.name, self.lease_seconds)
+            except Exception as e:
+                logger.warning("⚠ Falha no heartbeat da fila: %s", e)
+                
+    def _work(self, index):
+        scraper = None
+        errors = 0
+        while not self._stop.is_set():
             try:
-                category_selectors = [
-                    (By.CSS_SELECTOR, "button[jsaction*='category']"),
-                    (By.XPATH, "//button[contains(@jsaction, 'category')]"),
-                    (By.CSS_SELECTOR, "span.DkEaL, span.mgr77e")
-                ]
-                
-                category_element = self._find_first_matching_element(category_selectors)
-                if category_element:
-                    details['category'] = category_element.text.strip()
-                    print(f"Categoria encontrada: {details['category']}")
+                items = self.queue.lease(self.name, self.batch, self.lease_seconds)
+                stats = self.queue.stats() if not items else None
             except Exception as e:
-                print(f"Erro ao extrair categoria: {str(e)}")
+                # Fila inacessível (rede, coordenador reiniciando): espera crescente em vez de encerrar a thread
+                errors += 1
+                delay = min(self.poll_seconds * 2 ** (errors - 1), 300)
+                logger.warning("⚠ Erro ao alugar itens da fila: %s; nova tentativa em %.0fs.", e, delay)
+                self._stop.wait(delay)
+                continue
+            errors = 0
+            if not items:
+                if (stats['done'] or stats['failed']) and not stats['pending'] and not stats['leased']:
+                    return
+                # Fila ainda não preenchida pelo coordenador, ou itens em andamento em outros nós, que
+                # ainda podem gerar lugares ou voltar para a fila
+                self._stop.wait(self.poll_seconds)
+                continue
+                
+            if scraper is None:
+                try:
+                    scraper = self.scraper_factory(index)
+                except Exception as e:
+                    logger.error("Erro ao abrir o navegador %s: %s", index, e)
+                    for item in items:
+                        self._fail(item, e)
+                    return
+                with self._lock:
+                    self._pool.append(scraper)
+            self._process(scraper, items)
             
-            # Tentar encontrar email no texto da página
+    def _process(self, scraper, items):
+        """
+        Executa os itens alugados e devolve cada resultado para a fila
+        """
+        for position, item in enumerate(items):
             try:
-                # Procurar links de email
-                email_selectors = [
-                    (By.CSS_SELECTOR, "a[href^='mailto:']"),
-                    (By.XPATH, "//a[contains(@href, 'mailto:')]")
-                ]
-                
-                email_element = self._find_first_matching_element(email_selectors)
-                if email_element and email_element.get_attribute('href'):
-                    email = email_element.get_attribute('href').replace('mailto:', '')
-                    details['email'] = email
-                    print(f"Email encontrado (link): {email}")
+                if item['kind'] == 'place':
+                    upcoming = [other['payload'] for other in items[position + 1:] if other['kind'] == 'place']
+                    results, children = self._run_place(scraper, item['payload'], upcoming[:scraper.prefetch]), []
                 else:
-                    # Se não encontrou link direto, buscar padrão de email no conteúdo da página
-                    page_source = self.driver.page_source
-                    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-                    email_matches = re.findall(email_pattern, page_source)
-                    
-                    if email_matches:
-                        # Filtrar emails que parecem ser do Google
-                        valid_emails = [e for e in email_matches
-                                        if not ('google' in e.lower() or 'gstatic' in e.lower())]
-                        if valid_emails:
-                            details['email'] = valid_emails[0]
-                            print(f"Email encontrado (texto): {details['email']}")
+                    results, children = self._run_search(scraper, item)
+                accepted = self.queue.complete(item['id'], self.name, results, children)
             except Exception as e:
-                print(f"Erro ao extrair email: {str(e)}")
-            
-        except Exception as e:
-            print(f"Erro geral ao extrair detalhes: {str(e)}")
+                self._fail(item, e)
+                continue
+            if accepted is None:
+                # O aluguel venceu e o item foi repassado: o resultado do novo dono prevalece
+                logger.warning("⚠ Item %s não está mais alugado por este trabalhador; resultado descartado.",
+                               item['key'])
+                continue
+            with self._lock:
+                self.completed += 1
+            if item['kind'] == 'place':
+                # Pausa entre negócios para evitar detecção
+                scraper._pace()
+        scraper._close_prefetched()
         
-        return details
-    
-    def _find_first_matching_element(self, selector_list):
+    def _fail(self, item, error):
+        logger.warning("⚠ Item %s falhou (tentativa %s): %s", item['key'], item['attempt'], error)
+        with self._lock:
+            self.failed += 1
+        try:
+            self.queue.fail(item['id'], self.name, error)
+        except Exception as e:
+            # Sem a fila, o item volta sozinho quando o aluguel vencer
+            logger.warning("⚠ Não foi possível devolver o item %s para a fila: %s", item['key'], e)
+            
+    def _run_place(self, scraper, link, upcoming):
         """
-        Encontra o primeiro elemento que corresponde a um dos seletores na lista
+        Extrai um lugar (ou o reaproveita do banco de lugares local)
         
-        Args:
-            selector_list: Lista de tuplas (By, seletor)
-            
         Returns:
-            WebElement ou None
+            list: O negócio extraído
         """
-        for by, selector in selector_list:
-            try:
-                elements = self.driver.find_elements(by, selector)
-                if elements:
-                    return elements[0]
-            except Exception:
-                continue
-        return None
-    
-    def export_to_csv(self, businesses, filename='empresas.csv'):
+        cached = self.store.get_fresh(link['place_id']) if self.store else None
+        if cached:
+            return [cached]
+        logger.info("Processando negócio: %s", link['name'])
+        business = scraper._extract_place_from_url(link, upcoming)
+        kind = RetryQueue.classify(None, business, scraper._blocked)
+        if kind:
+            # A fila tenta de novo depois, talvez em outro nó
+            raise RuntimeError(f"extração incompleta ({kind})")
+        if self.store and set(business) - {'name', 'place_id', 'url'}:
+            self.store.save(business)
+        return [business]
+        
+    def _run_search(self, scraper, item):
         """
-        Exporta os resultados para um arquivo CSV
+        Pesquisa uma região ou um ladrilho e transforma os resultados em itens de lugares
         
-        Args:
-            businesses (list): Lista de dicionários com os dados das empresas
-            filename (str): Nome do arquivo CSV a ser criado
-            
         Returns:
-            bool: True se a exportação foi bem-sucedida, False caso contrário
+            tuple: (negócios dos cartões no modo 'list', itens novos)
         """
-        if not businesses:
-            print("Nenhum dado para exportar.")
-            return False
-        
-        try:
-            # Coletar todas as chaves que aparecem nos dicionários
-            all_keys = set()
-            for biz in businesses:
-                all_keys.update(biz.keys())
-            
-            fieldnames = list(all_keys)
-            
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
-                writer.writeheader()
-                
-                for biz in businesses:
-                    writer.writerow(biz)
+        payload = item['payload']
+        tile = payload.get('tile')
+        list_mode = payload['mode'] == 'list'
+        max_results = payload.get('max_results', 0)
+        if tile:
+            search_term = (f"{payload['query']} @{tile['south']:.4f},{tile['west']:.4f},"
+                           f"{tile['north']:.4f},{tile['east']:.4f}")
+        else:
+            search_term = f"{payload['query']} {payload['region']}"
             
-            print(f"Dados exportados para '{filename}' com sucesso!")
-            return True
-        except Exception as e:
-            print(f"Erro ao exportar para CSV: {str(e)}")
-            return False
-
-    def close(self):
+        links = scraper._cached_links(search_term, max_results, details=list_mode)
+        if links is None:
+            started = time.time()
+            scraper._blocked = None
+            if tile:
+                result_selector = scraper._open_search(payload['query'], url=tile_search_url(
+                    payload['query'], tile, maps_url=scraper.maps_url))
+            else:
+                result_selector = scraper._open_search(search_term)
+            if not result_selector:
+                if scraper._blocked:
+                    # Uma página bloqueada não é uma busca vazia: outra tentativa, talvez em outro nó
+                    raise RuntimeError(f"página bloqueada ({scraper._blocked})")
+                return [], []
+            links = scraper._scroll_results(result_selector, max_results, details=list_mode)
+            scraper._cache_links(search_term, links, max_results, list_mode, started)
+        logger.info("Encontrados %s resultados em %s.", len(links), item['key'])
+        
+        children = []
+        if tile and len(links) >= payload['saturation'] and tile['depth'] < payload['max_depth']:
+            logger.info("Ladrilho saturado (%s resultados); subdividindo...", len(links))
+            children.extend(_tile_work_item(payload, child) for child in split_tile(tile))
+        if list_mode:
+            return [scraper._card_business(link) for link in links], children
+        children.extend(_place_work_item(link, payload['output']) for link in links)
+        return [], children
+        
+    def _report(self):
         """
-        Encerra o WebDriver e fecha o navegador.
+        Junta as métricas de todos os navegadores deste nó no primeiro, mostra o relatório e fecha os navegadores
         """
-        if self.driver:
-            self.driver.quit()
-            print("Navegador fechado.")
+        if not self._pool:
+            return
+        primary = self._pool[0]
+        for scraper in self._pool[1:]:
+            primary.waits.merge(scraper.waits)
+            primary.commands.merge(scraper.commands)
+            primary.metrics.merge(scraper.metrics)
+            if primary.network and scraper.network:
+                scraper.network.collect()
+                primary.network.merge(scraper.network)
+            if primary.capture and scraper.capture:
+                primary.capture.merge(scraper.capture)
+            primary.rate.merge(scraper.rate)
+            primary.retries.merge(scraper.retries)
+        primary._report_run()
+        for scraper in self._pool:
+            try:
+                scraper.close()
+            except Exception:
+                pass
 
 
 if __name__ == "__main__":
-    niche = input("Informe o nicho (categoria) de negócios a pesquisar: ")
-    region = input("Informe a região: ")
+    parser = argparse.ArgumentParser(description="Coleta dados de empresas no Google Maps.")
+    parser.add_argument("--niche", help="Nicho (categoria) de negócios a pesquisar")
+    parser.add_argument("--region", help="Região da busca")
+    parser.add_argument("--max-results", type=int, help="Quantidade de empresas a coletar (0 = sem limite)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Número de navegadores extraindo detalhes em paralelo (padrão: 1)")
+    parser.add_argument("--tabs", type=int, default=1,
+                        help="Abas de um único Chrome extraindo detalhes em paralelo, controladas pelo DevTools "
+                             "Protocol (requer aiohttp; substitui --workers)")
+    parser.add_argument("--mode", choices=["click", "links", "list"], default="click",
+                        help="'click' navega clicando nos cartões; 'links' abre cada página de detalhes pelo link; "
+                             "'list' só lê os cartões da lista, sem abrir as páginas de detalhes")
+    parser.add_argument("--headless", action="store_true", help="Executa o Chrome sem interface gráfica")
+    parser.add_argument("--lean", action="store_true",
+                        help="Bloqueia imagens, mapas, fontes, mídia e analytics para economizar banda")
+    parser.add_argument("--backend", choices=["dom", "xhr"], default="dom",
+                        help="'dom' lê cada página de detalhes; 'xhr' lê os lugares das respostas internas da "
+                             "lista de resultados e só abre as páginas de detalhes dos que faltarem")
+    parser.add_argument("--network-stats", action="store_true",
+                        help="Mostra requisições e bytes transferidos ao final (sempre ativo com --lean)")
+    parser.add_argument("--max-pages", type=int, default=300,
+                        help="Fecha e reabre o navegador após esta quantidade de páginas, para a memória não "
+                             "crescer em execuções longas (padrão: 300; 0 = nunca)")
+    parser.add_argument("--max-memory-mb", type=float, default=0,
+                        help="Também reabre o navegador quando ele passar desta memória em MB (requer psutil)")
+    parser.add_argument("--rate", type=float, default=0.5,
+                        help="Páginas por segundo no início; a taxa sobe enquanto não há bloqueios e cai a "
+                             "cada CAPTCHA ou painel vazio (padrão: 0.5)")
+    parser.add_argument("--max-rate", type=float, default=3.0,
+                        help="Maior taxa de páginas por segundo de cada navegador (padrão: 3)")
+    parser.add_argument("--prefetch", type=int, default=0, metavar="N",
+                        help="Carrega as próximas N páginas de detalhes em abas de fundo enquanto a atual é "
+                             "extraída (modo links e ladrilhos; padrão: 0 = desligado)")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="Tentativas de cada lugar cuja extração falhar (clique, cartão obsoleto, tempo esgotado, "
+                             "bloqueio ou só o nome); as novas tentativas ficam para o final da busca (padrão: 3)")
+    parser.add_argument("--user-data-dir", metavar="PASTA",
+                        help="Perfil persistente do Chrome (mantém o consentimento de cookies entre execuções)")
+    parser.add_argument("--output", default="resultados.csv",
+                        help="Arquivo CSV de saída; também são gravados um .jsonl, um .checkpoint.json e um "
+                             ".checkpoint.ids")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continua uma execução interrompida da mesma busca, pulando os lugares já gravados")
+    parser.add_argument("--store", metavar="ARQUIVO",
+                        help="Banco SQLite de lugares já extraídos, reaproveitados entre execuções")
+    parser.add_argument("--store-ttl", type=float, default=7,
+                        help="Validade, em dias, de um lugar no banco (padrão: 7)")
+    parser.add_argument("--search-cache", metavar="ARQUIVO",
+                        help="Banco SQLite com as listas de resultados das buscas; uma busca repetida dentro da "
+                             "validade vai direto para os detalhes, sem rolar a lista")
+    parser.add_argument("--search-cache-ttl", type=float, default=24,
+                        help="Validade, em horas, de uma lista de resultados no cache (padrão: 24)")
+    parser.add_argument("--search-cache-mb", type=float, default=50,
+                        help="Tamanho máximo do cache de buscas em MB; as buscas usadas há mais tempo são "
+                             "descartadas (padrão: 50)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Apenas extrai novamente os lugares vencidos do banco (requer --store)")
+    parser.add_argument("--bbox", metavar="SUL,OESTE,NORTE,LESTE",
+                        help="Busca por ladrilhos dentro desta área (substitui --region)")
+    parser.add_argument("--center", metavar="LAT,LNG",
+                        help="Busca por ladrilhos em torno deste ponto (use com --radius-km)")
+    parser.add_argument("--radius-km", type=float, default=5, help="Raio da busca em torno de --center (padrão: 5)")
+    parser.add_argument("--grid", type=int, default=3, help="Linhas/colunas da grade inicial de ladrilhos (padrão: 3)")
+    parser.add_argument("--max-depth", type=int, default=2,
+                        help="Máximo de subdivisões de um ladrilho saturado (padrão: 2)")
+    parser.add_argument("--jobs", metavar="ARQUIVO",
+                        help="Executa em lote as buscas de um arquivo CSV, YAML ou JSONL (niche, region, max_results)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Buscas simultâneas no modo em lote, cada uma com seu navegador (padrão: 1)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Novas tentativas de cada busca que falhar no modo em lote (padrão: 2)")
+    parser.add_argument("--output-dir", default="resultados",
+                        help="Pasta dos arquivos de saída do modo em lote (padrão: resultados)")
+    parser.add_argument("--enrich", action="store_true",
+                        help="Ao final, visita o site de cada negócio para completar e-mail e telefone (requer aiohttp)")
+    parser.add_argument("--enrich-only", metavar="ARQUIVO",
+                        help="Não pesquisa: apenas completa um arquivo de resultados com os dados dos sites")
+    parser.add_argument("--enrich-concurrency", type=int, default=20,
+                        help="Sites visitados simultaneamente (padrão: 20; no máximo 2 requisições por domínio)")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Ao final, normaliza telefones (E.164), sites e endereços e remove os lugares repetidos")
+    parser.add_argument("--dedupe-only", nargs="+", metavar="ARQUIVO",
+                        help="Não pesquisa: apenas normaliza e remove os repetidos; um arquivo é regravado, "
+                             "vários são juntados em --output")
+    parser.add_argument("--dedupe-memory-mb", type=int, default=64,
+                        help="Memória máxima do índice usado para achar os repetidos, em MB (padrão: 64)")
+    parser.add_argument("--coordinator", metavar="FILA",
+                        help="Modo distribuído: enfileira as buscas (--jobs, --niche/--region ou --bbox/--center) "
+                             "no banco FILA, espera os trabalhadores e grava os resultados")
+    parser.add_argument("--listen", metavar="HOST:PORTA",
+                        help="Com --coordinator, atende por HTTP os trabalhadores de outras máquinas "
+                             "(ex.: 0.0.0.0:8765; fora de 127.0.0.1 exige --queue-token)")
+    parser.add_argument("--worker", metavar="FILA",
+                        help="Modo distribuído: trabalha na fila FILA (banco SQLite ou http://coordenador:porta) "
+                             "com --workers navegadores, até ela esvaziar")
+    parser.add_argument("--queue-token", metavar="SEGREDO",
+                        help="Segredo compartilhado entre o coordenador e os trabalhadores HTTP")
+    parser.add_argument("--lease-seconds", type=float, default=300,
+                        help="Tempo sem heartbeat após o qual o item de um trabalhador volta para a fila "
+                             "(padrão: 300)")
+    parser.add_argument("--selector-stats", default="seletores.json", metavar="ARQUIVO",
+                        help="Estatísticas de acerto dos seletores, que definem a ordem em que são tentados "
+                             "(padrão: seletores.json)")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO",
+                        help="Nível mínimo das mensagens (padrão: INFO; DEBUG mostra cada campo e cada fase)")
+    parser.add_argument("--log-format", choices=["text", "json"], default="text",
+                        help="'json' grava uma linha JSON por mensagem (logs estruturados)")
+    parser.add_argument("--metrics", metavar="ARQUIVO",
+                        help="Grava as métricas de cada busca (fases, comandos, esperas, seletores); "
+                             "formato Prometheus se terminar em .prom, senão JSON")
+    args = parser.parse_args()
+    configure_logging(args.log_level, args.log_format)
+    
+    try:
+        bounds = parse_bounds(args.bbox, args.center, args.radius_km)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    # O prefetch só existe onde as páginas de detalhes são abertas pelo link
+    if args.prefetch and args.mode != "links" and not (args.bbox or args.center or args.worker or args.refresh):
+        logger.warning("⚠ --prefetch só vale no modo links, nos ladrilhos, em --worker e em --refresh; "
+                       "com --mode %s ele é ignorado.", args.mode)
+    
+    selectors = SelectorRegistry(args.selector_stats)
+    enricher = WebsiteEnricher(concurrency=args.enrich_concurrency) if args.enrich or args.enrich_only else None
+    
+    if args.dedupe_only:
+        output = args.dedupe_only[0] if len(args.dedupe_only) == 1 else args.output
+        dedupe_results(args.dedupe_only, output, memory_mb=args.dedupe_memory_mb)
+        raise SystemExit(0)
+    
+    if args.enrich_only:
+        enricher.enrich_file(args.enrich_only)
+        raise SystemExit(0)
+    
+    store = PlaceStore(args.store, ttl_days=args.store_ttl) if args.store else None
+    search_cache = (SearchCache(args.search_cache, ttl_hours=args.search_cache_ttl, max_mb=args.search_cache_mb)
+                    if args.search_cache else None)
+    
+    if args.refresh:
+        if not store:
+            parser.error("--refresh requer --store")
+        scraper = GoogleMapsSeleniumScraper(headless=args.headless, user_data_dir=args.user_data_dir,
+                                            lean=args.lean, network_stats=args.network_stats,
+                                            metrics_path=args.metrics, selectors=selectors,
+                                            backend=args.backend, max_pages=args.max_pages,
+                                            max_rss_mb=args.max_memory_mb, start_rate=args.rate,
+                                            max_rate=args.max_rate, prefetch=args.prefetch,
+                                            max_attempts=args.max_attempts)
+        try:
+            scraper.refresh_stale_places(store)
+        finally:
+            store.close()
+            scraper.close()
+        raise SystemExit(0)
+        
+    if args.worker:
+        work_queue = open_work_queue(args.worker, token=args.queue_token)
+        
+        def make_scraper(index):
+            # Cada navegador do nó tem o seu perfil persistente
+            user_data_dir = f"{args.user_data_dir}-{index}" if args.user_data_dir else None
+            return GoogleMapsSeleniumScraper(headless=args.headless, user_data_dir=user_data_dir,
+                                             lean=args.lean, network_stats=args.network_stats,
+                                             metrics_path=args.metrics, selectors=selectors,
+                                             backend=args.backend, max_pages=args.max_pages,
+                                             max_rss_mb=args.max_memory_mb, start_rate=args.rate,
+                                             max_rate=args.max_rate, prefetch=args.prefetch,
+                                             search_cache=search_cache, max_attempts=args.max_attempts)
+                                             
+        worker = DistributedWorker(work_queue, make_scraper, scrapers=args.workers, batch=max(5, args.prefetch + 1),
+                                   lease_seconds=args.lease_seconds, store=store)
+        try:
+            worker.run()
+        finally:
+            work_queue.close()
+            if store:
+                store.close()
+            if search_cache:
+                search_cache.close()
+        raise SystemExit(0)
+        
+    if args.coordinator:
+        if args.jobs:
+            jobs = load_jobs(args.jobs, output_dir=args.output_dir)
+        else:
+            niche = args.niche or input("Informe o nicho (categoria) de negócios a pesquisar: ")
+            region = (",".join(f"{value:.6f}" for value in bounds) if bounds
+                      else args.region or input("Informe a região: "))
+            jobs = [{'niche': niche, 'region': region, 'max_results': args.max_results or 0, 'output': args.output}]
+            
+        if "://" in args.coordinator and not args.coordinator.lower().startswith("sqlite://"):
+            parser.error("--coordinator precisa de um banco SQLite local (os trabalhadores usam --listen)")
+        listen = None
+        if args.listen:
+            host, _, port = args.listen.rpartition(":")
+            host = host or "127.0.0.1"
+            if not port.isdigit():
+                parser.error("--listen deve ter a forma HOST:PORTA (ex.: 127.0.0.1:8765)")
+            if not args.queue_token and not is_loopback_host(host):
+                parser.error(f"--listen em '{host}' expõe a fila na rede: informe também --queue-token")
+            listen = (host, int(port))
+            
+        work_queue = open_work_queue(args.coordinator, max_attempts=args.max_attempts)
+        server = None
+        if listen:
+            server = WorkQueueServer(work_queue, host=listen[0], port=listen[1], token=args.queue_token)
+            server.start()
+        # O modo 'click' não se aplica: cada lugar é um item da fila, aberto pelo link
+        coordinator = Coordinator(work_queue, jobs, output_dir=args.output_dir,
+                                  mode="list" if args.mode == "list" else "links", bounds=bounds, grid=args.grid,
+                                  max_depth=args.max_depth)
+        try:
+            coordinator.plan()
+            coordinator.wait()
+            outputs = coordinator.export()
+        finally:
+            if server:
+                server.stop()
+            work_queue.close()
+        for output in outputs:
+            if args.dedupe:
+                dedupe_results([output], output, memory_mb=args.dedupe_memory_mb)
+            if enricher:
+                enricher.enrich_file(output)
+        raise SystemExit(0)
+        
+    if args.jobs:
+        jobs = load_jobs(args.jobs, output_dir=args.output_dir)
+        runner = BatchRunner(jobs, output_dir=args.output_dir, concurrency=args.concurrency,
+                             retries=args.retries, headless=args.headless, mode=args.mode,
+                             workers=args.workers, store=store, user_data_dir=args.user_data_dir,
+                             scraper_options={'lean': args.lean, 'network_stats': args.network_stats,
+                                              'metrics_path': args.metrics, 'selectors': selectors,
+                                              'backend': args.backend, 'max_pages': args.max_pages,
+                                              'max_rss_mb': args.max_memory_mb, 'start_rate': args.rate,
+                                              'max_rate': args.max_rate, 'prefetch': args.prefetch,
+                                              'search_cache': search_cache, 'max_attempts': args.max_attempts},
+                             enricher=enricher, tabs=args.tabs, dedupe=args.dedupe)
+        try:
+            runner.run()
+        finally:
+            if store:
+                store.close()
+            if search_cache:
+                search_cache.close()
+        raise SystemExit(0)
+    
+    niche = args.niche or input("Informe o nicho (categoria) de negócios a pesquisar: ")
+    
+    if bounds:
+        # Busca por ladrilhos: a área define a região
+        sink = ResultSink(args.output, query=niche, region=",".join(f"{value:.6f}" for value in bounds),
+                          resume=args.resume)
+        completed = False
+        # Com --workers > 1 cada ladrilho roda em um navegador auxiliar: este não abre o Chrome
+        scraper = GoogleMapsSeleniumScraper(headless=args.headless, user_data_dir=args.user_data_dir,
+                                            lean=args.lean, network_stats=args.network_stats,
+                                            metrics_path=args.metrics, selectors=selectors,
+                                            backend=args.backend, max_pages=args.max_pages,
+                                            max_rss_mb=args.max_memory_mb, start_rate=args.rate,
+                                            max_rate=args.max_rate, prefetch=args.prefetch,
+                                            search_cache=search_cache, max_attempts=args.max_attempts,
+                                            launch=args.workers <= 1)
+        try:
+            scraper.search_region_tiles(niche, bounds, grid=args.grid, max_depth=args.max_depth,
+                                        workers=args.workers, sink=sink, store=store)
+            completed = True
+        finally:
+            sink.close(completed=completed)
+            if store:
+                store.close()
+            if search_cache:
+                search_cache.close()
+            scraper.close()
+        if args.dedupe:
+            dedupe_results([sink.csv_path], sink.csv_path, memory_mb=args.dedupe_memory_mb)
+        if enricher:
+            enricher.enrich_file(sink.csv_path)
+        raise SystemExit(0)
+        
+    region = args.region or input("Informe a região: ")
 
     # Pergunta ao usuário quantas empresas deseja coletar.
     # Se o usuário digitar 0, consideramos ilimitado.
+    if args.max_results is not None:
+        max_results = args.max_results
+    else:
+        try:
+            qtd_str = input("Quantas empresas deseja coletar? (0 = sem limite): ")
+            max_results = int(qtd_str)
+        except ValueError:
+            max_results = 0  # Se o usuário não digitar um número, consideramos sem limite.
+            
+    # Os resultados são gravados à medida que são extraídos
+    sink = ResultSink(args.output, query=niche, region=region, resume=args.resume)
+    completed = False
+    # Com --tabs, um único Chrome extrai os detalhes em várias abas
+    tab_options = {'tabs': args.tabs} if args.tabs > 1 else {}
+    scraper = (MultiTabScraper if args.tabs > 1 else GoogleMapsSeleniumScraper)(
+        headless=args.headless, user_data_dir=args.user_data_dir, lean=args.lean,
+        network_stats=args.network_stats, metrics_path=args.metrics, selectors=selectors,
+        backend=args.backend, max_pages=args.max_pages, max_rss_mb=args.max_memory_mb,
+        start_rate=args.rate, max_rate=args.max_rate, prefetch=args.prefetch, search_cache=search_cache,
+        max_attempts=args.max_attempts, **tab_options)
     try:
-        qtd_str = input("Quantas empresas deseja coletar? (0 = sem limite): ")
-        max_results = int(qtd_str)
-    except ValueError:
-        max_results = 0  # Se o usuário não digitar um número, consideramos sem limite.
-
-    scraper = GoogleMapsSeleniumScraper(headless=False)
-    try:
-        resultados = scraper.search_businesses(niche, region, max_results=max_results)
-        scraper.export_to_csv(resultados, filename="resultados.csv")
+        if args.workers > 1 and args.tabs <= 1 and args.mode != "list":
+            scraper.search_businesses_parallel(niche, region, max_results=max_results,
+                                               workers=args.workers, sink=sink, store=store)
+        else:
+            scraper.search_businesses(niche, region, max_results=max_results, mode=args.mode,
+                                      sink=sink, store=store)
+        completed = True
     finally:
+        sink.close(completed=completed)
+        if store:
+            store.close()
+        if search_cache:
+            search_cache.close()
         scraper.close()
+
+    # Remover os repetidos antes de visitar os sites, para não visitar o mesmo site duas vezes
+    if args.dedupe:
+        dedupe_results([sink.csv_path], sink.csv_path, memory_mb=args.dedupe_memory_mb)
+        
+    # Completar e-mail e telefone com os sites dos negócios, fora do navegador
+    if enricher:
+        enricher.enrich_file(sink.csv_path)
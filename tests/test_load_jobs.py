@@ -0,0 +1,64 @@
+"""
+Testes da leitura do arquivo de buscas em lote (load_jobs).
+
+Cada busca grava em um arquivo próprio; uma busca que gravaria no mesmo arquivo de uma
+anterior (informado em 'output' ou vindo do nicho e da região) é ignorada com um aviso.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from scraperMaps import load_jobs
+
+
+def load(text, extension='.csv', output_dir='resultados'):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'buscas' + extension)
+        with open(path, 'w', encoding='utf-8') as jobs_file:
+            jobs_file.write(text)
+        return load_jobs(path, output_dir=output_dir)
+
+
+class LoadJobsTest(unittest.TestCase):
+
+    def test_rows(self):
+        jobs = load("niche,region,max_results,output\npadaria,sp,10,\nmercado,rj,,saida/mercado.csv\n")
+        self.assertEqual(jobs, [
+            {'niche': 'padaria', 'region': 'sp', 'max_results': 10, 'output': None},
+            {'niche': 'mercado', 'region': 'rj', 'max_results': 0, 'output': 'saida/mercado.csv'}
+        ])
+
+    def test_invalid_rows_are_skipped(self):
+        with self.assertLogs('scraperMaps', 'WARNING') as logs:
+            jobs = load('{"niche": "padaria", "region": "sp"}\n{"niche": "mercado"}\n{json\n'
+                        '{"niche": "farmacia", "region": "rj", "max_results": "dez"}\n', extension='.jsonl')
+        self.assertEqual([job['niche'] for job in jobs], ['padaria'])
+        self.assertEqual(len(logs.output), 3)
+
+    def test_same_derived_output(self):
+        with self.assertLogs('scraperMaps', 'WARNING'):
+            jobs = load("niche,region\nPadaria,São Paulo\npadaria,sao paulo\n")
+        self.assertEqual(len(jobs), 1)
+
+    def test_explicit_output_same_as_derived(self):
+        with self.assertLogs('scraperMaps', 'WARNING'):
+            jobs = load("niche,region,output\npadaria,sp,\npadaria,x,resultados/padaria_sp.csv\n")
+        self.assertEqual([job['region'] for job in jobs], ['sp'])
+        with self.assertLogs('scraperMaps', 'WARNING'):
+            jobs = load("niche,region,output\npadaria,x,./lote/../lote/padaria_sp.csv\npadaria,sp,\n",
+                        output_dir='lote')
+        self.assertEqual([job['region'] for job in jobs], ['x'])
+
+    def test_same_name_in_another_folder(self):
+        jobs = load("niche,region,output\npadaria,sp,\npadaria,x,outra/padaria_sp.csv\n")
+        self.assertEqual(len(jobs), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
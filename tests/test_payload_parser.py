@@ -0,0 +1,142 @@
+"""
+Testes do parser das respostas internas do Maps (backend 'xhr').
+
+As respostas em tests/fixtures estão no formato que o Maps entrega (prefixo )]}', resposta
+/search?tbm=map embrulhada em {"d": ...} e APP_INITIALIZATION_STATE com o JSON dentro de um
+texto) e incluem as variações que já apareceram: vetores mais curtos, campos ausentes ou de
+outro tipo, site como redirecionamento do Google e vetores que parecem lugares mas não são.
+Os valores esperados estão escritos aqui, e não calculados a partir de PAYLOAD_FIELD_PATHS.
+
+    python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+from scraperMaps import decode_maps_payload, parse_maps_payload, parse_place_array
+
+CENTRO = {
+    'name': 'Autoescola Centro',
+    'address': 'R. Augusta, 1500 - Consolação, São Paulo - SP, 01304-001',
+    'category': 'Autoescola',
+    'phone': '(11) 3251-1234',
+    'website': 'https://www.autoescolacentro.com.br/',
+    'latitude': -23.5558,
+    'longitude': -46.6622,
+    'place_id': 'ChIJFaMK2shZzpQRandBOvIxn9U',
+    'feature_id': '0x94ce59c8da0aa315:0xd59f9431f2c9776a'
+}
+
+PAULISTA = {
+    'name': 'Autoescola Paulista',
+    'address': 'Av. Paulista, 900 - Bela Vista, São Paulo - SP',
+    'website': 'https://paulista.com.br/',
+    'latitude': -23.5614,
+    'longitude': -46.6559,
+    'feature_id': '0x94ce59c9b90c9b0b:0x2e8c4f6c1f2c7a11'
+}
+
+LAPA = {
+    'name': 'Autoescola Lapa',
+    'address': 'R. Guaicurus, 50 - Lapa, São Paulo - SP',
+    'category': 'Autoescola',
+    'phone': '(11) 3831-0000',
+    'place_id': 'ChIJLb88P4L4zpQR5LfC2GM6jxs',
+    'feature_id': '0x94cef8023f3c1b2d:0x1b8f3a63d8c2b7e4'
+}
+
+
+def read_fixture(name):
+    with open(os.path.join(TESTS_DIR, 'fixtures', name), encoding='utf-8') as f:
+        return f.read()
+
+
+def place(length=179, **positions):
+    """
+    Vetor de lugar com `length` posições vazias e os valores dados (ex.: p11='Nome' na posição 11)
+    """
+    array = [None] * length
+    for key, value in positions.items():
+        array[int(key[1:])] = value
+    return array
+
+
+class DecodeMapsPayloadTest(unittest.TestCase):
+
+    def test_xssi_prefix(self):
+        self.assertEqual(decode_maps_payload(")]}'\n[1, [\"a\"]]"), [1, ['a']])
+
+    def test_search_response_wrapper(self):
+        data = decode_maps_payload(read_fixture('search_response.txt'))
+        self.assertEqual(data['c'], 0)
+        self.assertTrue(data['d'].startswith(")]}'"))
+
+    def test_plain_json(self):
+        self.assertEqual(decode_maps_payload('  {"a": null}  '), {'a': None})
+
+    def test_invalid_text(self):
+        self.assertIsNone(decode_maps_payload("<html>Erro 502</html>"))
+        self.assertIsNone(decode_maps_payload(")]}'\n[1, 2"))
+
+
+class ParseMapsPayloadTest(unittest.TestCase):
+
+    def test_search_response(self):
+        places = parse_maps_payload(read_fixture('search_response.txt'))
+        self.assertEqual(places, [CENTRO, PAULISTA, LAPA])
+
+    def test_initial_state_with_nested_json_string(self):
+        places = parse_maps_payload(read_fixture('initial_state.json'))
+        self.assertEqual(places, [CENTRO])
+
+    def test_already_decoded(self):
+        data = decode_maps_payload(read_fixture('search_response.txt'))
+        self.assertEqual([found['name'] for found in parse_maps_payload(data)],
+                         ['Autoescola Centro', 'Autoescola Paulista', 'Autoescola Lapa'])
+
+    def test_lookalike_arrays_are_ignored(self):
+        payload = [place(20, p10='0x94ce:abc', p11='Não é um lugar'), place(20, p10='0x1:0x2', p11=12345),
+                   place(11, p10='0x1:0x2')]
+        self.assertEqual(parse_maps_payload(payload), [])
+
+    def test_without_places(self):
+        self.assertEqual(parse_maps_payload(")]}'\n[null, [], {\"d\": \"texto\"}]"), [])
+        self.assertEqual(parse_maps_payload("não é JSON"), [])
+
+
+class ParsePlaceArrayTest(unittest.TestCase):
+
+    def test_website_redirect(self):
+        parsed = parse_place_array(place(p7=['/url?q=https%3A%2F%2Fexemplo.com.br%2Fcontato%3Fa%3D1&opi=79508299'],
+                                         p10='0x1:0x2', p11='Exemplo'))
+        self.assertEqual(parsed['website'], 'https://exemplo.com.br/contato?a=1')
+
+    def test_website_redirect_inside_google_is_dropped(self):
+        parsed = parse_place_array(place(p7=['/url?q=/maps/place/Exemplo'], p10='0x1:0x2', p11='Exemplo'))
+        self.assertNotIn('website', parsed)
+
+    def test_short_array(self):
+        parsed = parse_place_array(place(12, p9=[None, None, -23.5, -46.6], p10='0x1:0x2', p11='Exemplo'))
+        self.assertEqual(parsed, {'name': 'Exemplo', 'latitude': -23.5, 'longitude': -46.6, 'feature_id': '0x1:0x2'})
+
+    def test_address_from_name_and_address_field(self):
+        parsed = parse_place_array(place(50, p10='0x1:0x2', p11='Exemplo', p18='Exemplo, Rua A, 10 - Centro'))
+        self.assertEqual(parsed['address'], 'Rua A, 10 - Centro')
+        parsed = parse_place_array(place(50, p10='0x1:0x2', p11='Exemplo', p18='Rua A, 10 - Centro'))
+        self.assertEqual(parsed['address'], 'Rua A, 10 - Centro')
+
+    def test_fields_of_another_type(self):
+        parsed = parse_place_array(place(p9=[None, None, True, '-46.6'], p10='0x1:0x2', p11='Exemplo',
+                                         p13='Autoescola', p39=['Rua A'], p78=123, p178=[]))
+        self.assertEqual(parsed, {'name': 'Exemplo', 'feature_id': '0x1:0x2'})
+
+    def test_blank_values(self):
+        parsed = parse_place_array(place(p10='0x1:0x2', p11=' Exemplo ', p39='   ', p178=[['  ']]))
+        self.assertEqual(parsed, {'name': 'Exemplo', 'feature_id': '0x1:0x2'})
+
+
+if __name__ == '__main__':
+    unittest.main()